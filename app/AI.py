@@ -1,69 +1,675 @@
 import chess
+import chess.polyglot
+import hashlib
 import math
-from utils import PIECE_VALUES, POSITION_VALUES
-def alphabeta_pruning(boardCopy,movement,depth,alpha,beta,maximizingPlayer):
+import time
+from array import array
+from evaluation import MAX_PHASE, PHASE_TYPE_VALUES, PIECE_TYPE_VALUES, TAPERED_VALUES
+from pawns import PawnHashTable
+from position import MAX_MOVES, NULL_MOVE, Position
+from see import exchange
+from storage import MOVE_STRUCT, pack_move, unpack_move
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
+from utils import PHASE_VALUES, PIECE_VALUES
+
+# Valor de una posición ganada según las tablas de finales. Es mayor que
+# cualquier evaluación material para que la búsqueda la prefiera siempre.
+TB_WIN_VALUE = 20000
+
+# Opciones de búsqueda selectiva. Cada una se puede desactivar por separado
+# con el parámetro options de SearchContext.
+SEARCH_OPTIONS = {
+        "NullMove": True,
+        "LateMoveReductions": True,
+        "Futility": True,
+        "PawnStructure": True,
+        "SEE": True,
+        "Quiescence": False
+    }
+
+NULL_MOVE_REDUCTION = 2
+
+# Las jugadas tranquilas a partir de la posición LMR_MOVES se reducen en
+# LMR_REDUCTION cuando quedan al menos LMR_DEPTH niveles.
+LMR_MOVES = 3
+LMR_DEPTH = 3
+LMR_REDUCTION = 1
+
+# Lo máximo que una jugada tranquila puede cambiar la evaluación.
+FUTILITY_MARGIN = 50
+
+# Memoria reservada para las listas de jugadas de minMaxMax y minMaxMin
+# (64 niveles de MAX_MOVES jugadas, ver position.py).
+MOVE_STACK_LIMIT = 64*MAX_MOVES*MOVE_STRUCT.size
+
+class SearchTimeout(Exception):
+    """
+    Se lanza cuando la búsqueda supera el tiempo o los nodos límite del contexto.
+    """
+
+class SearchContext:
+    """
+    Estado compartido por todos los nodos de una misma búsqueda.
+    """
+    def __init__(self,tablebase=None,deadline=None,clock=time.monotonic,options=None,tt=None,pawns=None,maxNodes=None):
+        # Tablas de finales (ver tablebase.py) y resultados ya consultados.
+        self.tablebase = tablebase
+        self.tbCache = {}
+
+        # Tabla de transposiciones (ver transposition.py), que puede
+        # conservarse entre búsquedas o compartirse entre procesos.
+        self.tt = tt
+
+        # Nodos visitados.
+        self.nodes = 0
+
+        # Instante (según clock) en el que la búsqueda debe abandonarse.
+        self.deadline = deadline
+        self.clock = clock
+
+        # Nodos tras los que la búsqueda debe abandonarse (sin límite si es None).
+        self.maxNodes = maxNodes
+
+        # Opciones de búsqueda selectiva (ver SEARCH_OPTIONS).
+        options = dict(SEARCH_OPTIONS,**(options or {}))
+        self.nullMove = options["NullMove"]
+        self.lateMoveReductions = options["LateMoveReductions"]
+        self.futility = options["Futility"]
+
+        # Evaluación estática de intercambios (ver see.py): ordena las capturas
+        # y descarta las perdedoras cerca de las hojas y en la quiescencia.
+        self.see = options["SEE"]
+
+        # Búsqueda de quiescencia: en las hojas se siguen las capturas hasta
+        # llegar a una posición tranquila.
+        self.quiescence = options["Quiescence"]
+
+        # Tabla de la estructura de peones (ver pawns.py). Si la opción
+        # PawnStructure está desactivada, la evaluación no tiene en cuenta los peones.
+        if options["PawnStructure"]:
+            self.pawns = pawns if pawns is not None else PawnHashTable()
+        else:
+            self.pawns = None
+
+def checkLimits(context):
+    """
+    Lanza SearchTimeout si la búsqueda ha superado el tiempo o los nodos del contexto.
+    """
+    if ((context.deadline is not None and context.clock() >= context.deadline)
+            or (context.maxNodes is not None and context.nodes >= context.maxNodes)):
+        raise SearchTimeout()
+
+def probeTablebase(position,context):
+    """
+    Devuelve el valor exacto de la posición según las tablas de finales,
+    o None si no se puede consultar. Los resultados quedan en la caché del contexto.
+    Solo las posiciones que se pueden consultar se convierten a chess.Board.
+    """
+    tablebase = context.tablebase
+    if not tablebase or not tablebase.can_probe(position):
+        return None
+
+    key = position.key
+    if key not in context.tbCache:
+        wdl = tablebase.probe_wdl(position.to_board())
+        context.tbCache[key] = tablebaseValue(wdl,position.turn) if wdl is not None else None
+    return context.tbCache[key]
+
+def tablebaseValue(wdl,turn):
+    """
+    Convierte un resultado WDL (visto por el jugador que tiene el turno) en un
+    valor de la búsqueda, positivo cuando ganan las negras.
+    Las victorias y derrotas anuladas por la regla de los 50 movimientos son tablas.
+    """
+    value = TB_WIN_VALUE if wdl == 2 else -TB_WIN_VALUE if wdl == -2 else 0
+    return value if turn == chess.BLACK else -value
+
+def alphabeta_pruning(boardCopy,movement,depth,alpha,beta,maximizingPlayer,context=None,phase=None):
+    """
+    Juega movement sobre el tablero, busca depth niveles más con poda
+    alfa-beta y devuelve el valor. El tablero no se modifica: se busca sobre
+    una Position (ver alphabetaMove), que lleva la fase de la partida, por lo
+    que phase solo se acepta por compatibilidad.
+    """
+    return alphabetaMove(Position.from_board(boardCopy),pack_move(chess.Move.from_uci(movement)),depth,alpha,beta,maximizingPlayer,context)
+
+def alphabetaMove(position,move,depth,alpha,beta,maximizingPlayer,context=None):
+    """
+    Juega move (empaquetada con pack_move, o NULL_MOVE) sobre la Position,
+    busca depth niveles más con poda alfa-beta y deshace la jugada. La
+    posición se recorre con make/unmake: no se copia en ningún nodo.
+    """
+    if context:
+        context.nodes += 1
+        if context.nodes & 63 == 0:
+            checkLimits(context)
+
+    if move == NULL_MOVE:
+        position.make_null()
+    else:
+        position.make(move)
+
     if depth == 0:
-        return evaluateBoard(boardCopy,movement)
-    
-    boardCopy.push(chess.Move.from_uci(movement))
-    legal_moves = [str(mov) for mov in boardCopy.legal_moves]
+        if context and context.quiescence:
+            value = quiescenceNode(position,alpha,beta,maximizingPlayer,context)
+        else:
+            value = evaluate(position,context and context.pawns)
+    else:
+        value = alphabetaNode(position,move,depth,alpha,beta,maximizingPlayer,context)
 
-    if maximizingPlayer:
-        value = -(math.inf)
-        for move in legal_moves:
-            value = max(value,alphabeta_pruning(boardCopy.copy(),move,depth-1,alpha,beta,False))
+    position.unmake()
+    return value
+
+def alphabetaNode(position,move,depth,alpha,beta,maximizingPlayer,context):
+    """
+    Cuerpo de alphabetaMove, con la jugada del nodo ya hecha.
+    """
+    alphaOrig, betaOrig = alpha, beta
+    key = None
+    ttMove = None
+
+    if not context:
+        legal_moves = position.legal_moves()
+        selective = False
+    else:
+        value = probeTablebase(position,context)
+        if value is not None:
+            return value
+
+        # Consultamos la tabla de transposiciones: si la posición ya se buscó
+        # con la profundidad suficiente, su valor sirve directamente.
+        if context.tt is not None:
+            key = position.key
+            entry = context.tt.probe(key)
+            if entry:
+                ttDepth, ttValue, ttBound, ttMove = entry
+                if ttDepth >= depth and (ttBound == EXACT
+                        or (ttBound == LOWER and ttValue >= beta)
+                        or (ttBound == UPPER and ttValue <= alpha)):
+                    return ttValue
+                ttMove = pack_move(ttMove) if ttMove else None
+
+        legal_moves = orderPackedMoves(position,ttMove,context.see)
+        inCheck = position.is_check()
+        selective = not inCheck
+
+        # Poda de movimiento nulo: si aun cediendo el turno al rival la posición
+        # supera la cota, no hace falta buscarla. No se usa estando en jaque, tras
+        # otro movimiento nulo ni cuando solo quedan peones (riesgo de zugzwang).
+        if (context.nullMove and selective and depth > NULL_MOVE_REDUCTION
+                and move != NULL_MOVE and position.has_pieces(position.turn)):
+            if maximizingPlayer and beta < math.inf:
+                value = alphabetaMove(position,NULL_MOVE,depth-1-NULL_MOVE_REDUCTION,beta-1,beta,False,context)
+                if value >= beta:
+                    return value
+            elif not maximizingPlayer and alpha > -(math.inf):
+                value = alphabetaMove(position,NULL_MOVE,depth-1-NULL_MOVE_REDUCTION,alpha,alpha+1,True,context)
+                if value <= alpha:
+                    return value
+
+        # Poda de futilidad: en los nodos previos a las hojas, una jugada
+        # tranquila no puede mejorar la evaluación estática en más de FUTILITY_MARGIN.
+        futile = context.futility and selective and depth == 1
+        if futile:
+            staticValue = evaluate(position,context.pawns)
+            bound = staticValue + FUTILITY_MARGIN if maximizingPlayer else staticValue - FUTILITY_MARGIN
+            futile = (bound <= alpha) if maximizingPlayer else (bound >= beta)
+
+    value = -(math.inf) if maximizingPlayer else math.inf
+    bestMov = None
+    for index, mov in enumerate(legal_moves):
+        reduced = False
+
+        if selective and (futile or (context.lateMoveReductions and depth >= LMR_DEPTH and index >= LMR_MOVES)) and isQuietPacked(position,mov):
+            if futile:
+                value = max(value,bound) if maximizingPlayer else min(value,bound)
+                continue
+            reduced = True
+        elif (selective and context.see and depth == 1 and abs(value) != math.inf
+                and position.is_capture(mov) and seeMove(position,mov) < 0 and not position.gives_check(mov)):
+            # Cerca de las hojas no se buscan las capturas que pierden material
+            # según el intercambio, salvo que sean la única jugada que queda.
+            continue
+
+        if reduced:
+            # Reducción de jugadas tardías: las jugadas tranquilas que la
+            # ordenación deja al final se buscan con menos profundidad y solo
+            # se vuelven a buscar completas si mejoran el mejor valor.
+            evaluation = alphabetaMove(position,mov,depth-1-LMR_REDUCTION,alpha,beta,not maximizingPlayer,context)
+            if (evaluation > alpha) if maximizingPlayer else (evaluation < beta):
+                evaluation = alphabetaMove(position,mov,depth-1,alpha,beta,not maximizingPlayer,context)
+        else:
+            evaluation = alphabetaMove(position,mov,depth-1,alpha,beta,not maximizingPlayer,context)
+
+        if (evaluation > value) if maximizingPlayer else (evaluation < value):
+            value = evaluation
+            bestMov = mov
+
+        if maximizingPlayer:
             if value >= beta:
                 break
             alpha = max(alpha,value)
-        return value
+        else:
+            if value <= alpha:
+                break
+            beta = min(beta,value)
+
+    if key is not None:
+        ttBound = UPPER if value <= alphaOrig else LOWER if value >= betaOrig else EXACT
+        context.tt.store(key,depth,value,ttBound,unpack_move(bestMov) if bestMov is not None else None)
+    return value
+
+def orderMoves(boardCopy,firstMove=None,useSee=False):
+    """
+    Devuelve las jugadas legales del tablero (chess.Move) en el orden de
+    orderPackedMoves.
+    """
+    position = Position.from_board(boardCopy)
+    firstMove = pack_move(firstMove) if firstMove else None
+    return [unpack_move(mov) for mov in orderPackedMoves(position,firstMove,useSee)]
+
+def orderPackedMoves(position,firstMove=None,useSee=False):
+    """
+    Devuelve las jugadas legales (empaquetadas) ordenadas: primero firstMove
+    (normalmente la jugada de la tabla de transposiciones), luego las capturas
+    (de la víctima más valiosa con el atacante menos valioso), las
+    coronaciones y por último las jugadas tranquilas.
+    Con useSee, las capturas que pierden material según el intercambio (ver
+    see.py) pasan detrás de las jugadas tranquilas.
+    """
+    pieces = position.pieces
+    def key(mov):
+        if mov == firstMove:
+            return (-1,0,0)
+        if position.is_capture(mov):
+            # En la captura al paso la casilla de destino está vacía.
+            victim = PIECE_TYPE_VALUES[pieces[(mov >> 6) & 63] or chess.PAWN]
+            attacker = PIECE_TYPE_VALUES[pieces[mov & 63]]
+            # Si la víctima vale al menos lo que el atacante, el intercambio no puede perder.
+            if useSee and attacker > victim:
+                exchange = seeMove(position,mov)
+                if exchange < 0:
+                    return (3,-exchange,0)
+            return (0,-victim,attacker)
+        if mov >> 12:
+            return (1,-PIECE_TYPE_VALUES[mov >> 12],0)
+        return (2,0,0)
+    # La lista de legal_moves se ordena sobre sí misma, sin hacer otra copia.
+    moves = position.legal_moves()
+    moves.sort(key=key)
+    return moves
+
+def quiescence(boardCopy,alpha,beta,maximizingPlayer,context,phase=None):
+    """
+    Búsqueda de quiescencia desde el tablero (con la jugada del nodo ya
+    hecha), que no se modifica. Como en alphabeta_pruning, phase solo se
+    acepta por compatibilidad.
+    """
+    return quiescenceNode(Position.from_board(boardCopy),alpha,beta,maximizingPlayer,context)
+
+def quiescenceNode(position,alpha,beta,maximizingPlayer,context):
+    """
+    Búsqueda de quiescencia: a partir de la evaluación estática (el jugador
+    puede no capturar), solo se buscan las capturas, hasta que no quede
+    ninguna. Con la opción SEE se descartan las que pierden material.
+    La posición (con la jugada del nodo ya hecha) se recorre con make/unmake.
+    """
+    context.nodes += 1
+    if context.nodes & 63 == 0:
+        checkLimits(context)
+
+    value = evaluate(position,context.pawns)
+    if maximizingPlayer:
+        if value >= beta:
+            return value
+        alpha = max(alpha,value)
     else:
-        value = (math.inf)
-        for move in legal_moves:
-            value = min(value,alphabeta_pruning(boardCopy.copy(),move,depth-1,alpha,beta,True))
+        if value <= alpha:
+            return value
+        beta = min(beta,value)
+
+    # Capturas de la víctima más valiosa con el atacante menos valioso.
+    pieces = position.pieces
+    captures = position.legal_captures()
+    captures.sort(key=lambda mov: (
+        -PIECE_TYPE_VALUES[pieces[(mov >> 6) & 63] or chess.PAWN],
+        PIECE_TYPE_VALUES[pieces[mov & 63]]))
+
+    for mov in captures:
+        if context.see and seeMove(position,mov) < 0:
+            continue
+
+        position.make(mov)
+        evaluation = quiescenceNode(position,alpha,beta,not maximizingPlayer,context)
+        position.unmake()
+
+        if maximizingPlayer:
+            value = max(value,evaluation)
+            if value >= beta:
+                break
+            alpha = max(alpha,value)
+        else:
+            value = min(value,evaluation)
             if value <= alpha:
                 break
             beta = min(beta,value)
-        return value
-
-def evaluateBoard(boardCopy,movement):
-    value = 0
-    boardCopy.push(chess.Move.from_uci(movement))
-    for i in range(8):
-        for j in range(8):
-            piece = str(boardCopy.piece_at(chess.Square((i*8+j))))
-            pieceVal = PIECE_VALUES[piece] if piece != 'None' else 0
-            posVal = POSITION_VALUES[piece][i][j] if piece != 'None' else 0
-            value += pieceVal + posVal
+
+    return value
+
+def seeMove(position,mov):
+    """
+    Evaluación estática de intercambios (ver see.py) de una jugada empaquetada.
+    """
+    return exchange(position,mov & 63,(mov >> 6) & 63,mov >> 12,position.is_en_passant(mov))
+
+def isQuiet(boardCopy,mov):
+    """
+    Verifica si una jugada no es captura, ni coronación, ni da jaque.
+    """
+    return not (mov.promotion or boardCopy.is_capture(mov) or boardCopy.gives_check(mov))
+
+def isQuietPacked(position,mov):
+    """
+    Igual que isQuiet, con la jugada empaquetada.
+    """
+    return not (mov >> 12 or position.is_capture(mov) or position.gives_check(mov))
+
+def evaluate(position,pawns=None):
+    """
+    Evaluación de la posición de la búsqueda: la que mantiene Position (igual
+    a evaluatePosition) más la estructura de peones si se indica su tabla.
+    """
+    return position.value + pawns.evaluate(position) if pawns is not None else position.value
+
+def hasPieces(boardCopy,color):
+    """
+    Verifica si el jugador tiene alguna pieza además del rey y los peones.
+    """
+    return bool(boardCopy.occupied_co[color] & ~(boardCopy.pawns | boardCopy.kings))
+
+def evaluateBoard(boardCopy,movement,phase=None,pawns=None):
+    mov = chess.Move.from_uci(movement)
+    if phase is not None:
+        phase = updatePhase(boardCopy,mov,phase)
+    boardCopy.push(mov)
+    return evaluatePosition(boardCopy,phase,pawns)
+
+def evaluatePosition(boardCopy,phase=None,pawns=None):
+    """
+    Evalúa la posición actual del tablero (positivo cuando están mejor las negras).
+    Las tablas de medio juego y de final se mezclan según la fase de la partida;
+    si no se indica, se calcula a partir de las piezas del tablero.
+    Si se indica una tabla de peones (ver pawns.py), se suma la evaluación de
+    la estructura de peones.
+    """
+    if phase is None:
+        phase = gamePhase(boardCopy)
+    table = TAPERED_VALUES[min(phase,MAX_PHASE)]
+
+    value = pawns.evaluate(boardCopy) if pawns is not None else 0
+    for square, piece in boardCopy.piece_map().items():
+        value += table[piece.symbol()][square]
     return value
 
-def minMaxMax(boardCopy,movement,depth):
+def gamePhase(boardCopy):
+    """
+    Calcula la fase de la partida: MAX_PHASE con todas las piezas y 0 sin ellas.
+    """
+    return (chess.popcount(boardCopy.knights) * PHASE_VALUES['n']
+            + chess.popcount(boardCopy.bishops) * PHASE_VALUES['b']
+            + chess.popcount(boardCopy.rooks) * PHASE_VALUES['r']
+            + chess.popcount(boardCopy.queens) * PHASE_VALUES['q'])
+
+def updatePhase(boardCopy,mov,phase):
+    """
+    Devuelve la fase de la partida después de la jugada (antes de jugarla).
+    """
+    if mov:
+        captured = boardCopy.piece_type_at(mov.to_square)
+        if captured:
+            phase -= PHASE_TYPE_VALUES[captured]
+        if mov.promotion:
+            phase += PHASE_TYPE_VALUES[mov.promotion] - PHASE_TYPE_VALUES[chess.PAWN]
+    return phase
+
+class MoveStack:
+    """
+    Listas de jugadas de minMaxMax y minMaxMin: un array de enteros de 16 bits
+    (ver pack_move en storage.py) por cada nivel de la búsqueda, reservado una
+    sola vez y reutilizado por todos los nodos de ese nivel, en el que
+    Position.generate_moves escribe directamente las jugadas. Así la memoria de
+    la búsqueda no crece con el número de nodos y tiene un límite fijo:
+    memoryLimit bytes, que determinan el número máximo de niveles.
+    """
+    __slots__ = ("moves","maxPly")
+
+    def __init__(self,memoryLimit=MOVE_STACK_LIMIT):
+        self.maxPly = memoryLimit // (MAX_MOVES*MOVE_STRUCT.size)
+        self.moves = [array("H",bytes(MAX_MOVES*MOVE_STRUCT.size)) for _ in range(self.maxPly)]
+
+def minMaxMax(boardCopy,movement,depth,stack=None):
+    """
+    Minimax desde el punto de vista de las negras. Juega movement sobre el
+    tablero, busca depth niveles más y devuelve (valor, jugada de la hoja).
+    El tablero no se modifica: se busca sobre una Position (ver position.py).
+    """
+    return minMaxRoot(boardCopy,movement,depth,True,stack)
+
+def minMaxMin(boardCopy,movement,depth,stack=None):
+    """
+    Igual que minMaxMax, desde el punto de vista de las blancas.
+    """
+    return minMaxRoot(boardCopy,movement,depth,False,stack)
+
+def minMaxRoot(boardCopy,movement,depth,maximizingPlayer,stack=None):
+    if stack is None:
+        stack = MoveStack()
+    # Cada nivel con depth >= 0 usa una lista de jugadas.
+    if depth+1 > stack.maxPly:
+        raise MemoryError(f"La búsqueda a profundidad {depth} supera el límite de {stack.maxPly} niveles")
+
+    # La búsqueda recorre una Position (ver position.py) con make/unmake; el
+    # tablero solo se convierte aquí.
+    value, move = minMaxNode(Position.from_board(boardCopy),pack_move(chess.Move.from_uci(movement)),depth,maximizingPlayer,stack.moves,0)
+    return value, move if move is None else str(unpack_move(move))
+
+def minMaxNode(position,move,depth,maximizingPlayer,stack,ply):
+    """
+    Nodo de minimax con las jugadas empaquetadas. Devuelve (valor, jugada de la
+    hoja); sin jugadas legales devuelve (±infinito, None). La evaluación es la
+    que la posición mantiene al hacer cada jugada.
+    """
+    position.make(move)
     if depth < 0:
-        value = evaluateBoard(boardCopy,movement)
-        return {"Value":value,"Movement":movement}
-    
-    boardCopy.push(chess.Move.from_uci(movement))
-    max = -(math.inf)
-    legal_moves = [str(mov) for mov in boardCopy.legal_moves]
-    result = {}
-    for move in legal_moves:
-       evaluation = minMaxMin(boardCopy.copy(),move,depth-1)
-       if  evaluation["Value"] > max:
-            max = evaluation["Value"]
+        value = position.value
+        position.unmake()
+        return value, move
+
+    # Las jugadas se generan directamente en el array del nivel.
+    moves = stack[ply]
+    count = position.generate_moves(moves)
+
+    best = -(math.inf) if maximizingPlayer else math.inf
+    result = (best, None)
+    for i in range(count):
+        evaluation = minMaxNode(position,moves[i],depth-1,not maximizingPlayer,stack,ply+1)
+        if (evaluation[0] > best) if maximizingPlayer else (evaluation[0] < best):
+            best = evaluation[0]
             result = evaluation
+
+    position.unmake()
     return result
 
-def minMaxMin(boardCopy,movement,depth):
-    if depth < 0:
-        value = evaluateBoard(boardCopy,movement)
-        return {"Value":value,"Movement":movement}
-    
-    boardCopy.push(chess.Move.from_uci(movement))
-    min = math.inf
-    legal_moves = [str(mov) for mov in boardCopy.legal_moves]
+def probeRoot(board,book=None,tablebase=None):
+    """
+    Consulta el libro de aperturas y las tablas de finales en la raíz.
+    Devuelve {"Value": valor, "Movement": jugada} si alguno conoce la
+    posición, o None si hay que buscar.
+    """
+    if book:
+        movement = book.get_move(board)
+        if movement:
+            return {"Value":None,"Movement":movement}
+
+    if tablebase and tablebase.can_probe(board):
+        probe = tablebase.best_move(board)
+        if probe:
+            movement, wdl = probe
+            return {"Value":tablebaseValue(wdl,board.turn),"Movement":movement}
+
+    return None
+
+def searchRoot(board,depth,context,firstMove=None,exclude=()):
+    """
+    Busca todas las jugadas de la raíz a la profundidad dada y devuelve
+    {"Value": valor, "Movement": jugada, "Second": valor}, donde "Second" es una
+    cota del valor de la segunda mejor jugada (None si solo hay una).
+    La jugada firstMove, normalmente la mejor de la iteración anterior, se busca primero.
+    Las jugadas de exclude no se buscan (ver multiPV).
+    """
+    # Las negras maximizan y las blancas minimizan (ver PIECE_VALUES).
+    maximizingPlayer = board.turn == chess.BLACK
+    alpha = -(math.inf)
+    beta = math.inf
+
+    # La búsqueda recorre una Position (ver position.py) con make/unmake; el
+    # tablero solo se convierte aquí.
+    position = Position.from_board(board)
+    packed = {str(unpack_move(mov)): mov for mov in orderPackedMoves(position)}
+    legal_moves = [move for move in packed if move not in exclude]
+    if firstMove in legal_moves:
+        legal_moves.remove(firstMove)
+        legal_moves.insert(0,firstMove)
+
     result = {}
+    second = None
     for move in legal_moves:
-       evaluation = minMaxMax(boardCopy.copy(),move,depth-1)
-       if  evaluation["Value"] < min:
-            min = evaluation["Value"]
-            result = evaluation
-    return result
\ No newline at end of file
+        value = alphabetaMove(position,packed[move],depth-1,alpha,beta,not maximizingPlayer,context)
+        if not result:
+            result = {"Value":value,"Movement":move}
+        elif (value > result["Value"]) if maximizingPlayer else (value < result["Value"]):
+            second = result["Value"]
+            result = {"Value":value,"Movement":move}
+        elif second is None or ((value > second) if maximizingPlayer else (value < second)):
+            second = value
+
+        if maximizingPlayer:
+            alpha = max(alpha,value)
+        else:
+            beta = min(beta,value)
+
+    if result:
+        result["Second"] = second
+    return result
+
+def principalVariation(board,movement,tt,length):
+    """
+    Devuelve la línea principal que empieza por movement: la jugada y las
+    mejores jugadas guardadas en la tabla de transposiciones a continuación,
+    como mucho length jugadas.
+    """
+    boardCopy = board.copy(stack=False)
+    boardCopy.push_uci(movement)
+    line = [movement]
+    seen = {chess.polyglot.zobrist_hash(boardCopy)}
+
+    while len(line) < length:
+        entry = tt.probe(chess.polyglot.zobrist_hash(boardCopy))
+        if not entry or not entry[3] or not boardCopy.is_legal(entry[3]):
+            break
+        boardCopy.push(entry[3])
+        key = chess.polyglot.zobrist_hash(boardCopy)
+        line.append(str(entry[3]))
+        # Una repetición haría la línea infinita.
+        if key in seen:
+            break
+        seen.add(key)
+    return line
+
+def multiPV(board,depth,count,context=None,tablebase=None,options=None,tt=None):
+    """
+    Devuelve las count mejores jugadas de la posición, de mejor a peor, como
+    una lista de {"Value": valor, "Movement": jugada, "Line": línea principal}.
+
+    Es una única búsqueda por profundización iterativa: en cada profundidad se
+    hacen count pasadas por la raíz y cada pasada excluye las jugadas que ya
+    encontraron las anteriores. Todas las pasadas comparten la tabla de
+    transposiciones, de modo que las siguientes aprovechan el trabajo (y la
+    ordenación de jugadas) de la primera.
+
+    Si el contexto tiene un límite de tiempo o de nodos y se alcanza, se
+    devuelven las líneas de la última profundidad completa (ninguna si no
+    se completó la primera). Cada línea lleva esa profundidad en "Depth".
+    """
+    if context is None:
+        context = SearchContext(tablebase,options=options,tt=tt if tt is not None else TranspositionTable())
+
+    lines = []
+    reached = 0
+    for current in range(1,depth+1):
+        found = []
+        try:
+            for _ in range(count):
+                exclude = [line["Movement"] for line in found]
+                # Empezamos por la mejor jugada restante de la iteración anterior.
+                firstMove = next((line["Movement"] for line in lines if line["Movement"] not in exclude),None)
+                result = searchRoot(board,current,context,firstMove,exclude)
+                if not result:
+                    break
+                found.append({"Value":result["Value"],"Movement":result["Movement"]})
+        except SearchTimeout:
+            break
+        lines = found
+        reached = current
+
+    for line in lines:
+        line["Depth"] = reached
+        line["Line"] = principalVariation(board,line["Movement"],context.tt,reached) if context.tt else [line["Movement"]]
+    return lines
+
+def optionsFingerprint(options=None,tablebase=None):
+    """
+    Devuelve un número de 64 bits que identifica las opciones de búsqueda y
+    si se consultan tablas de finales, para que un AnalysisStore guarde por
+    separado los resultados obtenidos con opciones distintas. Con las
+    opciones por defecto y sin tablas vale 0, y la clave no cambia.
+    """
+    options = dict(SEARCH_OPTIONS,**(options or {}))
+    changed = [f"{name}={value}" for name,value in sorted(options.items()) if value != SEARCH_OPTIONS.get(name)]
+    if tablebase:
+        changed.append("Tablebase")
+    if not changed:
+        return 0
+    return int.from_bytes(hashlib.blake2b(",".join(changed).encode(),digest_size=8).digest(),"big")
+
+def bestMove(board,depth,book=None,tablebase=None,options=None,tt=None,store=None):
+    """
+    Devuelve la mejor jugada para el jugador que tiene el turno en la forma
+    {"Value": valor, "Movement": jugada}.
+    Si se indica un libro de aperturas y la posición aparece en él, se juega
+    la jugada del libro sin realizar la búsqueda. Del mismo modo, si se indican
+    las tablas de finales y la posición está en ellas, se juega la jugada exacta.
+    Dentro de la búsqueda también se consultan las tablas en cada nodo.
+    Las opciones de búsqueda selectiva se indican como en SEARCH_OPTIONS y tt
+    permite conservar una tabla de transposiciones entre búsquedas.
+    Con store (un AnalysisStore, ver analysis.py) se reutilizan los resultados
+    de ejecuciones anteriores y se guarda el de esta búsqueda, separados
+    según las opciones y las tablas de finales (ver optionsFingerprint).
+    """
+    result = probeRoot(board,book,tablebase)
+    if result:
+        return result
+
+    fingerprint = optionsFingerprint(options,tablebase)
+    if store is not None:
+        result = store.best_move(board,depth,fingerprint)
+        if result:
+            return result
+
+    result = searchRoot(board,depth,SearchContext(tablebase,options=options,tt=tt))
+    if store is not None and result:
+        store.store(chess.polyglot.zobrist_hash(board) ^ fingerprint,depth,result["Value"],EXACT,chess.Move.from_uci(result["Movement"]))
+        # Una búsqueda completa cuesta mucho más que la escritura: no la
+        # dejamos pendiente por si el proceso termina sin cerrar store.
+        store.flush()
+    return result
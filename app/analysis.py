@@ -0,0 +1,220 @@
+import argparse
+import atexit
+import csv
+import os
+import sqlite3
+import chess
+import chess.polyglot
+from storage import pack_move, unpack_move
+from transposition import EXACT
+from utils import ANALYSIS_PATH
+
+# Número de resultados que se acumulan en memoria antes de escribirlos.
+BATCH_SIZE = 1000
+
+# Tiempo máximo (segundos) que se espera a que otro proceso libere la base de datos.
+BUSY_TIMEOUT = 30.0
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS positions (
+    key INTEGER PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    value NUMERIC NOT NULL,
+    bound INTEGER NOT NULL,
+    move INTEGER NOT NULL
+) WITHOUT ROWID
+'''
+
+# Solo se reemplaza una entrada si la nueva búsqueda es más profunda.
+UPSERT = '''
+INSERT INTO positions (key, depth, value, bound, move) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    depth = excluded.depth, value = excluded.value, bound = excluded.bound, move = excluded.move
+WHERE excluded.depth > positions.depth
+'''
+
+
+def _signed(key:int):
+    """
+    SQLite guarda enteros de 64 bits con signo; las claves Zobrist no lo tienen.
+    """
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def _unsigned(key:int):
+    return key + (1 << 64) if key < 0 else key
+
+
+
+class AnalysisStore:
+    """
+    Resultados de búsquedas anteriores guardados en disco (SQLite), indexados
+    por la clave Zobrist de la posición: profundidad, valor, tipo de cota y
+    mejor jugada, con el mismo significado que en la tabla de transposiciones.
+
+    La base de datos usa el modo WAL, de modo que varios procesos pueden
+    leerla a la vez mientras otro escribe. Cada proceso debe abrir su propio
+    AnalysisStore. Las escrituras se acumulan y se hacen por lotes; los
+    resultados pendientes se escriben también al cerrarlo y, si no se cierra,
+    al terminar el intérprete.
+    """
+
+    def __init__(self, path:str, batch_size:int=BATCH_SIZE, readonly:bool=False):
+        self.path = path
+        self.batch_size = batch_size
+        self.readonly = readonly
+        self.pending = {}
+
+        if readonly:
+            self.connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True, timeout=BUSY_TIMEOUT)
+        else:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self.connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute(SCHEMA)
+            self.connection.commit()
+
+        atexit.register(self.close)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def __len__(self):
+        self.flush()
+        return self.connection.execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+
+
+    def probe(self, key:int):
+        """
+        Devuelve (profundidad, valor, tipo de cota, jugada) de la posición, o None.
+        """
+        row = self.pending.get(key)
+        if row is None:
+            row = self.connection.execute(
+                'SELECT depth, value, bound, move FROM positions WHERE key = ?', (_signed(key),)).fetchone()
+            if row is None:
+                return None
+
+        depth, value, bound, move = row
+        return depth, value, bound, unpack_move(move) if move else None
+
+
+    def best_move(self, board:chess.Board, depth:int, fingerprint:int=0):
+        """
+        Devuelve {"Value": valor, "Movement": jugada} si la posición ya se buscó
+        con valor exacto y al menos la profundidad dada, o None. Los resultados
+        de búsquedas con otras opciones se guardan con la clave combinada (XOR)
+        con su huella (ver AI.optionsFingerprint).
+        """
+        entry = self.probe(chess.polyglot.zobrist_hash(board) ^ fingerprint)
+        if not entry:
+            return None
+
+        entry_depth, value, bound, move = entry
+        if entry_depth < depth or bound != EXACT or not move or not board.is_legal(move):
+            return None
+
+        return {"Value": value, "Movement": move.uci()}
+
+
+    def store(self, key:int, depth:int, value, bound:int, move=None):
+        """
+        Guarda el resultado de una posición. Se escribe en el siguiente lote y
+        solo reemplaza la entrada guardada si la nueva búsqueda es más profunda.
+        En una base de datos de solo lectura no hace nada.
+        """
+        if self.readonly:
+            return
+
+        current = self.pending.get(key)
+        if current is not None and current[0] >= depth:
+            return
+
+        self.pending[key] = (depth, value, bound, pack_move(move) if move else 0)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+
+    def flush(self):
+        """
+        Escribe los resultados pendientes en una única transacción.
+        """
+        if not self.pending or self.readonly:
+            return
+
+        with self.connection:
+            self.connection.executemany(UPSERT, ((_signed(key), *row) for key, row in self.pending.items()))
+        self.pending.clear()
+
+
+    def export_csv(self, path:str):
+        """
+        Escribe todas las entradas en un archivo CSV (clave, profundidad, valor,
+        cota, jugada en UCI). Devuelve el número de entradas.
+        """
+        self.flush()
+        count = 0
+
+        with open(path, 'w', newline='', encoding='utf-8') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(['key', 'depth', 'value', 'bound', 'move'])
+            for key, depth, value, bound, move in self.connection.execute('SELECT * FROM positions'):
+                writer.writerow([_unsigned(key), depth, value, bound, unpack_move(move).uci() if move else ''])
+                count += 1
+
+        return count
+
+
+    def import_csv(self, path:str):
+        """
+        Añade las entradas de un archivo CSV escrito por export_csv. Igual que
+        en store, solo se reemplazan las entradas menos profundas.
+        Devuelve el número de entradas leídas.
+        """
+        count = 0
+
+        with open(path, newline='', encoding='utf-8') as handle:
+            for row in csv.DictReader(handle):
+                value = float(row['value'])
+                self.store(int(row['key']), int(row['depth']), int(value) if value.is_integer() else value,
+                           int(row['bound']), chess.Move.from_uci(row['move']) if row['move'] else None)
+                count += 1
+
+        self.flush()
+        return count
+
+
+    def close(self):
+        """
+        Escribe los resultados pendientes y cierra la base de datos. Se puede
+        llamar más de una vez.
+        """
+        if self.connection is None:
+            return
+
+        atexit.unregister(self.close)
+        self.flush()
+        self.connection.close()
+        self.connection = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Importa o exporta los resultados guardados de las búsquedas.')
+    parser.add_argument('--db', default=ANALYSIS_PATH, help='base de datos de resultados')
+    parser.add_argument('--import', dest='import_path', metavar='CSV', help='añade las entradas de un CSV')
+    parser.add_argument('--export', dest='export_path', metavar='CSV', help='escribe todas las entradas en un CSV')
+    args = parser.parse_args()
+
+    with AnalysisStore(args.db) as store:
+        if args.import_path:
+            print(f'{store.import_csv(args.import_path)} entradas importadas')
+        if args.export_path:
+            print(f'{store.export_csv(args.export_path)} entradas exportadas')
+        print(f'{len(store)} posiciones en {args.db}')
@@ -0,0 +1,47 @@
+import tkinter as tk
+
+# Las rutas de las imágenes solo las necesita la interfaz gráfica. Están aquí y
+# no en utils para que el motor pueda usarse sin tocar tkinter ni las imágenes.
+PIECE_IMAGES = {
+        'p': "./app/images/black_pawn.png",
+        'n': "./app/images/black_knight.png",
+        'b': "./app/images/black_bishop.png",
+        'r': "./app/images/black_rook.png",
+        'q': "./app/images/black_queen.png",
+        'k': "./app/images/black_king.png",
+        'P': "./app/images/white_pawn.png",
+        'N': "./app/images/white_knight.png",
+        'B': "./app/images/white_bishop.png",
+        'R': "./app/images/white_rook.png",
+        'Q': "./app/images/white_queen.png",
+        'K': "./app/images/white_king.png"
+    }
+
+# Tamaño aproximado (en pixeles) con el que se dibujan las fichas.
+PIECE_SIZE = 60
+
+# Imágenes ya decodificadas, por símbolo de pieza.
+_cache = {}
+
+
+def piece_image(symbol:str, master=None):
+    """
+    Devuelve la imagen de la pieza escalada a PIECE_SIZE. Cada archivo se
+    decodifica una sola vez: la misma imagen se comparte entre todas las
+    fichas del lienzo y entre redibujados.
+    """
+    image = _cache.get(symbol)
+
+    if image is None:
+        image = tk.PhotoImage(file=PIECE_IMAGES[symbol], master=master)
+        image = image.subsample(image.width() // PIECE_SIZE, image.height() // PIECE_SIZE)
+        _cache[symbol] = image
+
+    return image
+
+
+def load_piece_images(master=None):
+    """
+    Decodifica de antemano las 12 imágenes de las fichas.
+    """
+    return {symbol: piece_image(symbol, master) for symbol in PIECE_IMAGES}
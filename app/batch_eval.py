@@ -0,0 +1,94 @@
+import itertools
+import chess
+import numpy as np
+from evaluation import MAX_PHASE, TAPERED_VALUES
+from utils import PHASE_VALUES
+
+# Orden de los 12 planos del tensor de ocupación: primero las piezas blancas y
+# luego las negras, cada grupo en el orden de chess.PIECE_TYPES.
+PIECE_SYMBOLS = 'PNBRQKpnbrqk'
+
+PLANES = [(chess.PIECE_SYMBOLS.index(symbol.lower()), symbol.isupper()) for symbol in PIECE_SYMBOLS]
+
+# Peso de cada plano en la fase de la partida.
+PHASE_WEIGHTS = np.array([PHASE_VALUES[symbol.lower()] for symbol in PIECE_SYMBOLS], dtype=np.int64)
+
+
+def build_weights(tapered_values=TAPERED_VALUES):
+    """
+    Aplana las tablas ya mezcladas de evaluation.py (TAPERED_VALUES, o las que
+    devuelva buildTaperedValues con otras tablas) en una matriz
+    (MAX_PHASE + 1, 12 * 64): una fila de pesos por cada fase de la partida,
+    con el mismo orden que el tensor de ocupación. Así los pesos coinciden
+    siempre con los de evaluatePosition de AI.py.
+    """
+    weights = np.array([[table[symbol] for symbol in PIECE_SYMBOLS] for table in tapered_values], dtype=np.int64)
+    return weights.reshape(MAX_PHASE + 1, 12 * 64)
+
+
+WEIGHTS = build_weights()
+
+
+def to_bitboards(boards):
+    """
+    Devuelve una matriz (N, 12) de enteros de 64 bits con la máscara de cada
+    tipo de pieza en cada tablero.
+    """
+    bitboards = np.empty((len(boards), 12), dtype='<u8')
+
+    for n, board in enumerate(boards):
+        bitboards[n] = [board.pieces_mask(piece_type, color) for piece_type, color in PLANES]
+
+    return bitboards
+
+
+def to_tensor(boards):
+    """
+    Devuelve el tensor de ocupación (N, 12, 64) de los tableros dados:
+    1 si la pieza del plano está en la casilla, 0 en otro caso.
+    """
+    bitboards = to_bitboards(boards)
+
+    # Cada máscara ocupa 8 bytes en little-endian, así que el bit k del
+    # resultado corresponde a la casilla k.
+    bits = np.unpackbits(bitboards.view(np.uint8), bitorder='little')
+
+    return bits.reshape(len(boards), 12, 64)
+
+
+def game_phase(tensor):
+    """
+    Calcula la fase de la partida de cada tablero del tensor de ocupación.
+    """
+    return np.minimum(tensor.sum(axis=2, dtype=np.int64) @ PHASE_WEIGHTS, MAX_PHASE)
+
+
+def evaluate_batch(boards, weights=WEIGHTS):
+    """
+    Evalúa todos los tableros con un único producto matricial contra los pesos
+    de todas las fases y se queda, para cada tablero, con la columna de su fase.
+    Los resultados coinciden exactamente con evaluatePosition de AI.py.
+    """
+    boards = list(boards)
+    if not boards:
+        return np.zeros(0, dtype=np.int64)
+
+    tensor = to_tensor(boards)
+    scores = tensor.reshape(len(boards), 12 * 64).astype(np.int64) @ weights.T
+
+    return scores[np.arange(len(boards)), game_phase(tensor)]
+
+
+def evaluate_stream(boards, batch_size=4096, weights=WEIGHTS):
+    """
+    Evalúa una secuencia de tableros de cualquier tamaño por bloques de
+    `batch_size`, de modo que nunca se tiene más de un bloque en memoria.
+    Genera un arreglo de resultados por bloque.
+    """
+    boards = iter(boards)
+
+    while True:
+        batch = list(itertools.islice(boards, batch_size))
+        if not batch:
+            break
+        yield evaluate_batch(batch, weights)
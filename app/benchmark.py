@@ -0,0 +1,169 @@
+import argparse
+import time
+import tracemalloc
+import chess
+import AI
+
+# Posiciones de referencia para medir la búsqueda: apertura, medio juego
+# táctico y finales.
+BENCHMARK_POSITIONS = [
+        chess.STARTING_FEN,
+        "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 8",
+        "2r3k1/pp3ppp/2n1b3/3p4/3P4/2PB1N2/P4PPP/4R1K1 b - - 0 20",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        "8/5pk1/6p1/8/3K4/8/5PP1/8 w - - 0 40",
+    ]
+
+# Configuraciones que se comparan: sin búsqueda selectiva, cada técnica por
+# separado y todas juntas, y la quiescencia con y sin la evaluación de
+# intercambios (SEE), que es donde más nodos ahorra.
+CONFIGURATIONS = {
+        "Completa": {"NullMove": False, "LateMoveReductions": False, "Futility": False, "SEE": False},
+        "NullMove": {"NullMove": True, "LateMoveReductions": False, "Futility": False, "SEE": False},
+        "LateMoveReductions": {"NullMove": False, "LateMoveReductions": True, "Futility": False, "SEE": False},
+        "Futility": {"NullMove": False, "LateMoveReductions": False, "Futility": True, "SEE": False},
+        "SEE": {"NullMove": False, "LateMoveReductions": False, "Futility": False, "SEE": True},
+        "Todas": {"NullMove": True, "LateMoveReductions": True, "Futility": True, "SEE": True},
+        "Quiescencia": {"Quiescence": True, "SEE": False},
+        "Quiescencia+SEE": {"Quiescence": True, "SEE": True},
+    }
+
+# Profundidades por defecto. La comparación de multiPV necesita más
+# profundidad para que la tabla compartida entre pasadas llegue a notarse.
+DEPTH = 3
+MULTIPV_DEPTH = 5
+
+
+def run(depth:int, options:dict=None, positions=BENCHMARK_POSITIONS, memory:bool=False):
+    """
+    Busca todas las posiciones a la profundidad dada y devuelve una lista con
+    los nodos, el tiempo y la jugada escogida en cada una.
+    Con `memory`, también el pico de memoria reservada durante cada búsqueda
+    (medido con tracemalloc, que hace la búsqueda más lenta).
+    """
+    results = []
+
+    for fen in positions:
+        board = chess.Board(fen)
+        context = AI.SearchContext(options=options)
+
+        if memory:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        result = AI.searchRoot(board, depth, context)
+        elapsed = time.perf_counter() - start
+
+        peak = 0
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        results.append({"Nodes": context.nodes, "Time": elapsed, "Movement": result["Movement"],
+                        "PawnHits": context.pawns.hits if context.pawns else 0,
+                        "PawnProbes": context.pawns.probes if context.pawns else 0,
+                        "Peak": peak})
+
+    return results
+
+
+def minimax_memory(depths, fen:str=chess.STARTING_FEN):
+    """
+    Imprime el tiempo y el pico de memoria de minMaxMax a cada profundidad.
+    Como las listas de jugadas se reservan una vez por nivel, el pico no
+    debería crecer con el número de nodos.
+    """
+    print(f'{"Profundidad":>12}{"Tiempo (s)":>12}{"Pico (KB)":>12}  Jugada')
+
+    for depth in depths:
+        board = chess.Board(fen)
+        movement = str(next(iter(board.legal_moves)))
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        value, leaf = AI.minMaxMax(board, movement, depth)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(f'{depth:>12}{elapsed:>12.2f}{peak / 1024:>12.1f}  {leaf}')
+
+
+def deepening(board:chess.Board, depth:int, context:AI.SearchContext, exclude=()):
+    """
+    Busca por profundización iterativa hasta la profundidad dada, como cada
+    pasada de multiPV pero sola, y devuelve el resultado de la última iteración.
+    """
+    result = None
+    for current in range(1, depth + 1):
+        result = AI.searchRoot(board, current, context, result["Movement"] if result else None, exclude)
+        if not result:
+            break
+    return result
+
+
+def multipv_cost(depth:int, count:int, positions=BENCHMARK_POSITIONS):
+    """
+    Compara los nodos de multiPV con los de `count` búsquedas independientes
+    por profundización iterativa a la misma profundidad, cada una con su
+    propia tabla de transposiciones y excluyendo las jugadas de las anteriores.
+    """
+    print(f'{"Multi-PV":>10}{"Separadas":>12}{"Proporción":>12}  Jugadas')
+
+    for fen in positions:
+        board = chess.Board(fen)
+        context = AI.SearchContext(tt=AI.TranspositionTable())
+        lines = AI.multiPV(board, depth, count, context)
+
+        separate = 0
+        for index in range(len(lines)):
+            other = AI.SearchContext(tt=AI.TranspositionTable())
+            deepening(board, depth, other, [line["Movement"] for line in lines[:index]])
+            separate += other.nodes
+
+        movements = ' '.join(f'{line["Movement"]}({line["Value"]})' for line in lines)
+        print(f'{context.nodes:>10}{separate:>12}{context.nodes / separate:>12.1%}  {movements}')
+
+
+def compare(depth:int, configurations=CONFIGURATIONS, memory:bool=False):
+    """
+    Imprime los nodos, el tiempo y los nodos por segundo de cada configuración
+    y, con `memory`, el mayor pico de memoria de sus búsquedas.
+    """
+    peak = f'{"Pico (KB)":>11}' if memory else ''
+    print(f'{"Configuración":<20}{"Nodos":>12}{"Tiempo (s)":>12}{"NPS":>10}{"Peones":>8}{peak}  Jugadas')
+
+    for name, options in configurations.items():
+        results = run(depth, options, memory=memory)
+        nodes = sum(result["Nodes"] for result in results)
+        elapsed = sum(result["Time"] for result in results)
+        movements = ' '.join(result["Movement"] for result in results)
+
+        # Porcentaje de aciertos de la tabla de peones.
+        probes = sum(result["PawnProbes"] for result in results)
+        hits = sum(result["PawnHits"] for result in results) / probes if probes else 0.0
+
+        peak = f'{max(result["Peak"] for result in results) / 1024:>11.1f}' if memory else ''
+
+        print(f'{name:<20}{nodes:>12}{elapsed:>12.2f}{nodes / elapsed:>10.0f}{hits:>8.1%}{peak}  {movements}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mide la búsqueda sobre las posiciones de referencia.')
+    parser.add_argument('--depth', type=int,
+                        help=f'profundidad de búsqueda (por defecto {DEPTH}, o {MULTIPV_DEPTH} con --multipv)')
+    parser.add_argument('--memory', action='store_true', help='mide también el pico de memoria de cada búsqueda')
+    parser.add_argument('--minimax', type=int, nargs='+', metavar='DEPTH',
+                        help='mide minMaxMax a las profundidades dadas en lugar de las configuraciones')
+    parser.add_argument('--multipv', type=int, metavar='K',
+                        help='compara multiPV con K búsquedas independientes a la profundidad dada')
+    args = parser.parse_args()
+
+    if args.minimax:
+        minimax_memory(args.minimax)
+    elif args.multipv:
+        multipv_cost(args.depth or MULTIPV_DEPTH, args.multipv)
+    else:
+        compare(args.depth or DEPTH, memory=args.memory)
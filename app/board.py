@@ -1,7 +1,12 @@
+import math
 import tkinter as tk
 from itertools import cycle
 import chess
-from utils import PIECE_IMAGES
+from storage import GameStore
+from assets import piece_image
+from history import MoveHistory
+from live import LiveAnalysis, san_line, white_score
+from utils import SAVE_PATH
 
 
 
@@ -22,19 +27,42 @@ class Board:
     BLACK_COLOR = '#769656'
     BORDER_COLOR = '#C9DBB2'
     FOCUSED_COLOR = '#F6F668'
+    HOVER_COLOR = '#6D5D6E'
 
-    def __init__(self):
+    # Tiempo mínimo (ms) entre dos actualizaciones del arrastre: los eventos
+    # del ratón que llegan entre medias se agrupan en una sola.
+    FRAME_MS = 1000 // 60
+
+    # Ancho (en caracteres) de la lista de jugadas.
+    MOVE_LIST_WIDTH = 14
+
+    # Barra de evaluación: ancho, colores y evaluación (en décimas de peón)
+    # con la que la barra queda a tres cuartos de la altura.
+    EVAL_BAR_WIDTH = 24
+    EVAL_WHITE_COLOR = '#FFFFFF'
+    EVAL_BLACK_COLOR = '#404040'
+    EVAL_SCALE = 100
+
+    # Tiempo (ms) entre dos lecturas de la cola del análisis: como mucho se
+    # redibuja la información del análisis 1000 / ANALYSIS_MS veces por segundo.
+    ANALYSIS_MS = 250
+
+    def __init__(self, analysis:bool=True):
         """
-        Inicializa la ventana, las variables de instancia y el lienzo,
-        pintamos el tablero sobre el lienzo y ubicamos las fichas en el tablero.
-        Por último, establecemos los eventos del ratón.
+        Inicializa la ventana, las variables de instancia y el lienzo y
+        pintamos el tablero sobre el lienzo. El tablero vacío se muestra
+        enseguida; las fichas y los eventos del ratón se cargan después, desde
+        el bucle de Tk (ver _load_pieces). Con `analysis` el motor analiza en
+        segundo plano la posición mostrada.
         """
         self._init_window()
-        self._init_vars()
+        self._init_vars(analysis)
         self._init_canvas()
         self._paint_board()
-        self._place_pieces()
-        self._init_mouse_events()
+
+        # Mostramos el tablero vacío antes de decodificar las imágenes.
+        self.window.update()
+        self.window.after(0, self._load_pieces)
 
 
 # ------------------------------------------------------------------------------
@@ -51,7 +79,7 @@ class Board:
         self.window.resizable(False, False)
 
 
-    def _init_vars(self):
+    def _init_vars(self, analysis:bool=True):
         """
         Inicializa las variables de instancia.
         """
@@ -65,15 +93,17 @@ class Board:
         self.current_player = 'WHITE'
 
         # Matriz numérica que representa el tablero.
-        self.board = chess.Board()
+        # Si hay una partida guardada, la recuperamos sin dibujarla: las fichas
+        # se dibujan una sola vez en _place_pieces.
+        self.store = GameStore(SAVE_PATH)
+        self.board = self.store.load()
 
-        # Lista de objetos que representan las fichas del tablero.
-        self.images = []
+        # Si en la partida recuperada les toca a las negras, avanzamos el turno.
+        self._sync_turn()
 
         # Celdas que están enfocadas en un momento dado.
         # Permite enfocar los posibles movimientos de una ficha seleccionada.
         self.focus_squares = []
-        self.focus_borders = []
         self.focus_moves = []
 
         # Variables utilizadas con los eventos del ratón.
@@ -83,13 +113,47 @@ class Board:
         self.last_x = None
         self.last_y = None
 
+        # Última posición del cursor durante el arrastre que aún no se ha
+        # aplicado y actualización programada para aplicarla.
+        self.drag_target = None
+        self.drag_job = None
+
+        # Historial de jugadas para deshacer, rehacer y saltar a cualquier
+        # jugada (ver history.py). Se crea junto con las fichas.
+        self.history = None
+
+        # Análisis en segundo plano de la posición mostrada (ver live.py) y
+        # último resultado dibujado.
+        self.analysis = LiveAnalysis() if analysis else None
+        self.analysis_shown = None
+
 
     def _init_canvas(self):
         """
-        Inicializa el lienzo con un tamaño específico definido por BOARD_SIZE.
+        Inicializa el lienzo con un tamaño específico definido por BOARD_SIZE
+        y, a su derecha, la lista de jugadas (vacía hasta que se cargan las
+        fichas). Si hay análisis, debajo se muestran la profundidad, los nodos
+        por segundo y la línea principal y entre el tablero y la lista, la
+        barra de evaluación.
         """
+        if self.analysis:
+            self.analysis_label = tk.Label(self.window, anchor='w', justify='left', font=('Courier', 11),
+                                           wraplength=self.BOARD_SIZE + self.EVAL_BAR_WIDTH)
+            self.analysis_label.pack(side='bottom', fill='x')
+
         self.canvas = tk.Canvas(self.window, width=self.BOARD_SIZE, height=self.BOARD_SIZE)
-        self.canvas.pack()
+        self.canvas.pack(side='left')
+
+        if self.analysis:
+            self.eval_bar = tk.Canvas(self.window, width=self.EVAL_BAR_WIDTH, height=self.BOARD_SIZE,
+                                      bg=self.EVAL_BLACK_COLOR, highlightthickness=0)
+            self.eval_bar.pack(side='left')
+            self.eval_bar.create_rectangle(0, self.BOARD_SIZE // 2, self.EVAL_BAR_WIDTH, self.BOARD_SIZE,
+                                           fill=self.EVAL_WHITE_COLOR, width=0, tags='white')
+
+        self.move_list = tk.Listbox(self.window, width=self.MOVE_LIST_WIDTH, exportselection=False,
+                                    activestyle='none', font=('Courier', 11))
+        self.move_list.pack(side='right', fill='y')
 
 
     def _init_mouse_events(self):
@@ -101,6 +165,21 @@ class Board:
         self.canvas.bind("<ButtonRelease-1>", self._release)
 
 
+    def _init_history_events(self):
+        """
+        Establece los atajos del historial: Ctrl+Z y la flecha izquierda
+        deshacen, Ctrl+Y y la flecha derecha rehacen, Inicio y Fin saltan a los
+        extremos y un clic en la lista de jugadas salta a esa jugada.
+        """
+        self.window.bind('<Control-z>', lambda event: self._jump_to(self.history.ply - 1))
+        self.window.bind('<Left>', lambda event: self._jump_to(self.history.ply - 1))
+        self.window.bind('<Control-y>', lambda event: self._jump_to(self.history.ply + 1))
+        self.window.bind('<Right>', lambda event: self._jump_to(self.history.ply + 1))
+        self.window.bind('<Home>', lambda event: self._jump_to(0))
+        self.window.bind('<End>', lambda event: self._jump_to(len(self.history)))
+        self.move_list.bind('<<ListboxSelect>>', self._select_move)
+
+
 # ------------------------------------------------------------------------------
 # -------------------- MÉTODOS PARA DIBUJAR SOBRE EL CANVAS
 # ------------------------------------------------------------------------------
@@ -108,54 +187,45 @@ class Board:
 
     def _paint_board(self):
         """
-        Dibuja las casillas del tablero de ajedrez.
+        Dibuja las casillas y el borde del tablero en una sola imagen, que se
+        coloca en el lienzo como un único elemento. También crea el borde que
+        resalta la casilla sobre la que se arrastra una ficha (oculto hasta que
+        se usa).
         """
+        # La imagen cubre las casillas y el borde, que sobresale un pixel.
+        size = self.SIZE * self.SQUARE_SIZE + 2
+        self.board_image = tk.PhotoImage(master=self.window, width=size, height=size)
+
         for row in range(self.SIZE):
             for col in range(self.SIZE):
-                # Obtenemos el nombre de la casilla.
-                square_name = self._get_cell_name(row, col)
-
-                # Pintamos la casilla de blanco o negro según corresponda.
-                if (row + col) % 2 == 0:
-                    self._paint_square(row, col, self.WHITE_COLOR, square_name)
-                else:
-                    self._paint_square(row, col, self.BLACK_COLOR, square_name)
+                x1, y1, x2, y2 = self._get_coords(row, col)
+                color = self.WHITE_COLOR if (row + col) % 2 == 0 else self.BLACK_COLOR
+                self._paint_square(x1, y1, x2, y2, color)
 
         # Pintamos el borde del tablero.
-        self._paint_border()
+        self._paint_border(size)
 
+        self.canvas.create_image(self.MARGIN - 1, self.MARGIN - 1, image=self.board_image,
+                                 anchor='nw', state='disabled', tags='board')
 
-    def _paint_square(self, row:int, col:int, color:str, square_name:str):
-        """
-        Pinta un cuadrado en el tablero de juego según su posición dentro de la matriz.
-        Devuelve el identificador del rectángulo creado, el cual nos permite
-        manipularlo posteriormente.
-        """
-        # Obtenemos las coordenadas de la esquina superior izquierda e inferior derecha.
-        x1, y1, x2, y2 = self._get_coords(row, col)
+        self.hover_border = self.canvas.create_rectangle(
+            0, 0, 0, 0, fill='', outline=self.HOVER_COLOR, width=2, state='hidden', tags='hover')
 
-        # Creamos la casilla del color indicado.
-        square = self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline='')
 
-        # Agregamos las etiquetas necesarias.
-        self.canvas.addtag_withtag('square', square)
-        self.canvas.addtag_withtag(square_name, square)
+    def _paint_square(self, x1:int, y1:int, x2:int, y2:int, color:str):
+        """
+        Pinta en la imagen del tablero el rectángulo dado (en coordenadas del lienzo).
+        """
+        offset = self.MARGIN - 1
+        self.board_image.put(color, to=(x1 - offset, y1 - offset, x2 - offset, y2 - offset))
 
 
-    def _paint_border(self):
+    def _paint_border(self, size:int):
         """
-        Pinta el borde exterior del tablero de juego.
+        Pinta el borde exterior del tablero de juego (2 pixeles en los extremos de la imagen).
         """
-        x1 = self.MARGIN
-        y1 = self.MARGIN
-        x2 = self.BOARD_SIZE - self.MARGIN
-        y2 = self.BOARD_SIZE - self.MARGIN
-
-        self.canvas.create_rectangle(
-            x1, y1, x2, y2,
-            fill='', outline=self.BORDER_COLOR, width=2,
-            state='disabled', tags='border'
-        )
+        for area in ((0, 0, size, 2), (0, size - 2, size, size), (0, 0, 2, size), (size - 2, 0, size, size)):
+            self.board_image.put(self.BORDER_COLOR, to=area)
 
 
 # ------------------------------------------------------------------------------
@@ -184,19 +254,50 @@ class Board:
                 piece = boardM[i][j]
 
                 if piece != 'None':
-                    # Obtenemos la ruta de la imagen.
-                    image_path = PIECE_IMAGES[piece]
+                    self._create_piece(piece, x, y)
+
+
+    def _create_piece(self, piece:str, x:int, y:int):
+        """
+        Crea en el lienzo la ficha con el símbolo dado, centrada en (x, y).
+        """
+        # Obtenemos la imagen ya decodificada de la pieza.
+        image = piece_image(piece, self.window)
+        current_player = 'WHITE' if piece.isupper() else 'BLACK'
+
+        return self.canvas.create_image(x, y, image=image, tags=('piece', piece, current_player))
 
-                    if image_path:
-                         # Si la ruta existe, creamos la imagen en el lienzo.
-                        image = tk.PhotoImage(file=image_path)
-                        resized_image = image.subsample(image.width() // 60, image.height() // 60)
-                        self.images.append(resized_image)
-                        
-                        current_player = 'WHITE' if piece.isupper() else 'BLACK'
 
-                        self.canvas.create_image(
-                            x, y, image=resized_image, tags=('piece', piece, current_player))
+    def _load_pieces(self):
+        """
+        Ubica las fichas una vez mostrado el tablero vacío y activa los eventos
+        del ratón. Si ya se está reproduciendo una partida, las fichas ya están
+        en el lienzo y el ratón debe seguir desactivado.
+        """
+        if hasattr(self, 'replay_controller'):
+            return
+
+        self._set_position(self.board)
+        self.history = MoveHistory(self.board)
+        self._fill_move_list()
+        self._init_mouse_events()
+        self._init_history_events()
+
+        if self.analysis:
+            self.analysis.start(self.board)
+            self.window.after(self.ANALYSIS_MS, self._poll_analysis)
+
+
+    def _set_position(self, board:chess.Board):
+        """
+        Muestra en el tablero la posición dada: elimina las fichas del lienzo,
+        vuelve a ubicarlas y actualiza el jugador que tiene el turno.
+        """
+        self.board = board
+        self.canvas.delete('piece')
+        self._unfocus_square()
+        self._place_pieces()
+        self._sync_turn()
 
 
 # ------------------------------------------------------------------------------
@@ -240,15 +341,27 @@ class Board:
     def _dragging(self, event):
         """
         Realiza el arrastre de la pieza seleccionada.
-        Se ejecuta indefinidamente mientras el usuario mueve la ficha.
+        Se ejecuta con cada movimiento del ratón, pero solo guarda la posición
+        del cursor: el lienzo se actualiza como mucho una vez cada FRAME_MS.
         """
-        # A medida que nos movemos vamos descoloreando las celdas anteriores.
-        # De modo que solo se acentúe el borde de la celda sobre la que está el cursor.
-        self._unfocus_border()
-
         # Obtenemos la coordenada (x, y) donde está el ratón con la ficha.
-        x = self.canvas.canvasx(event.x)
-        y = self.canvas.canvasy(event.y)
+        self.drag_target = (self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+
+        if self.drag_job is None:
+            self.drag_job = self.window.after(self.FRAME_MS, self._apply_drag)
+
+
+    def _apply_drag(self):
+        """
+        Mueve la ficha seleccionada a la última posición del cursor y resalta
+        la casilla sobre la que está.
+        """
+        self.drag_job = None
+        if self.drag_target is None:
+            return
+
+        x, y = self.drag_target
+        self.drag_target = None
 
         if self._is_within_board(x, y) and self.selected_piece:
             # Obtenemos la nueva posición del cursor.
@@ -263,6 +376,18 @@ class Board:
 
             self.last_x = x
             self.last_y = y
+        else:
+            self._unfocus_border()
+
+
+    def _cancel_drag(self):
+        """
+        Descarta la actualización del arrastre que esté pendiente.
+        """
+        if self.drag_job is not None:
+            self.window.after_cancel(self.drag_job)
+        self.drag_job = None
+        self.drag_target = None
 
     def _get_node(self, pos):
         x, y = pos
@@ -273,6 +398,10 @@ class Board:
         """
         Libera la pieza y la coloca en la última casilla tocada.
         """
+        # La ficha se coloca según la posición final, así que no hace falta
+        # aplicar el arrastre pendiente.
+        self._cancel_drag()
+
         # Obtenemos la coordenada cuando el usuario suelta la ficha.
         dest_x = self.canvas.canvasx(event.x)
         dest_y = self.canvas.canvasy(event.y)
@@ -296,7 +425,15 @@ class Board:
             # Mueve la ficha seleccionada al centro de la celda dada.
             self.canvas.coords(self.selected_piece, centered_x, centered_y)
 
-            self.board.push(move)
+            # Si se habían deshecho jugadas, la nueva las sustituye.
+            self.history.push(move)
+            self._append_move_list()
+
+            # Guardamos la jugada para poder recuperar la partida.
+            self.store.append(move)
+
+            # Analizamos la nueva posición.
+            self._restart_analysis()
 
             # Enfocamos la celda final del movimiento.
             self._focus_square(dest_x, dest_y)
@@ -405,11 +542,183 @@ class Board:
             if self.selected_piece:
                 self.canvas.coords(self.selected_piece, centered_x, centered_y)
 
+            # El arrastre ha terminado: si la ficha quedara seleccionada, el
+            # historial (ver _jump_to) seguiría bloqueado.
+            self.selected_piece = None
+            self.last_x = None
+            self.last_y = None
+
         # Desenfocamos las celdas porque ya ha terminado el movimiento.
         self._unfocus_border()
         self._unfocus_moves()
 
 
+# ------------------------------------------------------------------------------
+# ------------------- MÉTODOS PARA EL HISTORIAL DE JUGADAS
+# ------------------------------------------------------------------------------
+
+
+    def _jump_to(self, ply:int):
+        """
+        Muestra la posición tras `ply` jugadas (deshace o rehace las que haga
+        falta) y redibuja solo las casillas que han cambiado. La partida
+        guardada se ajusta a la posición mostrada.
+        """
+        if self.history is None or self.selected_piece:
+            return
+
+        ply = max(0, min(ply, len(self.history)))
+        previous = self.history.ply
+        if ply == previous:
+            return
+
+        before = self.board.piece_map()
+        self.board = self.history.jump(ply)
+
+        if ply < previous:
+            self.store.truncate(ply)
+        else:
+            for move in self.history.moves[previous:ply]:
+                self.store.append(move)
+
+        self._redraw_changes(before)
+        self._restart_analysis()
+
+
+    def _select_move(self, event):
+        """
+        Salta a la jugada seleccionada en la lista (la primera fila es la posición inicial).
+        """
+        selection = self.move_list.curselection()
+        if selection:
+            self._jump_to(selection[0])
+
+
+    def _redraw_changes(self, before:dict):
+        """
+        Redibuja las casillas cuya pieza ha cambiado respecto a `before` (un
+        piece_map del tablero) y actualiza el turno y la lista de jugadas.
+        """
+        after = self.board.piece_map()
+        for square in before.keys() | after.keys():
+            if before.get(square) != after.get(square):
+                self._redraw_square(square, after.get(square))
+
+        self._unfocus_square()
+        self._unfocus_border()
+        self._sync_turn()
+        self._show_ply()
+
+
+    def _redraw_square(self, square:int, piece:chess.Piece=None):
+        """
+        Elimina las fichas de la casilla (del ajedrez) y, si se indica, dibuja la nueva.
+        """
+        row, col = 7 - chess.square_rank(square), chess.square_file(square)
+        for item in self.canvas.find_enclosed(*self._get_coords(row, col)):
+            if 'piece' in self.canvas.gettags(item):
+                self.canvas.delete(item)
+
+        if piece:
+            self._create_piece(piece.symbol(), *self._get_center_coords(row, col))
+
+
+    def _move_label(self, index:int):
+        """
+        Devuelve el texto de la jugada `index` (desde 0) de la lista.
+        """
+        number = index // 2 + 1
+        return f'{number}. {self.history.sans[index]}' if index % 2 == 0 else f'{number}... {self.history.sans[index]}'
+
+
+    def _fill_move_list(self):
+        """
+        Llena la lista de jugadas con la partida completa.
+        """
+        self.move_list.delete(0, 'end')
+        self.move_list.insert('end', 'Inicio', *(self._move_label(index) for index in range(len(self.history))))
+        self._show_ply()
+
+
+    def _append_move_list(self):
+        """
+        Añade a la lista la última jugada, tras quitar las jugadas deshechas que sustituye.
+        """
+        ply = self.history.ply
+        self.move_list.delete(ply, 'end')
+        self.move_list.insert('end', self._move_label(ply - 1))
+        self._show_ply()
+
+
+    def _show_ply(self):
+        """
+        Marca en la lista la jugada que se muestra en el tablero.
+        """
+        self.move_list.selection_clear(0, 'end')
+        self.move_list.selection_set(self.history.ply)
+        self.move_list.see(self.history.ply)
+
+
+# ------------------------------------------------------------------------------
+# ------------------------ MÉTODOS PARA EL ANÁLISIS
+# ------------------------------------------------------------------------------
+
+
+    def _restart_analysis(self):
+        """
+        Empieza a analizar la posición mostrada. No espera al análisis anterior
+        (ver LiveAnalysis.start), así que se puede llamar tras cada jugada.
+        """
+        if self.analysis:
+            self.analysis.start(self.board)
+            self.analysis_shown = None
+
+
+    def _poll_analysis(self):
+        """
+        Lee de la cola el último resultado del análisis y, si ha cambiado, lo
+        muestra. Se vuelve a programar cada ANALYSIS_MS milisegundos, de modo
+        que los resultados que llegan entre medias se agrupan en un solo dibujo.
+        """
+        # Un resultado que no se pueda dibujar no debe detener la lectura de la cola.
+        try:
+            result = self.analysis.drain()
+            if result and result != self.analysis_shown:
+                self.analysis_shown = result
+                self._show_analysis(result)
+        finally:
+            self.window.after(self.ANALYSIS_MS, self._poll_analysis)
+
+
+    def _show_analysis(self, result:dict):
+        """
+        Dibuja la barra de evaluación y escribe la profundidad, los nodos por
+        segundo y la línea principal de un resultado del análisis.
+        """
+        if result["Value"] is None:
+            text = f'Profundidad {result["Depth"]}  {result["NPS"]} n/s'
+            if result["Done"] and self.board.is_game_over():
+                text = f'Fin de la partida: {self.board.result()}'
+            self.analysis_label.configure(text=text)
+            return
+
+        # Fracción de la barra para las blancas: la mitad con la posición
+        # igualada y los tres cuartos con EVAL_SCALE a su favor. Un mate
+        # (valor infinito) llena o vacía la barra.
+        advantage = -result["Value"]
+        if math.isinf(advantage):
+            white = 1.0 if advantage > 0 else 0.0
+            score = '+M' if advantage > 0 else '-M'
+        else:
+            white = 0.5 + 0.5 * advantage / (abs(advantage) + self.EVAL_SCALE)
+            score = f'{white_score(result["Value"]):+.1f}'
+        self.eval_bar.coords('white', 0, self.BOARD_SIZE * (1 - white), self.EVAL_BAR_WIDTH, self.BOARD_SIZE)
+
+        self.analysis_label.configure(
+            text=f'{score}  Profundidad {result["Depth"]}  {result["NPS"]} n/s\n'
+                 f'{san_line(self.board, result["Line"])}')
+
+
 # ------------------------------------------------------------------------------
 # --------------- MÉTODOS PARA COLOREAR CELDAS SELECCIONADAS
 # ------------------------------------------------------------------------------
@@ -425,19 +734,11 @@ class Board:
         # Obtenemos las coordenadas de la celda.
         x1, y1, x2, y2 = self._get_coords(row, col)
 
-        # Obtenemos los elementos dentro de la celda.
-        items = self.canvas.find_enclosed(x1, y1, x2, y2)
-
-        for item in items:
-            # Para cada elemento obtenemos sus etiquetas.
-            tags = self.canvas.gettags(item)
-
-            # Si el elemento es una casilla, cambiamos su color y lo añadimos a
-            # la lista de celdas enfocadas del tablero.
-            if 'square' in tags:
-                color = self.WHITE_COLOR if (row + col) % 2 == 0 else self.BLACK_COLOR
-                self.canvas.itemconfig(item, fill=self.FOCUSED_COLOR)
-                self.focus_squares.append((item, color))
+        # Coloreamos la celda con un rectángulo justo encima de la imagen del
+        # tablero (y, por tanto, debajo de las fichas).
+        item = self.canvas.create_rectangle(x1, y1, x2, y2, fill=self.FOCUSED_COLOR, outline='', tags='focus')
+        self.canvas.tag_raise(item, 'board')
+        self.focus_squares.append(item)
 
 
     def _unfocus_square(self):
@@ -445,36 +746,32 @@ class Board:
         Desenfoca la celda por la cual ha pasado la ficha seleccionada por el usuario.
         """
         for item in self.focus_squares:
-            square, color = item[0], item[1]
-            self.canvas.itemconfig(square, fill=color)
+            self.canvas.delete(item)
+        self.focus_squares = []
 
 
     def _focus_border(self, x:int, y:int):
         """
         Enfoca el borde de la celda sobre la cual está pasando la ficha seleccionada.
+        Siempre se usa el mismo elemento del lienzo: solo se mueve.
         """
         # Obtenemos la fila y columna del tablero en la posición dada.
         row, col = self._get_pos(x, y)
 
-        # Obtenemos las coordenadas de la celda.
-        x1, y1, x2, y2 = self._get_coords(row, col)
-
-        # Creamos el borde resaltado.
-        item = self.canvas.create_rectangle(x1, y1, x2, y2, fill='', outline='#6D5D6E', width='2')
-        self.focus_borders.append(item)
-
-        # Obtenemos el elemento actualmente seleccionado y lo elevamos.
-        current = self.canvas.find_withtag('current')[0]
-        tags = self.canvas.gettags(current)
-        if 'piece' in tags: self.canvas.lift(current)
+        # Movemos el borde resaltado a la celda y lo mostramos por encima de
+        # las fichas, salvo la seleccionada.
+        self.canvas.coords(self.hover_border, *self._get_coords(row, col))
+        self.canvas.itemconfigure(self.hover_border, state='disabled')
+        self.canvas.tag_raise(self.hover_border)
+        if self.selected_piece:
+            self.canvas.tag_raise(self.selected_piece)
 
 
     def _unfocus_border(self):
         """
         Desenfoca el borde de la celda por la cual ha pasado la ficha seleccionada.
         """
-        for item in self.focus_borders:
-            self.canvas.delete(item)
+        self.canvas.itemconfigure(self.hover_border, state='hidden')
 
 
     def _focus_moves(self):
@@ -512,6 +809,19 @@ class Board:
 # ---------- MÉTODOS PARA OBTENER POSIBLES MOVIMIENTOS DE UNA FICHA
 # ------------------------------------------------------------------------------
 
+    def _sync_turn(self):
+        """
+        Ajusta el jugador actual al turno del tablero de ajedrez.
+        """
+        self.players = cycle(['WHITE', 'BLACK'])
+        self.next_player = next(self.players)
+        self.current_player = self.next_player
+
+        if self.board.turn == chess.BLACK:
+            self.next_player = next(self.players)
+            self.current_player = self.next_player
+
+
     def _set_turn(self, dest_x:float, dest_y:float):
         """
         Establece a cuál jugador le toca jugar después de que se mueve una ficha.
@@ -1039,11 +1349,38 @@ class Board:
             self._print_matrix()
 
 
+    def replay(self, stream, speed:float=None):
+        """
+        Reproduce una partida recibida desde un GameStream (ver replay.py).
+        Mientras tanto, el ratón no mueve las fichas y el teclado controla la
+        reproducción: espacio pausa, +/- cambian la velocidad, las flechas
+        avanzan o retroceden una jugada e Inicio/Fin saltan a los extremos.
+        """
+        from replay import DEFAULT_SPEED, ReplayController
+
+        self.canvas.unbind('<Button-1>')
+        self.canvas.unbind('<B1-Motion>')
+        self.canvas.unbind('<ButtonRelease-1>')
+
+        self.replay_controller = controller = ReplayController(self, stream, speed or DEFAULT_SPEED)
+
+        self.window.bind('<space>', lambda event: controller.toggle_pause())
+        self.window.bind('<plus>', lambda event: controller.set_speed(controller.speed * 2))
+        self.window.bind('<minus>', lambda event: controller.set_speed(controller.speed / 2))
+        self.window.bind('<Right>', lambda event: controller.seek(controller.ply + 1))
+        self.window.bind('<Left>', lambda event: controller.seek(controller.ply - 1))
+        self.window.bind('<Home>', lambda event: controller.seek(0))
+        self.window.bind('<End>', lambda event: controller.seek(len(controller.moves)))
+
+
     def run(self):
         """
         Ejecuta la interfaz gráfica.
         """
         self.window.mainloop()
+        if self.analysis:
+            self.analysis.stop()
+        self.store.close()
 
 
 # ------------------------------------------------------------------------------
@@ -1052,6 +1389,32 @@ class Board:
 
 
 if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=Board.TITLE)
+    parser.add_argument('--pgn', help='reproduce la partida de un archivo PGN')
+    parser.add_argument('--watch', metavar='HOST:PUERTO', help='sigue una partida enviada por un socket local')
+    parser.add_argument('--speed', type=float, help='jugadas por segundo de la reproducción')
+    parser.add_argument('--instrument', nargs='?', const='', metavar='JSON',
+                        help='mide la latencia de los eventos y muestra un resumen al salir')
+    parser.add_argument('--no-analysis', action='store_true', help='no analiza la posición en segundo plano')
+    args = parser.parse_args()
+
     # Run the app.
-    app = Board()
+    app = Board(analysis=not (args.no_analysis or args.pgn or args.watch))
+
+    if args.instrument is not None:
+        from instrument import Instrumentation
+        Instrumentation(app, args.instrument or None)
+
+    if args.pgn or args.watch:
+        from replay import GameStream
+
+        if args.pgn:
+            stream = GameStream.from_pgn(args.pgn)
+        else:
+            host, port = args.watch.rsplit(':', 1)
+            stream = GameStream.from_socket(host, int(port))
+        app.replay(stream, args.speed)
+
     app.run()
\ No newline at end of file
@@ -0,0 +1,83 @@
+import os
+import random
+import chess
+import chess.polyglot
+from utils import BOOK_PATHS
+
+
+
+class OpeningBook:
+    """
+    Libro de aperturas en formato Polyglot (.bin).
+
+    Los archivos se abren con memoria mapeada (mmap), de modo que nunca se
+    cargan completos: cada consulta hace una búsqueda binaria sobre las
+    entradas ordenadas por la clave Zobrist de la posición.
+    """
+
+    def __init__(self, paths=BOOK_PATHS, min_weight=1, seed=None):
+        """
+        Abre los libros indicados (por defecto, los de BOOK_PATHS). Las rutas
+        que no existen se ignoran para que el motor pueda funcionar aunque no
+        se haya instalado ningún libro.
+        """
+        self.min_weight = min_weight
+        self.random = random.Random(seed)
+        self.readers = []
+
+        for path in paths:
+            if os.path.isfile(path):
+                self.readers.append(chess.polyglot.open_reader(path))
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def __bool__(self):
+        return bool(self.readers)
+
+
+    def get_moves(self, board:chess.Board):
+        """
+        Devuelve un diccionario {jugada: peso} con todas las jugadas legales
+        que los libros proponen para la posición dada. Si una jugada aparece
+        en varios libros, sus pesos se suman.
+        """
+        moves = {}
+
+        for reader in self.readers:
+            # Al pasarle el tablero, find_all ya normaliza el enroque (e1h1 ->
+            # e1g1) y descarta las entradas ilegales de colisiones de la clave.
+            for entry in reader.find_all(board, minimum_weight=self.min_weight):
+                movement = str(entry.move)
+                moves[movement] = moves.get(movement, 0) + entry.weight
+
+        return moves
+
+
+    def get_move(self, board:chess.Board):
+        """
+        Escoge una jugada del libro de forma aleatoria, con probabilidad
+        proporcional a su peso. Devuelve None si la posición no está en el libro.
+        """
+        moves = self.get_moves(board)
+
+        if not moves:
+            return None
+
+        movements = list(moves)
+        return self.random.choices(movements, weights=[moves[m] for m in movements])[0]
+
+
+    def close(self):
+        """
+        Cierra los archivos abiertos.
+        """
+        for reader in self.readers:
+            reader.close()
+        self.readers = []
@@ -0,0 +1,30 @@
+import chess
+from utils import PHASE_VALUES, PIECE_VALUES, POSITION_VALUES, POSITION_VALUES_ENDGAME
+
+# Fase de la partida con todas las piezas en el tablero.
+MAX_PHASE = 24
+
+def buildTaperedValues(pieceValues=PIECE_VALUES,positionValues=POSITION_VALUES,endgameValues=POSITION_VALUES_ENDGAME):
+    """
+    Precalcula, para cada fase de la partida, el valor de cada pieza en cada
+    casilla (índice i*8+j): su valor más la mezcla de las tablas de medio juego
+    y de final. Así la evaluación no tiene que mezclar las tablas en cada hoja.
+    Por defecto usa las tablas de utils (ver TAPERED_VALUES).
+    """
+    tables = []
+    for phase in range(MAX_PHASE+1):
+        table = {}
+        for piece in pieceValues:
+            table[piece] = [pieceValues[piece]
+                            + (positionValues[piece][i][j]*phase
+                               + endgameValues[piece][i][j]*(MAX_PHASE-phase)) // MAX_PHASE
+                            for i in range(8) for j in range(8)]
+        tables.append(table)
+    return tables
+
+TAPERED_VALUES = buildTaperedValues()
+
+PHASE_TYPE_VALUES = {pieceType: PHASE_VALUES[chess.piece_symbol(pieceType)] for pieceType in chess.PIECE_TYPES}
+
+# Valor de cada tipo de pieza (sin signo), usado para ordenar las capturas.
+PIECE_TYPE_VALUES = {pieceType: PIECE_VALUES[chess.piece_symbol(pieceType)] for pieceType in chess.PIECE_TYPES}
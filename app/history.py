@@ -0,0 +1,148 @@
+import random
+import time
+import chess
+
+# Cada cuántas jugadas se guarda una copia del tablero para poder saltar
+# hacia delante sin volver a jugar toda la partida.
+SNAPSHOT_INTERVAL = 20
+
+
+
+class MoveHistory:
+    """
+    Historial de la partida del tablero gráfico: todas las jugadas (también las
+    deshechas, que se pueden rehacer), su notación SAN y la jugada que se
+    muestra (ply).
+
+    Deshacer y rehacer cuestan un pop o un push de chess.Board. Para saltar
+    hacia atrás basta con pop, que es muy barato. Para saltar hacia delante a
+    una jugada lejana se parte de la copia del tablero más cercana, guardada
+    cada SNAPSHOT_INTERVAL jugadas, de modo que nunca se juegan más de
+    SNAPSHOT_INTERVAL jugadas. Tras un salto así el tablero es otro objeto:
+    hay que leerlo siempre de `board`.
+    """
+
+    def __init__(self, board:chess.Board, snapshot_interval:int=SNAPSHOT_INTERVAL):
+        self.board = board
+        self.snapshot_interval = snapshot_interval
+        self.moves = list(board.move_stack)
+        self.ply = len(self.moves)
+
+        # Reproducimos la partida una vez para obtener la notación SAN y las copias.
+        replay = board.root()
+        self.sans = []
+        self.snapshots = {0: replay.copy()}
+        for move in self.moves:
+            self.sans.append(replay.san(move))
+            replay.push(move)
+            self._snapshot(replay)
+
+
+    def __len__(self):
+        return len(self.moves)
+
+
+    def _snapshot(self, board:chess.Board):
+        ply = len(board.move_stack)
+        if ply % self.snapshot_interval == 0:
+            self.snapshots[ply] = board.copy()
+
+
+    def push(self, move:chess.Move):
+        """
+        Juega una jugada nueva. Si había jugadas deshechas, se descartan.
+        """
+        if self.ply < len(self.moves):
+            del self.moves[self.ply:]
+            del self.sans[self.ply:]
+            for ply in [ply for ply in self.snapshots if ply > self.ply]:
+                del self.snapshots[ply]
+
+        self.sans.append(self.board.san(move))
+        self.board.push(move)
+        self.moves.append(move)
+        self.ply += 1
+        self._snapshot(self.board)
+
+
+    def undo(self):
+        """
+        Deshace la última jugada mostrada. Devuelve False si no había ninguna.
+        """
+        if self.ply == 0:
+            return False
+        self.board.pop()
+        self.ply -= 1
+        return True
+
+
+    def redo(self):
+        """
+        Vuelve a jugar la siguiente jugada deshecha. Devuelve False si no había ninguna.
+        """
+        if self.ply == len(self.moves):
+            return False
+        self.board.push(self.moves[self.ply])
+        self.ply += 1
+        return True
+
+
+    def jump(self, ply:int):
+        """
+        Muestra la posición tras `ply` jugadas. Si está más de
+        SNAPSHOT_INTERVAL jugadas por delante de la actual, se parte de la
+        copia anterior más cercana en lugar de jugar todas las intermedias.
+        """
+        ply = max(0, min(ply, len(self.moves)))
+
+        if ply - self.ply > self.snapshot_interval:
+            start = ply - ply % self.snapshot_interval
+            self.board = self.snapshots[start].copy()
+            self.ply = start
+
+        while self.ply > ply:
+            self.undo()
+        while self.ply < ply:
+            self.redo()
+
+        return self.board
+
+
+
+def measure(plies:int=400, jumps:int=200, seed:int=0):
+    """
+    Juega una partida aleatoria de `plies` jugadas y mide cuánto tarda en
+    promedio deshacer, rehacer y saltar `jumps` veces a jugadas al azar.
+    Devuelve los tiempos en milisegundos.
+    """
+    generator = random.Random(seed)
+    board = chess.Board()
+    while len(board.move_stack) < plies and not board.is_game_over():
+        board.push(generator.choice(list(board.legal_moves)))
+
+    history = MoveHistory(board)
+    targets = [generator.randrange(len(history) + 1) for _ in range(jumps)]
+
+    start = time.perf_counter()
+    while history.undo():
+        pass
+    undo = (time.perf_counter() - start) * 1000 / len(history)
+
+    start = time.perf_counter()
+    while history.redo():
+        pass
+    redo = (time.perf_counter() - start) * 1000 / len(history)
+
+    start = time.perf_counter()
+    for target in targets:
+        history.jump(target)
+        assert history.board.move_stack == history.moves[:target]
+    jump = (time.perf_counter() - start) * 1000 / jumps
+
+    return {"Plies": len(history), "Undo": undo, "Redo": redo, "Jump": jump}
+
+
+if __name__ == '__main__':
+    result = measure()
+    print(f'{result["Plies"]} jugadas: deshacer {result["Undo"]:.4f} ms, '
+          f'rehacer {result["Redo"]:.4f} ms, saltar {result["Jump"]:.3f} ms')
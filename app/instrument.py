@@ -0,0 +1,211 @@
+import argparse
+import atexit
+import functools
+import json
+import sys
+import time
+
+# Métodos del tablero cuya duración se mide.
+HANDLERS = ['_start_drag', '_dragging', '_apply_drag', '_release', '_place_pieces', '_jump_to', '_poll_analysis']
+
+# Métodos del lienzo (llamadas a Tcl) que se cuentan.
+TCL_CALLS = ['find_enclosed', 'gettags', 'coords']
+
+# Límites (en milisegundos) de los intervalos de los histogramas.
+BUCKETS_MS = [0.5, 1, 2, 4, 8, 16, 32, 64, 128]
+
+# Cada cuánto se comprueba que el bucle de Tk responde y a partir de qué
+# retraso se considera que se ha bloqueado.
+HEARTBEAT_MS = 10
+STALL_MS = 50
+
+
+
+class Histogram:
+    """
+    Histograma de duraciones en intervalos de BUCKETS_MS, con el número de
+    muestras, la media y el máximo.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.total = 0.0
+        self.maximum = 0.0
+        self.samples = 0
+
+
+    def add(self, milliseconds:float):
+        index = 0
+        while index < len(BUCKETS_MS) and milliseconds >= BUCKETS_MS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.total += milliseconds
+        self.maximum = max(self.maximum, milliseconds)
+        self.samples += 1
+
+
+    def summary(self):
+        labels = [f'<{BUCKETS_MS[0]}'] + [f'{low}-{high}' for low, high in zip(BUCKETS_MS, BUCKETS_MS[1:])] + [f'>={BUCKETS_MS[-1]}']
+        return {
+            "Samples": self.samples,
+            "Mean": self.total / self.samples if self.samples else 0.0,
+            "Max": self.maximum,
+            "Buckets": {label: count for label, count in zip(labels, self.counts) if count},
+        }
+
+
+
+class Instrumentation:
+    """
+    Mide un tablero (Board de board.py) mientras se usa: la duración de cada
+    manejador de eventos, las llamadas a Tcl del lienzo y los bloqueos del
+    bucle de Tk. Solo se activa si se crea explícitamente; el tablero no
+    cambia en nada cuando no se usa.
+    """
+
+    def __init__(self, board, output:str=None):
+        self.board = board
+        self.output = output
+        self.handlers = {name: Histogram() for name in HANDLERS if hasattr(board, name)}
+        self.tcl_calls = {name: 0 for name in TCL_CALLS}
+        self.stalls = Histogram()
+        self.started = time.perf_counter()
+        self.reported = False
+
+        for name in self.handlers:
+            setattr(board, name, self._timed(name, getattr(board, name)))
+        for name in TCL_CALLS:
+            setattr(board.canvas, name, self._counted(name, getattr(board.canvas, name)))
+
+        # Si los eventos del ratón ya estaban asociados, se vuelven a asociar
+        # para que usen los manejadores medidos.
+        if board.canvas.bind('<Button-1>'):
+            board._init_mouse_events()
+
+        self.last_beat = time.perf_counter()
+        board.window.after(HEARTBEAT_MS, self._heartbeat)
+        atexit.register(self.report)
+
+
+    def _timed(self, name:str, method):
+        histogram = self.handlers[name]
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.add((time.perf_counter() - start) * 1000)
+
+        return wrapper
+
+
+    def _counted(self, name:str, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            self.tcl_calls[name] += 1
+            return method(*args, **kwargs)
+
+        return wrapper
+
+
+    def _heartbeat(self):
+        """
+        Se programa cada HEARTBEAT_MS; el retraso con el que llega es el tiempo
+        que el bucle de Tk ha estado ocupado sin atender eventos.
+        """
+        now = time.perf_counter()
+        delay = (now - self.last_beat) * 1000 - HEARTBEAT_MS
+        if delay >= STALL_MS:
+            self.stalls.add(delay)
+
+        self.last_beat = now
+        try:
+            self.board.window.after(HEARTBEAT_MS, self._heartbeat)
+        except Exception:
+            # La ventana ya se ha cerrado.
+            pass
+
+
+    def summary(self):
+        return {
+            "Seconds": time.perf_counter() - self.started,
+            "Handlers": {name: histogram.summary() for name, histogram in self.handlers.items()},
+            "TclCalls": dict(self.tcl_calls),
+            "Stalls": self.stalls.summary(),
+        }
+
+
+    def report(self, file=sys.stderr):
+        """
+        Imprime el resumen (una sola vez) y, si se indicó un archivo, lo guarda en JSON.
+        """
+        if self.reported:
+            return
+        self.reported = True
+        summary = self.summary()
+
+        print(f'\nInstrumentación ({summary["Seconds"]:.1f}s)', file=file)
+        print(f'  {"Manejador":<16}{"Eventos":>9}{"Media (ms)":>12}{"Máx (ms)":>10}  Histograma (ms)', file=file)
+        for name, data in summary["Handlers"].items():
+            buckets = ' '.join(f'{label}:{count}' for label, count in data["Buckets"].items())
+            print(f'  {name:<16}{data["Samples"]:>9}{data["Mean"]:>12.2f}{data["Max"]:>10.2f}  {buckets}', file=file)
+
+        calls = ' '.join(f'{name}={count}' for name, count in summary["TclCalls"].items())
+        print(f'  Llamadas a Tcl: {calls}', file=file)
+
+        stalls = summary["Stalls"]
+        print(f'  Bloqueos >= {STALL_MS} ms: {stalls["Samples"]} (máx {stalls["Max"]:.0f} ms)', file=file)
+
+        if self.output:
+            with open(self.output, 'w', encoding='utf-8') as handle:
+                json.dump(summary, handle, indent=2)
+
+
+
+def scripted_drag(board, steps:int=60, delay_ms:int=2):
+    """
+    Simula con event_generate un arrastre del peón de rey blanco de e2 a e4,
+    con `steps` movimientos del ratón, y cierra la ventana al terminar. Sirve
+    para medir el tablero sin nadie delante (por ejemplo, con xvfb-run).
+    """
+    canvas = board.canvas
+    half = board.SQUARE_SIZE // 2
+    x = board.MARGIN + 4 * board.SQUARE_SIZE + half
+    start_y = board.MARGIN + 6 * board.SQUARE_SIZE + half
+    end_y = board.MARGIN + 4 * board.SQUARE_SIZE + half
+
+    events = [('<Button-1>', x, start_y)]
+    events += [('<B1-Motion>', x, start_y + (end_y - start_y) * step // steps) for step in range(1, steps + 1)]
+    events += [('<ButtonRelease-1>', x, end_y)]
+
+    def send(index=0):
+        if index == len(events):
+            board.window.after(100, board.window.destroy)
+            return
+        sequence, event_x, event_y = events[index]
+        canvas.event_generate(sequence, x=event_x, y=event_y, warp=False)
+        board.window.after(delay_ms, send, index + 1)
+
+    board.window.after(200, send)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Abre el tablero midiendo la latencia de sus eventos.')
+    parser.add_argument('--output', help='archivo JSON donde se guarda el resumen')
+    parser.add_argument('--scripted', action='store_true',
+                        help='simula un arrastre y cierra la ventana (para ejecutar con xvfb-run)')
+    args = parser.parse_args()
+
+    from board import Board
+
+    app = Board()
+    instrumentation = Instrumentation(app, args.output)
+    if args.scripted:
+        scripted_drag(app)
+    app.run()
+    instrumentation.report()
+
+    if args.scripted and not instrumentation.handlers['_dragging'].samples:
+        sys.exit(1)
@@ -0,0 +1,181 @@
+import argparse
+import queue
+import threading
+import time
+import chess
+import AI
+from pawns import PawnHashTable
+from timeman import MAX_DEPTH
+from transposition import TranspositionTable
+
+# Cada cuántos segundos la búsqueda informa de los nodos aunque no haya
+# terminado la iteración en curso.
+REPORT_INTERVAL = 0.25
+
+# Longitud máxima de la línea principal que se muestra.
+PV_LENGTH = 8
+
+
+
+class LiveAnalysis:
+    """
+    Analiza en un hilo aparte la posición que se le indica con start, por
+    profundización iterativa y sin límite de tiempo, y deja los resultados
+    parciales en una cola: uno por cada profundidad completada y, mientras
+    tanto, uno con los nodos cada REPORT_INTERVAL segundos. Cada resultado es
+    un diccionario con "Generation", "Depth", "Value", "Movement", "Line",
+    "Nodes", "NPS" y "Done"; "Value", "Movement" y "Line" son los de la última
+    profundidad completada (None al principio).
+
+    start no espera nunca a la búsqueda anterior: le pide que se detenga y el
+    hilo nuevo espera a que termine antes de usar la tabla de
+    transposiciones, que se conserva de una posición a la siguiente. Los
+    resultados de búsquedas anteriores que aún estén en la cola se descartan
+    en drain por su número de generación.
+    """
+
+    def __init__(self, tt:TranspositionTable=None, options=None, max_depth:int=MAX_DEPTH):
+        self.results = queue.Queue()
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.pawns = PawnHashTable()
+        self.options = options
+        self.max_depth = max_depth
+        self.generation = 0
+        self.context = None
+        self.thread = None
+
+
+    def start(self, board:chess.Board):
+        """
+        Empieza a analizar una copia del tablero y detiene el análisis anterior.
+        """
+        self.stop()
+        self.generation += 1
+
+        # El contexto se crea aquí, ya sin límite de tiempo, para que stop
+        # pueda detener la búsqueda aunque el hilo aún no haya empezado: el
+        # hilo no vuelve a tocar deadline.
+        self.context = AI.SearchContext(deadline=float('inf'), options=self.options, tt=self.tt, pawns=self.pawns)
+        self.thread = threading.Thread(target=self._run, daemon=True,
+                                       args=(board.copy(), self.context, self.generation, self.thread))
+        self.thread.start()
+
+
+    def stop(self):
+        """
+        Pide a la búsqueda en curso que se detenga, sin esperarla: checkLimits
+        lanza SearchTimeout en cuanto comprueba el límite de tiempo.
+        """
+        if self.context is not None:
+            self.context.deadline = 0
+
+
+    def _run(self, board:chess.Board, context:AI.SearchContext, generation:int, previous:threading.Thread):
+        if previous is not None:
+            previous.join()
+
+        start = time.monotonic()
+        last_report = start
+        result = {"Generation": generation, "Depth": 0, "Value": None, "Movement": None, "Line": [],
+                  "Nodes": 0, "NPS": 0, "Done": False}
+
+        def report(**changes):
+            now = time.monotonic()
+            result.update(changes, Nodes=context.nodes, NPS=int(context.nodes / max(now - start, 1e-9)))
+            self.results.put(dict(result))
+
+        # checkLimits consulta el reloj cada pocos nodos: lo aprovechamos para
+        # informar de los nodos durante las iteraciones largas.
+        def clock():
+            nonlocal last_report
+            now = time.monotonic()
+            if now - last_report >= REPORT_INTERVAL:
+                last_report = now
+                report()
+            return now
+
+        context.clock = clock
+
+        for depth in range(1, self.max_depth + 1):
+            try:
+                current = AI.searchRoot(board, depth, context, result["Movement"])
+            except AI.SearchTimeout:
+                return
+            if not current:
+                break
+            line = AI.principalVariation(board, current["Movement"], context.tt, min(depth, PV_LENGTH))
+            report(Depth=depth, Value=current["Value"], Movement=current["Movement"], Line=line)
+
+        report(Done=True)
+
+
+    def drain(self):
+        """
+        Devuelve el último resultado de la búsqueda actual que haya llegado a la
+        cola desde la llamada anterior, o None si no hay ninguno.
+        """
+        latest = None
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                return latest
+            if result["Generation"] == self.generation:
+                latest = result
+
+
+
+def san_line(board:chess.Board, line):
+    """
+    Convierte una línea de jugadas UCI en texto con notación SAN y números de jugada.
+    """
+    return board.variation_san([chess.Move.from_uci(movement) for movement in line])
+
+
+def white_score(value:int):
+    """
+    Pasa una evaluación (positiva cuando están mejor las negras, en décimas
+    de peón) a peones desde el punto de vista de las blancas.
+    """
+    return -value / AI.PIECE_VALUES['p']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Análisis continuo en segundo plano.')
+    parser.add_argument('--fen', default=chess.STARTING_FEN)
+    parser.add_argument('--time', type=float, default=5.0, help='segundos de análisis de la posición')
+    parser.add_argument('--restarts', type=int, default=5,
+                        help='reinicios del análisis (tras cada jugada) para medir cuánto tardan')
+    args = parser.parse_args()
+
+    board = chess.Board(args.fen)
+    analysis = LiveAnalysis()
+    analysis.start(board)
+
+    end = time.monotonic() + args.time
+    while time.monotonic() < end:
+        result = analysis.drain()
+        if result:
+            value = f'{white_score(result["Value"]):+.1f}' if result["Value"] is not None else '-'
+            line = san_line(board, result["Line"]) if result["Line"] else ''
+            print(f'prof {result["Depth"]:>2}  eval {value:>6}  nodos {result["Nodes"]:>8}  '
+                  f'{result["NPS"]:>6} n/s  {line}')
+            if result["Done"]:
+                break
+        time.sleep(0.05)
+
+    # Tras cada jugada se reinicia el análisis: medimos cuánto tarda start (que
+    # no debe bloquear) y cuánto llega el primer resultado de la posición nueva.
+    for _ in range(args.restarts):
+        if board.is_game_over():
+            break
+        board.push(next(iter(board.legal_moves)))
+        begin = time.perf_counter()
+        analysis.start(board)
+        started = time.perf_counter()
+        while analysis.drain() is None:
+            time.sleep(0.001)
+        print(f'reinicio: start {(started - begin) * 1000:.2f} ms, '
+              f'primer resultado {(time.perf_counter() - begin) * 1000:.1f} ms')
+        time.sleep(0.3)
+    analysis.stop()
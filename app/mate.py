@@ -0,0 +1,355 @@
+import argparse
+import math
+import time
+import chess
+import chess.polyglot
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+# Valor de dar mate en la posición actual. Un mate a `ply` jugadas de la raíz
+# vale MATE_VALUE - ply, de modo que los mates más cortos valen más.
+MATE_VALUE = 30000
+
+DEFAULT_ENTRIES = 1 << 16
+
+# Límite de nodos por defecto de la búsqueda proof-number.
+PN_MAX_NODES = 2_000_000
+
+
+
+class MateSearch:
+    """
+    Búsqueda de mate: alfa-beta en negamax en la que el atacante solo juega
+    jaques (o todas sus jugadas, con checks_only=False) y el defensor todas las
+    suyas. No usa evaluación: una posición vale MATE_VALUE - ply si el bando que
+    mueve da mate, -(MATE_VALUE - ply) si lo recibe y 0 en cualquier otro caso.
+
+    Con valores así, la poda por distancia al mate es exacta: un nodo a `ply`
+    jugadas de la raíz no puede mejorar un mate ya encontrado más corto. La
+    búsqueda tiene su propia tabla de transposiciones, que conserva entre
+    llamadas.
+    """
+
+    def __init__(self, entries:int=DEFAULT_ENTRIES, checks_only:bool=True):
+        self.table = TranspositionTable(entries)
+        self.checks_only = checks_only
+        self.nodes = 0
+
+
+    def _attacker_moves(self, board:chess.Board, first=None):
+        """
+        Jugadas del atacante: los jaques (o todas), primero la jugada de la
+        tabla y después las que dejan al defensor con menos respuestas.
+        """
+        moves = []
+        for move in board.legal_moves:
+            if move == first:
+                continue
+            if self.checks_only and not board.gives_check(move):
+                continue
+            board.push(move)
+            replies = board.legal_moves.count()
+            board.pop()
+            moves.append((replies, move))
+
+        moves.sort(key=lambda item: item[0])
+        ordered = [move for replies, move in moves]
+        return [first] + ordered if first else ordered
+
+
+    def _defender_moves(self, board:chess.Board, first=None):
+        """
+        Jugadas del defensor: primero la jugada de la tabla y las capturas.
+        """
+        moves = sorted(board.legal_moves, key=lambda move: not board.is_capture(move))
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+
+    def _search(self, board:chess.Board, depth:int, ply:int, alpha:int, beta:int, attacker:bool):
+        self.nodes += 1
+
+        if not any(board.generate_legal_moves()):
+            return -(MATE_VALUE - ply) if board.is_check() else 0
+        if depth == 0:
+            return 0
+
+        # Poda por distancia al mate: ni el mejor resultado posible (dar mate
+        # en la siguiente jugada) ni el peor (recibir mate ahora) cambian la ventana.
+        alpha = max(alpha, -(MATE_VALUE - ply))
+        beta = min(beta, MATE_VALUE - ply - 1)
+        if alpha >= beta:
+            return alpha
+
+        key = chess.polyglot.zobrist_hash(board)
+        entry = self.table.probe(key)
+        ttMove = None
+        if entry:
+            entry_depth, value, bound, ttMove = entry
+            value = _from_table(value, ply)
+            if entry_depth >= depth and (bound == EXACT
+                    or (bound == LOWER and value >= beta)
+                    or (bound == UPPER and value <= alpha)):
+                return value
+            if ttMove is not None and not board.is_legal(ttMove):
+                ttMove = None
+
+        moves = self._attacker_moves(board, ttMove) if attacker else self._defender_moves(board, ttMove)
+
+        alpha_orig = alpha
+        best = 0 if attacker else -math.inf
+        best_move = None
+        for move in moves:
+            board.push(move)
+            value = -self._search(board, depth - 1, ply + 1, -beta, -alpha, not attacker)
+            board.pop()
+
+            if value > best:
+                best, best_move = value, move
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break
+
+        bound = UPPER if best <= alpha_orig else LOWER if best >= beta else EXACT
+        self.table.store(key, depth, _to_table(best, ply), bound, best_move)
+        return best
+
+
+    def search(self, board:chess.Board, moves:int):
+        """
+        Busca un mate en como mucho `moves` jugadas del bando que mueve, por
+        profundización iterativa (el primer mate encontrado es el más corto).
+        Devuelve {"Mate": jugadas, "Movement": jugada, "Line": jugadas, "Nodes": nodos}
+        o None si no lo hay (con checks_only, si no lo hay dando solo jaques).
+        """
+        board = board.copy(stack=False)
+
+        for mate in range(1, moves + 1):
+            depth = 2 * mate - 1
+            value = self._search(board, depth, 0, MATE_VALUE - depth - 1, MATE_VALUE, True)
+            if value >= MATE_VALUE - depth:
+                line = self.principal_variation(board, MATE_VALUE - value)
+                return {"Mate": mate, "Movement": line[0], "Line": line, "Nodes": self.nodes}
+
+        return None
+
+
+    def principal_variation(self, board:chess.Board, length:int):
+        """
+        Reconstruye la línea del mate a partir de la tabla de transposiciones.
+        """
+        board = board.copy(stack=False)
+        line = []
+        while len(line) < length:
+            entry = self.table.probe(chess.polyglot.zobrist_hash(board))
+            if not entry or entry[3] is None or not board.is_legal(entry[3]):
+                break
+            line.append(entry[3].uci())
+            board.push(entry[3])
+        return line
+
+
+def _to_table(value:int, ply:int):
+    """
+    Los valores de mate se guardan relativos a la posición, no a la raíz.
+    """
+    if value >= MATE_VALUE - 1000:
+        return value + ply
+    if value <= -(MATE_VALUE - 1000):
+        return value - ply
+    return value
+
+
+def _from_table(value:int, ply:int):
+    if value >= MATE_VALUE - 1000:
+        return value - ply
+    if value <= -(MATE_VALUE - 1000):
+        return value + ply
+    return value
+
+
+def mate_search(board:chess.Board, moves:int, search:MateSearch=None):
+    """
+    Atajo para MateSearch(...).search(board, moves).
+    """
+    return (search or MateSearch()).search(board, moves)
+
+
+
+class _ProofNode:
+    """
+    Nodo del árbol de la búsqueda proof-number. Los nodos OR son del atacante
+    (basta con que una jugada dé mate) y los AND del defensor (todas sus
+    jugadas deben recibir mate).
+    """
+    __slots__ = ('move', 'parent', 'children', 'proof', 'disproof', 'attacker', 'depth')
+
+    def __init__(self, move, parent, attacker:bool, depth:int):
+        self.move = move
+        self.parent = parent
+        self.children = None
+        self.proof = 1
+        self.disproof = 1
+        self.attacker = attacker
+        self.depth = depth
+
+
+    def update(self):
+        if self.attacker:
+            self.proof = min(child.proof for child in self.children)
+            self.disproof = sum(child.disproof for child in self.children)
+        else:
+            self.proof = sum(child.proof for child in self.children)
+            self.disproof = min(child.disproof for child in self.children)
+
+
+def pn_search(board:chess.Board, moves:int, max_nodes:int=PN_MAX_NODES, checks_only:bool=True):
+    """
+    Variante proof-number de la búsqueda de mate: expande siempre el nodo que
+    más acerca la prueba (o la refutación) del mate en como mucho `moves`
+    jugadas. No garantiza el mate más corto, pero suele necesitar muchos menos
+    nodos cuando las defensas son pocas. Devuelve el mismo diccionario que
+    MateSearch.search (con "Mate" según la línea encontrada) o None si se
+    refuta o se agotan los nodos.
+    """
+    board = board.copy(stack=False)
+    root = _ProofNode(None, None, True, 2 * moves - 1)
+    nodes = 1
+
+    while root.proof and root.disproof and nodes < max_nodes:
+        # Bajamos hasta el nodo más prometedor jugando sus jugadas.
+        node = root
+        while node.children:
+            key = (lambda child: child.proof) if node.attacker else (lambda child: child.disproof)
+            node = min(node.children, key=key)
+            board.push(node.move)
+
+        # Lo expandimos y evaluamos sus hijos.
+        node.children = []
+        for move in board.legal_moves:
+            if node.attacker and checks_only and not board.gives_check(move):
+                continue
+
+            child = _ProofNode(move, node, not node.attacker, node.depth - 1)
+            board.push(move)
+            if not any(board.generate_legal_moves()):
+                mated = board.is_check() and not child.attacker
+                child.proof, child.disproof = (0, math.inf) if mated else (math.inf, 0)
+            elif child.depth == 0:
+                child.proof, child.disproof = math.inf, 0
+            board.pop()
+
+            node.children.append(child)
+            nodes += 1
+
+        if not node.children:
+            # El atacante no tiene jaques: la prueba falla por aquí.
+            node.proof, node.disproof = math.inf, 0
+
+        # Actualizamos los números de los antecesores y volvemos a la raíz.
+        while True:
+            if node.children:
+                node.update()
+            if node.parent is None:
+                break
+            board.pop()
+            node = node.parent
+
+    if root.proof:
+        return None
+
+    # El atacante sigue su mate más corto y el defensor su defensa más larga.
+    line = []
+    node = root
+    while node.children:
+        proven = [child for child in node.children if child.proof == 0]
+        choose = min if node.attacker else max
+        node = choose(proven, key=_proof_length)
+        line.append(node.move.uci())
+    return {"Mate": (len(line) + 1) // 2, "Movement": line[0], "Line": line, "Nodes": nodes}
+
+
+def _proof_length(node:_ProofNode):
+    """
+    Número de jugadas hasta el mate en el subárbol probado del nodo.
+    """
+    if not node.children:
+        return 0
+    proven = [_proof_length(child) for child in node.children if child.proof == 0]
+    return 1 + (min(proven) if node.attacker else max(proven))
+
+
+# Problemas de mate con el número de jugadas de la solución más corta dando
+# solo jaques. Los de 4 a 6 jugadas salen de Ed. Lasker - Thomas (Londres, 1912).
+MATE_PUZZLES = [
+        ("r2qkb1r/pp2nppp/3p4/2pNN1B1/2BnP3/3P4/PPP2PPP/R2bK2R w KQkq - 1 10", 2),
+        ("r1b3kr/ppp1Bp1p/1b6/n2P4/2p3q1/2Q2N2/P4PPP/RN2R1K1 w - - 1 18", 3),
+        ("2r3k1/p4p2/3Rp2p/1p2P1pK/8/1P4P1/P3Q2P/1q6 b - - 0 1", 3),
+        ("rn3r2/pbppq1p1/1p2pN2/8/3P1kNP/3B4/PPP2PP1/R3K2R w KQ - 1 15", 4),
+        ("rn3r2/pbppq1p1/1p2pN1k/4N3/3P4/3B4/PPP2PPP/R3K2R w KQ - 1 13", 5),
+        ("rn3r2/pbppq1pk/1p2pb2/4N3/3PN3/3B4/PPP2PPP/R3K2R w KQ - 0 12", 6),
+    ]
+
+
+def compare(max_full_depth:int=3):
+    """
+    Resuelve los problemas de MATE_PUZZLES con la búsqueda de mate, con la
+    variante proof-number y, si no es demasiado profunda, con la búsqueda
+    completa de AI.py, e imprime los nodos y el tiempo de cada una.
+    """
+    import AI
+
+    print(f'{"Mate":>5}{"Nodos":>10}{"Tiempo":>9}{"PN nodos":>10}{"PN tiempo":>10}'
+          f'{"AI nodos":>10}{"AI tiempo":>10}  Jugada')
+
+    for fen, expected in MATE_PUZZLES:
+        board = chess.Board(fen)
+
+        start = time.perf_counter()
+        result = mate_search(board, expected)
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        proof = pn_search(board, expected)
+        pn_elapsed = time.perf_counter() - start
+
+        full = f'{"-":>10}{"-":>10}'
+        depth = 2 * expected - 1
+        if depth <= max_full_depth:
+            context = AI.SearchContext()
+            start = time.perf_counter()
+            AI.searchRoot(board, depth, context)
+            full = f'{context.nodes:>10}{time.perf_counter() - start:>9.2f}s'
+
+        status = '' if result and result["Mate"] == expected else '  ERROR'
+        print(f'{expected:>5}{result["Nodes"] if result else "-":>10}{elapsed:>8.2f}s'
+              f'{proof["Nodes"] if proof else "-":>10}{pn_elapsed:>9.2f}s{full}'
+              f'  {result["Movement"] if result else "-"}{status}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Busca mates forzados.')
+    parser.add_argument('--fen', help='posición; sin ella se resuelven los problemas de MATE_PUZZLES')
+    parser.add_argument('--moves', type=int, default=5, help='jugadas máximas del mate')
+    parser.add_argument('--all-moves', action='store_true', help='el atacante también puede jugar jugadas sin jaque')
+    parser.add_argument('--pn', action='store_true', help='usa la búsqueda proof-number')
+    parser.add_argument('--full-depth', type=int, default=3, help='profundidad máxima de la búsqueda completa al comparar')
+    args = parser.parse_args()
+
+    if args.fen:
+        board = chess.Board(args.fen)
+        start = time.perf_counter()
+        if args.pn:
+            result = pn_search(board, args.moves, checks_only=not args.all_moves)
+        else:
+            result = MateSearch(checks_only=not args.all_moves).search(board, args.moves)
+        elapsed = time.perf_counter() - start
+
+        if result:
+            print(f'Mate en {result["Mate"]}: {" ".join(result["Line"])} ({result["Nodes"]} nodos, {elapsed:.2f}s)')
+        else:
+            print(f'Sin mate en {args.moves} ({elapsed:.2f}s)')
+    else:
+        compare(args.full_depth)
@@ -0,0 +1,448 @@
+import argparse
+import math
+import time
+import chess
+import chess.polyglot
+import numpy as np
+import AI
+from batch_eval import evaluate_batch
+from benchmark import BENCHMARK_POSITIONS
+from storage import pack_move, unpack_move
+from timeman import MAX_DEPTH
+from transposition import TranspositionTable
+
+# Constante de exploración de PUCT.
+EXPLORATION = 1.5
+
+# Hojas que se recogen antes de evaluarlas todas juntas.
+BATCH_SIZE = 32
+
+# Pérdida virtual que se suma a los nodos del camino mientras su hoja espera
+# a ser evaluada, para que las siguientes selecciones del lote vayan por otro lado.
+VIRTUAL_LOSS = 1.0
+
+# Escala con la que la evaluación (en unidades de PIECE_VALUES) se convierte
+# en un valor entre -1 y 1: value = tanh(evaluación / VALUE_SCALE).
+VALUE_SCALE = 60.0
+
+# Temperatura de las probabilidades a priori de las jugadas (ver _priors).
+PRIOR_TEMPERATURE = 20.0
+
+INITIAL_CAPACITY = 1 << 16
+
+# Valores del campo terminal de cada nodo.
+OPEN, TERMINAL = 0, 1
+
+
+
+class NodePool:
+    """
+    Nodos del árbol guardados en arreglos de numpy, uno por campo, en lugar de
+    un objeto de Python por nodo. Los hijos de un nodo ocupan posiciones
+    consecutivas a partir de first[nodo]; first vale -1 mientras el nodo no se
+    ha expandido. total acumula los valores vistos por el jugador que hizo la
+    jugada que lleva al nodo.
+    """
+
+    FIELDS = {
+            "parent": np.int32,
+            "move": np.uint16,
+            "first": np.int32,
+            "count": np.int16,
+            "visits": np.int32,
+            "total": np.float64,
+            "prior": np.float32,
+            "terminal": np.int8,
+        }
+
+    def __init__(self, capacity:int=INITIAL_CAPACITY):
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self.size = 0
+
+
+    def __len__(self):
+        return self.size
+
+
+    def capacity(self):
+        return len(self.parent)
+
+
+    def allocate(self, count:int):
+        """
+        Reserva count nodos consecutivos y devuelve el índice del primero. Si no
+        caben, todos los arreglos se amplían al doble.
+        """
+        start = self.size
+        if start + count > self.capacity():
+            capacity = max(self.capacity() * 2, start + count)
+            for name in self.FIELDS:
+                values = getattr(self, name)
+                grown = np.zeros(capacity, dtype=values.dtype)
+                grown[:start] = values[:start]
+                setattr(self, name, grown)
+
+        self.size = start + count
+        end = self.size
+        self.first[start:end] = -1
+        self.count[start:end] = 0
+        self.visits[start:end] = 0
+        self.total[start:end] = 0.0
+        self.terminal[start:end] = OPEN
+        return start
+
+
+    def compact(self, root:int):
+        """
+        Conserva solo el subárbol de root, que pasa a ser el nodo 0, y devuelve
+        el nuevo índice de la raíz. Los nodos se recorren por niveles, de modo
+        que los hijos de cada nodo siguen siendo consecutivos.
+        """
+        order = [np.array([root])]
+        level = order[0]
+        while len(level):
+            expanded = level[self.first[level] >= 0]
+            if not len(expanded):
+                break
+            level = np.concatenate([np.arange(start, start + count) for start, count
+                                    in zip(self.first[expanded], self.count[expanded])])
+            order.append(level)
+        order = np.concatenate(order)
+
+        index = np.full(self.size, -1, dtype=np.int32)
+        index[order] = np.arange(len(order), dtype=np.int32)
+
+        for name in self.FIELDS:
+            values = getattr(self, name)
+            values[:len(order)] = values[order]
+
+        first = self.first[:len(order)]
+        first[first >= 0] = index[first[first >= 0]]
+        parent = self.parent[:len(order)]
+        parent[1:] = index[parent[1:]]
+        parent[0] = -1
+
+        self.size = len(order)
+        return 0
+
+
+
+class MCTS:
+    """
+    Búsqueda de Monte Carlo en árbol con selección PUCT. En lugar de simular
+    partidas, cada hoja se puntúa con la evaluación de tablas de batch_eval:
+    las hojas se recogen de BATCH_SIZE en BATCH_SIZE (con pérdida virtual) y
+    se evalúan con una sola llamada vectorizada.
+
+    El árbol se conserva entre búsquedas: si la nueva posición se alcanza desde
+    la anterior con las jugadas ya exploradas, se reutiliza su subárbol.
+    """
+
+    def __init__(self, exploration:float=EXPLORATION, batch_size:int=BATCH_SIZE, capacity:int=INITIAL_CAPACITY):
+        self.exploration = exploration
+        self.batch_size = batch_size
+        self.pool = NodePool(capacity)
+        self.board = None
+        self.start = None
+        self.root = None
+        self.nodes = 0
+
+
+    def _reset(self, board:chess.Board):
+        self.pool.size = 0
+        self.root = self.pool.allocate(1)
+        self.pool.parent[self.root] = -1
+        self.board = board.copy()
+        self.start = board.root().fen()
+
+
+    def _advance(self, board:chess.Board):
+        """
+        Intenta llevar la raíz a la posición de board bajando por el árbol con
+        las jugadas hechas desde la raíz actual. Devuelve False si no se puede.
+        """
+        if self.board is None or board.root().fen() != self.start:
+            return False
+
+        played = len(board.move_stack) - len(self.board.move_stack)
+        if played < 0 or board.move_stack[:len(self.board.move_stack)] != self.board.move_stack:
+            return False
+
+        pool = self.pool
+        node = self.root
+        for move in board.move_stack[len(board.move_stack) - played:]:
+            if pool.first[node] < 0:
+                return False
+            children = slice(pool.first[node], pool.first[node] + pool.count[node])
+            matches = np.flatnonzero(pool.move[children] == pack_move(move))
+            if not len(matches):
+                return False
+            node = pool.first[node] + matches[0]
+
+        self.root = pool.compact(node)
+        self.board = board.copy()
+        return True
+
+
+    def _priors(self, board:chess.Board, moves):
+        """
+        Probabilidades a priori de las jugadas: una softmax de la misma
+        puntuación que usa orderMoves (capturas por víctima y atacante,
+        coronaciones y jugadas tranquilas).
+        """
+        scores = np.zeros(len(moves))
+        for index, mov in enumerate(moves):
+            if board.is_capture(mov):
+                victim = AI.PIECE_TYPE_VALUES[board.piece_type_at(mov.to_square) or chess.PAWN]
+                scores[index] = victim - AI.PIECE_TYPE_VALUES[board.piece_type_at(mov.from_square)] / 10
+            if mov.promotion:
+                scores[index] += AI.PIECE_TYPE_VALUES[mov.promotion]
+
+        scores = np.exp((scores - scores.max()) / PRIOR_TEMPERATURE)
+        return scores / scores.sum()
+
+
+    def _expand(self, node:int, board:chess.Board, root:bool=False):
+        """
+        Crea los hijos del nodo. Devuelve el valor (visto por el jugador que
+        tiene el turno) si la posición es terminal, o None. Dentro del árbol
+        una repetición ya cuenta como tablas; en la raíz solo se termina si no
+        hay jugadas legales.
+        """
+        pool = self.pool
+        moves = list(board.legal_moves)
+        if not moves:
+            value = -1.0 if board.is_check() else 0.0
+        elif not root and (board.is_insufficient_material() or board.is_repetition(2) or board.halfmove_clock >= 100):
+            value = 0.0
+        else:
+            start = pool.allocate(len(moves))
+            pool.parent[start:start + len(moves)] = node
+            pool.move[start:start + len(moves)] = [pack_move(mov) for mov in moves]
+            pool.prior[start:start + len(moves)] = self._priors(board, moves)
+            pool.first[node] = start
+            pool.count[node] = len(moves)
+            return None
+
+        pool.terminal[node] = TERMINAL
+        # Los nodos terminales guardan su valor en prior, que no se usa para ellos.
+        pool.prior[node] = value
+        return value
+
+
+    def _select(self, board:chess.Board):
+        """
+        Baja desde la raíz eligiendo en cada nodo el hijo con mayor
+        Q + c * P * sqrt(N) / (1 + n), aplicando la pérdida virtual al camino.
+        Deja el tablero en la hoja y devuelve el camino.
+        """
+        pool = self.pool
+        node = self.root
+        path = [node]
+
+        while pool.first[node] >= 0:
+            start = pool.first[node]
+            end = start + pool.count[node]
+            visits = pool.visits[start:end]
+            quality = np.divide(pool.total[start:end], visits, out=np.zeros(end - start), where=visits > 0)
+            scores = quality + self.exploration * pool.prior[start:end] * math.sqrt(pool.visits[node] + 1) / (1 + visits)
+            node = start + int(np.argmax(scores))
+            board.push(unpack_move(int(pool.move[node])))
+            path.append(node)
+
+        path = np.array(path)
+        pool.visits[path] += 1
+        pool.total[path] -= VIRTUAL_LOSS
+        return path
+
+
+    def _backup(self, path, value:float):
+        """
+        Propaga el valor de la hoja (visto por el jugador que tiene el turno
+        en ella) hacia la raíz, cambiando de signo en cada nivel, y retira la
+        pérdida virtual.
+        """
+        signs = np.where(np.arange(len(path))[::-1] % 2 == 0, -1.0, 1.0)
+        self.pool.total[path] += value * signs + VIRTUAL_LOSS
+
+
+    def search(self, board:chess.Board, deadline:float=None, max_nodes:int=None, clock=time.monotonic):
+        """
+        Busca hasta el instante deadline (según clock) o hasta evaluar
+        max_nodes hojas, lo que ocurra antes (al menos un lote). Devuelve
+        {"Value": valor, "Movement": jugada, "Line": línea principal, "Nodes": hojas
+        evaluadas, "Visits": visitas de la raíz}, con el valor en las mismas
+        unidades y el mismo signo que AI.py (positivo cuando están mejor las negras).
+        """
+        if not self._advance(board):
+            self._reset(board)
+
+        pool = self.pool
+        self.nodes = 0
+        work = self.board.copy()
+
+        if pool.first[self.root] < 0 and self._expand(self.root, work, root=True) is not None:
+            return None
+
+        while True:
+            paths, leaves = [], []
+            for _ in range(self.batch_size):
+                path = self._select(work)
+                leaf = int(path[-1])
+                if pool.terminal[leaf] == TERMINAL:
+                    self._backup(path, float(pool.prior[leaf]))
+                else:
+                    value = self._expand(leaf, work)
+                    if value is not None:
+                        self._backup(path, value)
+                    else:
+                        paths.append(path)
+                        leaves.append(work.copy(stack=False))
+                for _ in range(len(path) - 1):
+                    work.pop()
+
+            if leaves:
+                values = np.tanh(evaluate_batch(leaves) / VALUE_SCALE)
+                for path, leaf, value in zip(paths, leaves, values):
+                    # La evaluación es positiva cuando están mejor las negras.
+                    self._backup(path, value if leaf.turn == chess.BLACK else -value)
+            self.nodes += self.batch_size
+
+            if ((deadline is not None and clock() >= deadline)
+                    or (max_nodes is not None and self.nodes >= max_nodes)):
+                break
+
+        return self.result()
+
+
+    def result(self):
+        pool = self.pool
+        start = pool.first[self.root]
+        end = start + pool.count[self.root]
+        best = start + int(np.argmax(pool.visits[start:end]))
+
+        quality = pool.total[best] / max(pool.visits[best], 1)
+        value = VALUE_SCALE * math.atanh(min(max(quality, -0.999), 0.999))
+
+        line = []
+        node = best
+        while node >= 0:
+            line.append(str(unpack_move(int(pool.move[node]))))
+            if pool.first[node] < 0 or not pool.visits[pool.first[node]:pool.first[node] + pool.count[node]].any():
+                break
+            children = slice(pool.first[node], pool.first[node] + pool.count[node])
+            node = pool.first[node] + int(np.argmax(pool.visits[children]))
+
+        return {
+            "Value": round(value if self.board.turn == chess.BLACK else -value),
+            "Movement": line[0],
+            "Line": line,
+            "Nodes": self.nodes,
+            "Visits": int(pool.visits[self.root]),
+        }
+
+
+
+def alphabeta(board:chess.Board, deadline:float=None, max_nodes:int=None, clock=time.monotonic, tt=None):
+    """
+    Profundización iterativa de AI.py con los mismos límites que MCTS.search:
+    devuelve el resultado de la última iteración completa, con "Depth" y "Nodes".
+    """
+    context = AI.SearchContext(deadline=deadline, clock=clock, tt=tt if tt is not None else TranspositionTable(),
+                               maxNodes=max_nodes)
+    result = None
+
+    for depth in range(1, MAX_DEPTH + 1):
+        try:
+            current = AI.searchRoot(board, depth, context, result and result["Movement"])
+        except AI.SearchTimeout:
+            break
+        if not current:
+            break
+        current["Depth"] = depth
+        result = current
+
+    if result is None:
+        result = {"Value": None, "Movement": str(next(iter(board.legal_moves))), "Depth": 0}
+    result["Nodes"] = context.nodes
+    return result
+
+
+def throughput(seconds:float=None, max_nodes:int=None, positions=BENCHMARK_POSITIONS):
+    """
+    Busca cada posición con los dos motores con los mismos límites e imprime
+    los nodos, el tiempo, los nodos por segundo y la jugada de cada uno.
+    """
+    print(f'{"Posición":<10}{"AB nodos":>10}{"AB NPS":>9}{"Prof":>5}  {"AB jugada":<10}'
+          f'{"MCTS nodos":>11}{"MCTS NPS":>10}  MCTS jugada')
+
+    for index, fen in enumerate(positions):
+        board = chess.Board(fen)
+        row = []
+        for engine in ('alphabeta', 'mcts'):
+            start = time.monotonic()
+            deadline = start + seconds if seconds else None
+            if engine == 'alphabeta':
+                result = alphabeta(board, deadline, max_nodes)
+            else:
+                result = MCTS().search(board, deadline, max_nodes)
+            elapsed = max(time.monotonic() - start, 1e-9)
+            row.append((result, elapsed))
+
+        (ab, ab_time), (mc, mc_time) = row
+        print(f'{index:<10}{ab["Nodes"]:>10}{ab["Nodes"] / ab_time:>9.0f}{ab["Depth"]:>5}  {ab["Movement"]:<10}'
+              f'{mc["Nodes"]:>11}{mc["Nodes"] / mc_time:>10.0f}  {mc["Movement"]}')
+
+
+def play(seconds:float=None, max_nodes:int=None, games:int=2, max_plies:int=120, positions=BENCHMARK_POSITIONS):
+    """
+    Enfrenta MCTS (que reutiliza su árbol) con alfa-beta desde las posiciones
+    dadas, alternando los colores, con los mismos límites por jugada. Las
+    partidas que llegan a max_plies se dan por tablas. Devuelve los puntos de
+    MCTS y el número de partidas.
+    """
+    score = 0.0
+
+    for game in range(games):
+        board = chess.Board(positions[(game // 2) % len(positions)])
+        mcts_color = chess.WHITE if game % 2 == 0 else chess.BLACK
+        engine = MCTS()
+
+        while not board.is_game_over(claim_draw=True) and len(board.move_stack) < max_plies:
+            deadline = time.monotonic() + seconds if seconds else None
+            if board.turn == mcts_color:
+                result = engine.search(board, deadline, max_nodes)
+            else:
+                result = alphabeta(board, deadline, max_nodes)
+            board.push_uci(result["Movement"])
+
+        outcome = board.outcome(claim_draw=True)
+        points = 0.5 if outcome is None or outcome.winner is None else float(outcome.winner == mcts_color)
+        score += points
+        print(f'Partida {game + 1}: MCTS con {"blancas" if mcts_color == chess.WHITE else "negras"}, '
+              f'{board.result(claim_draw=True) if outcome else "1/2-1/2 (límite)"} en {len(board.move_stack)} jugadas')
+
+    print(f'MCTS: {score}/{games}')
+    return score, games
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compara MCTS con la búsqueda alfa-beta.')
+    parser.add_argument('--time', type=float, help='segundos por jugada')
+    parser.add_argument('--nodes', type=int, help='nodos por jugada')
+    parser.add_argument('--games', type=int, default=0, help='partidas entre los dos motores')
+    parser.add_argument('--fen', help='busca solo esta posición con MCTS')
+    args = parser.parse_args()
+
+    if not args.time and not args.nodes:
+        args.time = 1.0
+
+    if args.fen:
+        deadline = time.monotonic() + args.time if args.time else None
+        result = MCTS().search(chess.Board(args.fen), deadline, args.nodes)
+        print(f'{result["Movement"]} ({result["Value"]}): {" ".join(result["Line"])} - {result["Nodes"]} nodos')
+    else:
+        throughput(args.time, args.nodes)
+        if args.games:
+            play(args.time, args.nodes, args.games)
@@ -0,0 +1,154 @@
+import random
+import chess
+from utils import PAWN_STRUCTURE_VALUES
+
+DEFAULT_ENTRIES = 1 << 14
+
+
+def _build_keys():
+    """
+    Genera las claves Zobrist de los peones agrupadas por bytes de la máscara:
+    PAWN_KEYS[color][byte][valor] es el XOR de las claves de los peones de ese
+    color que indica `valor` en la fila `byte`. Así la clave de toda la
+    estructura se obtiene con una consulta por fila.
+    """
+    generator = random.Random(0x5a0b)
+    square_keys = [[generator.getrandbits(64) for _ in range(64)] for _ in chess.COLORS]
+
+    keys = []
+    for color in chess.COLORS:
+        rows = []
+        for byte in range(8):
+            row = [0] * 256
+            for value in range(1, 256):
+                low = value & -value
+                row[value] = row[value ^ low] ^ square_keys[color][byte * 8 + low.bit_length() - 1]
+            rows.append(row)
+        keys.append(rows)
+    return keys
+
+
+PAWN_KEYS = _build_keys()
+
+
+def _build_passed_masks():
+    """
+    Devuelve, para cada color y casilla, las casillas de su columna y de las
+    columnas vecinas que están por delante del peón.
+    """
+    masks = [[0] * 64, [0] * 64]
+
+    for square in chess.SQUARES:
+        file, rank = chess.square_file(square), chess.square_rank(square)
+        files = chess.BB_FILES[file] | chess.BB_FILES[max(file - 1, 0)] | chess.BB_FILES[min(file + 1, 7)]
+
+        ahead_white = ahead_black = 0
+        for other in range(8):
+            if other > rank:
+                ahead_white |= chess.BB_RANKS[other]
+            elif other < rank:
+                ahead_black |= chess.BB_RANKS[other]
+
+        masks[chess.WHITE][square] = files & ahead_white
+        masks[chess.BLACK][square] = files & ahead_black
+
+    return masks
+
+
+PASSED_MASKS = _build_passed_masks()
+
+ADJACENT_FILES = [
+    (chess.BB_FILES[file - 1] if file > 0 else 0) | (chess.BB_FILES[file + 1] if file < 7 else 0)
+    for file in range(8)
+]
+
+
+def pawn_key(white_pawns:int, black_pawns:int):
+    """
+    Calcula la clave Zobrist de la estructura de peones.
+    """
+    key = 0
+    white_keys = PAWN_KEYS[chess.WHITE]
+    black_keys = PAWN_KEYS[chess.BLACK]
+
+    # Los peones solo pueden estar entre la segunda y la séptima fila.
+    for byte in range(1, 7):
+        shift = byte * 8
+        key ^= white_keys[byte][(white_pawns >> shift) & 0xff] ^ black_keys[byte][(black_pawns >> shift) & 0xff]
+    return key
+
+
+def pawn_structure(white_pawns:int, black_pawns:int):
+    """
+    Evalúa los peones doblados, aislados y pasados. Igual que en el resto de
+    la evaluación, el valor es positivo cuando están mejor las negras.
+    """
+    value = 0
+
+    for color, own, enemy, sign in ((chess.WHITE, white_pawns, black_pawns, -1),
+                                    (chess.BLACK, black_pawns, white_pawns, 1)):
+        terms = 0
+
+        for file in range(8):
+            count = chess.popcount(own & chess.BB_FILES[file])
+            if count:
+                if count > 1:
+                    terms += PAWN_STRUCTURE_VALUES['Doubled'] * (count - 1)
+                if not own & ADJACENT_FILES[file]:
+                    terms += PAWN_STRUCTURE_VALUES['Isolated'] * count
+
+        for square in chess.scan_forward(own):
+            if not enemy & PASSED_MASKS[color][square]:
+                # Fila desde la primera del dueño del peón (ver PAWN_STRUCTURE_VALUES).
+                rank = chess.square_rank(square) if color == chess.WHITE else 7 - chess.square_rank(square)
+                terms += PAWN_STRUCTURE_VALUES['Passed'][rank]
+
+        value += sign * terms
+
+    return value
+
+
+
+class PawnHashTable:
+    """
+    Tabla de tamaño fijo con la evaluación de la estructura de peones, indexada
+    por la clave Zobrist de los peones. Como los peones cambian en pocas
+    jugadas, casi todas las consultas de la búsqueda encuentran su entrada.
+    """
+
+    def __init__(self, entries:int=DEFAULT_ENTRIES):
+        """
+        El número de entradas debe ser una potencia de dos.
+        """
+        self.mask = entries - 1
+        self.keys = [None] * entries
+        self.values = [0] * entries
+        self.hits = 0
+        self.probes = 0
+
+
+    def evaluate(self, board:chess.Board):
+        """
+        Devuelve el valor de la estructura de peones del tablero.
+        """
+        white_pawns = board.pawns & board.occupied_co[chess.WHITE]
+        black_pawns = board.pawns & board.occupied_co[chess.BLACK]
+        key = pawn_key(white_pawns, black_pawns)
+        index = key & self.mask
+
+        self.probes += 1
+        if self.keys[index] == key:
+            self.hits += 1
+            return self.values[index]
+
+        value = pawn_structure(white_pawns, black_pawns)
+        self.keys[index] = key
+        self.values[index] = value
+        return value
+
+
+    def hit_rate(self):
+        """
+        Devuelve la fracción de consultas que encontraron su entrada.
+        """
+        return self.hits / self.probes if self.probes else 0.0
@@ -0,0 +1,136 @@
+import argparse
+import multiprocessing
+import sys
+import time
+import chess
+import chess.polyglot
+
+# Posiciones de referencia con el número de hojas conocido para cada
+# profundidad (https://www.chessprogramming.org/Perft_Results).
+PERFT_POSITIONS = [
+        (chess.STARTING_FEN, [20, 400, 8902, 197281, 4865609]),
+        ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862, 4085603]),
+        ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+        ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467, 422333]),
+        ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+        ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890, 3894594]),
+    ]
+
+
+def perft(board:chess.Board, depth:int, bulk:bool=True, cache:dict=None):
+    """
+    Cuenta las hojas del árbol de jugadas legales hasta la profundidad dada.
+
+    Con `bulk`, en el último nivel se cuentan las jugadas legales sin jugarlas.
+    Si se indica un diccionario `cache`, los resultados de cada subárbol se
+    guardan por clave Zobrist y profundidad para reutilizarlos en las transposiciones.
+    """
+    if depth == 0:
+        return 1
+    if bulk and depth == 1:
+        return board.legal_moves.count()
+
+    if cache is not None:
+        key = (chess.polyglot.zobrist_hash(board), depth)
+        if key in cache:
+            return cache[key]
+
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += perft(board, depth - 1, bulk, cache)
+        board.pop()
+
+    if cache is not None:
+        cache[key] = nodes
+    return nodes
+
+
+def perft_search_path(board:chess.Board, movement:str, depth:int):
+    """
+    Igual que perft, pero recorre el árbol como las búsquedas de AI.py: copiando
+    el tablero en cada nodo y jugando las jugadas a partir de su texto UCI.
+    Sirve para medir el coste del manejo de jugadas en la búsqueda.
+    """
+    board.push(chess.Move.from_uci(movement))
+    if depth == 0:
+        return 1
+
+    legal_moves = [str(mov) for mov in board.legal_moves]
+    return sum(perft_search_path(board.copy(), move, depth - 1) for move in legal_moves)
+
+
+def _divide_move(args):
+    """
+    Cuenta las hojas de una jugada de la raíz. Se ejecuta en un proceso aparte.
+    """
+    fen, movement, depth, bulk, hashing = args
+    board = chess.Board(fen)
+    board.push_uci(movement)
+    return movement, perft(board, depth - 1, bulk, {} if hashing else None)
+
+
+def divide(board:chess.Board, depth:int, bulk:bool=True, hashing:bool=False, processes:int=1):
+    """
+    Devuelve un diccionario {jugada: hojas} con las hojas de cada jugada de la raíz.
+    Con varios procesos, las jugadas de la raíz se reparten entre ellos.
+    """
+    tasks = [(board.fen(), str(move), depth, bulk, hashing) for move in board.legal_moves]
+
+    if processes > 1:
+        with multiprocessing.Pool(processes) as pool:
+            return dict(pool.map(_divide_move, tasks))
+
+    return dict(map(_divide_move, tasks))
+
+
+def check(max_depth:int, bulk:bool=True, hashing:bool=False, processes:int=1, search_path:bool=False):
+    """
+    Compara las hojas de las posiciones de referencia con los valores conocidos
+    e imprime la velocidad en nodos (hojas) por segundo.
+    Devuelve True si todos los resultados son correctos.
+    """
+    correct = True
+
+    for fen, expected in PERFT_POSITIONS:
+        for depth in range(1, min(max_depth, len(expected)) + 1):
+            board = chess.Board(fen)
+            start = time.perf_counter()
+
+            if search_path:
+                nodes = sum(perft_search_path(board.copy(), str(move), depth - 1) for move in board.legal_moves)
+            else:
+                nodes = sum(divide(board, depth, bulk, hashing, processes).values())
+
+            elapsed = time.perf_counter() - start
+            status = 'ok' if nodes == expected[depth - 1] else f'ERROR (esperado {expected[depth - 1]})'
+            correct = correct and nodes == expected[depth - 1]
+
+            print(f'{fen:<75} {depth} {nodes:>10} {elapsed:>8.2f}s {nodes / elapsed:>10.0f} nps  {status}')
+
+    return correct
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cuenta las hojas del árbol de jugadas (perft).')
+    parser.add_argument('depth', type=int)
+    parser.add_argument('--fen', help='posición a dividir; sin ella se comprueban las posiciones de referencia')
+    parser.add_argument('--no-bulk', dest='bulk', action='store_false', help='juega también las jugadas del último nivel')
+    parser.add_argument('--hash', dest='hashing', action='store_true', help='reutiliza los subárboles transpuestos')
+    parser.add_argument('--processes', type=int, default=1, help='procesos entre los que se reparten las jugadas de la raíz')
+    parser.add_argument('--search-path', action='store_true', help='recorre el árbol como las búsquedas de AI.py')
+    args = parser.parse_args()
+
+    if args.fen:
+        board = chess.Board(args.fen)
+        start = time.perf_counter()
+        counts = divide(board, args.depth, args.bulk, args.hashing, args.processes)
+        elapsed = time.perf_counter() - start
+
+        for movement, nodes in sorted(counts.items()):
+            print(f'{movement}: {nodes}')
+
+        total = sum(counts.values())
+        print(f'\nJugadas: {len(counts)}  Hojas: {total}  Tiempo: {elapsed:.2f}s  {total / elapsed:.0f} nps')
+    else:
+        sys.exit(0 if check(args.depth, args.bulk, args.hashing, args.processes, args.search_path) else 1)
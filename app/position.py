@@ -0,0 +1,682 @@
+import argparse
+import sys
+import time
+import chess
+import chess.polyglot
+from evaluation import MAX_PHASE, PHASE_TYPE_VALUES, TAPERED_VALUES
+from storage import unpack_move
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = chess.PIECE_TYPES
+WHITE, BLACK = chess.WHITE, chess.BLACK
+
+# Símbolo de cada pieza por color y tipo, como en las tablas de evaluación.
+SYMBOLS = [[None] + [chess.piece_symbol(piece_type) for piece_type in chess.PIECE_TYPES],
+           [None] + [chess.piece_symbol(piece_type).upper() for piece_type in chess.PIECE_TYPES]]
+
+# Claves Zobrist de polyglot, las mismas que usa chess.polyglot.zobrist_hash.
+_RANDOM = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+PIECE_KEYS = [[[0] * 64] + [[_RANDOM[64 * ((piece_type - 1) * 2 + color) + square] for square in chess.SQUARES]
+                            for piece_type in chess.PIECE_TYPES] for color in (BLACK, WHITE)]
+TURN_KEY = _RANDOM[780]
+EP_KEYS = [_RANDOM[772 + file] for file in range(8)]
+
+# Derechos de enroque como máscara de 4 bits, en el orden de las claves de polyglot.
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+CASTLING_KEYS = [0] * 16
+for _rights in range(16):
+    for _bit in range(4):
+        if _rights & (1 << _bit):
+            CASTLING_KEYS[_rights] ^= _RANDOM[768 + _bit]
+
+# Derechos que se conservan cuando una jugada sale de la casilla o llega a ella.
+CASTLING_MASKS = [15] * 64
+CASTLING_MASKS[chess.E1] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASKS[chess.H1] = 15 & ~WHITE_KINGSIDE
+CASTLING_MASKS[chess.A1] = 15 & ~WHITE_QUEENSIDE
+CASTLING_MASKS[chess.E8] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASKS[chess.H8] = 15 & ~BLACK_KINGSIDE
+CASTLING_MASKS[chess.A8] = 15 & ~BLACK_QUEENSIDE
+
+# Enroques: (derecho, rey, destino del rey, torre, destino de la torre,
+# casillas que deben estar vacías, casillas que no pueden estar atacadas).
+CASTLINGS = [
+        [(BLACK_KINGSIDE, chess.E8, chess.G8, chess.H8, chess.F8, chess.BB_F8 | chess.BB_G8, [chess.F8, chess.G8]),
+         (BLACK_QUEENSIDE, chess.E8, chess.C8, chess.A8, chess.D8, chess.BB_B8 | chess.BB_C8 | chess.BB_D8, [chess.D8, chess.C8])],
+        [(WHITE_KINGSIDE, chess.E1, chess.G1, chess.H1, chess.F1, chess.BB_F1 | chess.BB_G1, [chess.F1, chess.G1]),
+         (WHITE_QUEENSIDE, chess.E1, chess.C1, chess.A1, chess.D1, chess.BB_B1 | chess.BB_C1 | chess.BB_D1, [chess.D1, chess.C1])],
+    ]
+
+# Línea que pasa por dos casillas y casillas entre ellas.
+RAYS = [[chess.ray(a, b) for b in chess.SQUARES] for a in chess.SQUARES]
+BETWEEN = [[chess.between(a, b) for b in chess.SQUARES] for a in chess.SQUARES]
+
+PROMOTIONS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# Máximo de jugadas legales en una posición.
+MAX_MOVES = 218
+
+# Movimiento nulo (ver make_null): pack_move(chess.Move.null()), que no es
+# ninguna jugada legal.
+NULL_MOVE = 0
+
+BB_SQUARES = chess.BB_SQUARES
+BB_KNIGHT_ATTACKS = chess.BB_KNIGHT_ATTACKS
+BB_KING_ATTACKS = chess.BB_KING_ATTACKS
+BB_PAWN_ATTACKS = chess.BB_PAWN_ATTACKS
+BB_RANK_ATTACKS, BB_RANK_MASKS = chess.BB_RANK_ATTACKS, chess.BB_RANK_MASKS
+BB_FILE_ATTACKS, BB_FILE_MASKS = chess.BB_FILE_ATTACKS, chess.BB_FILE_MASKS
+BB_DIAG_ATTACKS, BB_DIAG_MASKS = chess.BB_DIAG_ATTACKS, chess.BB_DIAG_MASKS
+
+
+def _scan_reversed(mask:int):
+    """
+    Genera las casillas de la máscara de mayor a menor, como chess.scan_reversed.
+    """
+    while mask:
+        square = mask.bit_length() - 1
+        yield square
+        mask ^= BB_SQUARES[square]
+
+
+
+class Position:
+    """
+    Posición para la búsqueda: máscaras de bits por tipo de pieza y por color,
+    una lista con la pieza de cada casilla y la clave Zobrist (la de polyglot)
+    y la evaluación (la de evaluatePosition de AI.py, sin la estructura de
+    peones), que se actualizan con cada jugada.
+
+    A diferencia de chess.Board, make solo guarda en la pila lo necesario para
+    deshacer la jugada con unmake, y no hace falta copiar la posición en cada
+    nodo. Las jugadas son enteros codificados con pack_move (storage.py). La
+    conversión desde y hacia chess.Board se hace solo en la raíz; la
+    posición no conoce las jugadas anteriores a la conversión (repeticiones).
+    """
+
+    __slots__ = ("pieces", "bitboards", "occupied_co", "turn", "castling", "ep_square",
+                 "halfmove_clock", "fullmove_number", "key", "phase", "value", "stack")
+
+    def __init__(self):
+        self.pieces = [0] * 64
+        self.bitboards = [0] * 7
+        self.occupied_co = [0, 0]
+        self.turn = WHITE
+        self.castling = 0
+        self.ep_square = None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.key = 0
+        self.phase = 0
+        self.value = 0
+        self.stack = []
+
+
+    @classmethod
+    def from_board(cls, board:chess.Board):
+        position = cls()
+
+        for square, piece in board.piece_map().items():
+            position.pieces[square] = piece.piece_type
+            position.bitboards[piece.piece_type] |= BB_SQUARES[square]
+            position.occupied_co[piece.color] |= BB_SQUARES[square]
+
+        position.turn = board.turn
+        position.castling = ((WHITE_KINGSIDE if board.has_kingside_castling_rights(WHITE) else 0)
+                             | (WHITE_QUEENSIDE if board.has_queenside_castling_rights(WHITE) else 0)
+                             | (BLACK_KINGSIDE if board.has_kingside_castling_rights(BLACK) else 0)
+                             | (BLACK_QUEENSIDE if board.has_queenside_castling_rights(BLACK) else 0))
+        position.ep_square = board.ep_square
+        position.halfmove_clock = board.halfmove_clock
+        position.fullmove_number = board.fullmove_number
+
+        position.key = position.compute_key()
+        position.phase = sum(PHASE_TYPE_VALUES[piece_type] for piece_type in position.pieces if piece_type)
+        position.value = position.compute_value()
+        return position
+
+
+    def to_board(self):
+        return chess.Board(self.fen())
+
+
+    def fen(self):
+        rows = []
+        for rank in range(7, -1, -1):
+            row, empty = '', 0
+            for file in range(8):
+                square = rank * 8 + file
+                piece_type = self.pieces[square]
+                if not piece_type:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                row += SYMBOLS[bool(self.occupied_co[WHITE] & BB_SQUARES[square])][piece_type]
+            rows.append(row + (str(empty) if empty else ''))
+
+        castling = ''.join(symbol for bit, symbol in zip((1, 2, 4, 8), 'KQkq') if self.castling & bit) or '-'
+        ep_square = chess.square_name(self.ep_square) if self.ep_square is not None else '-'
+        return (f'{"/".join(rows)} {"w" if self.turn == WHITE else "b"} {castling} {ep_square} '
+                f'{self.halfmove_clock} {self.fullmove_number}')
+
+
+    def color_at(self, square:int):
+        return bool(self.occupied_co[WHITE] & BB_SQUARES[square])
+
+
+    def compute_key(self):
+        """
+        Calcula la clave Zobrist desde cero (make la actualiza de forma incremental).
+        """
+        key = CASTLING_KEYS[self.castling] ^ self._ep_key()
+        if self.turn == WHITE:
+            key ^= TURN_KEY
+        for square, piece_type in enumerate(self.pieces):
+            if piece_type:
+                key ^= PIECE_KEYS[self.color_at(square)][piece_type][square]
+        return key
+
+
+    def compute_value(self):
+        """
+        Calcula la evaluación desde cero con la fase actual.
+        """
+        table = TAPERED_VALUES[min(self.phase, MAX_PHASE)]
+        return sum(table[SYMBOLS[self.color_at(square)][piece_type]][square]
+                   for square, piece_type in enumerate(self.pieces) if piece_type)
+
+
+    def _ep_key(self):
+        """
+        Como en polyglot, la casilla de captura al paso solo cuenta si algún
+        peón del jugador que tiene el turno puede capturar en ella.
+        """
+        if self.ep_square is None:
+            return 0
+        capturers = BB_PAWN_ATTACKS[not self.turn][self.ep_square] & self.bitboards[PAWN] & self.occupied_co[self.turn]
+        return EP_KEYS[self.ep_square & 7] if capturers else 0
+
+
+    def attackers(self, color:bool, square:int, occupied:int):
+        """
+        Devuelve la máscara de las piezas de `color` que atacan la casilla con la ocupación dada.
+        """
+        bitboards = self.bitboards
+        queens_and_rooks = bitboards[QUEEN] | bitboards[ROOK]
+        queens_and_bishops = bitboards[QUEEN] | bitboards[BISHOP]
+
+        return self.occupied_co[color] & (
+            (BB_KNIGHT_ATTACKS[square] & bitboards[KNIGHT])
+            | (BB_KING_ATTACKS[square] & bitboards[KING])
+            | (BB_PAWN_ATTACKS[not color][square] & bitboards[PAWN])
+            | ((BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied]
+                | BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied]) & queens_and_rooks)
+            | (BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied] & queens_and_bishops)) & occupied
+
+
+    def king(self, color:bool):
+        return (self.bitboards[KING] & self.occupied_co[color]).bit_length() - 1
+
+
+    def is_check(self):
+        occupied = self.occupied_co[WHITE] | self.occupied_co[BLACK]
+        return bool(self.attackers(not self.turn, self.king(self.turn), occupied))
+
+
+    # Las máscaras y consultas con los nombres de chess.Board que usan see.py
+    # (ver exchange), pawns.py y tablebase.py.
+
+    @property
+    def pawns(self):
+        return self.bitboards[PAWN]
+
+    @property
+    def knights(self):
+        return self.bitboards[KNIGHT]
+
+    @property
+    def bishops(self):
+        return self.bitboards[BISHOP]
+
+    @property
+    def rooks(self):
+        return self.bitboards[ROOK]
+
+    @property
+    def queens(self):
+        return self.bitboards[QUEEN]
+
+    @property
+    def kings(self):
+        return self.bitboards[KING]
+
+    @property
+    def occupied(self):
+        return self.occupied_co[WHITE] | self.occupied_co[BLACK]
+
+    @property
+    def castling_rights(self):
+        return self.castling
+
+
+    def piece_type_at(self, square:int):
+        return self.pieces[square] or None
+
+
+    def pieces_mask(self, piece_type:int, color:bool):
+        return self.bitboards[piece_type] & self.occupied_co[color]
+
+
+    def is_en_passant(self, move:int):
+        return self.pieces[move & 63] == PAWN and (move >> 6) & 63 == self.ep_square
+
+
+    def is_capture(self, move:int):
+        return bool(self.occupied_co[not self.turn] & BB_SQUARES[(move >> 6) & 63]) or self.is_en_passant(move)
+
+
+    def gives_check(self, move:int):
+        self.make(move)
+        check = self.is_check()
+        self.unmake()
+        return check
+
+
+    def has_pieces(self, color:bool):
+        """
+        Verifica si el jugador tiene alguna pieza además del rey y los peones.
+        """
+        return bool(self.occupied_co[color] & ~(self.bitboards[PAWN] | self.bitboards[KING]))
+
+
+    def _attacks(self, piece_type:int, square:int, occupied:int):
+        if piece_type == KNIGHT:
+            return BB_KNIGHT_ATTACKS[square]
+        if piece_type == BISHOP:
+            return BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied]
+        rook = BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied] | BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied]
+        if piece_type == ROOK:
+            return rook
+        return rook | BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied]
+
+
+    def _pinned(self, king:int, us:bool, occupied:int):
+        """
+        Devuelve la máscara de las piezas propias clavadas contra el rey.
+        """
+        bitboards = self.bitboards
+        them = self.occupied_co[not us]
+        snipers = (((BB_RANK_ATTACKS[king][0] | BB_FILE_ATTACKS[king][0]) & (bitboards[ROOK] | bitboards[QUEEN]))
+                   | (BB_DIAG_ATTACKS[king][0] & (bitboards[BISHOP] | bitboards[QUEEN]))) & them
+
+        pinned = 0
+        for sniper in _scan_reversed(snipers):
+            blockers = BETWEEN[king][sniper] & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & self.occupied_co[us]:
+                pinned |= blockers
+        return pinned
+
+
+    def legal_moves(self):
+        """
+        Devuelve la lista de jugadas legales (codificadas con pack_move) en el
+        mismo orden que chess.Board.legal_moves.
+        """
+        moves = [0] * MAX_MOVES
+        del moves[self._generate(chess.BB_ALL, moves):]
+        return moves
+
+
+    def generate_moves(self, moves):
+        """
+        Escribe las jugadas legales, en el orden de legal_moves, al principio
+        de moves (una lista o un array con sitio para MAX_MOVES, como los de
+        AI.MoveStack) y devuelve cuántas hay. No reserva ninguna lista.
+        """
+        return self._generate(chess.BB_ALL, moves)
+
+
+    def legal_captures(self):
+        """
+        Devuelve las capturas legales (también al paso) en el mismo orden que
+        chess.Board.generate_legal_captures.
+        """
+        moves = [0] * MAX_MOVES
+        del moves[self._generate(self.occupied_co[not self.turn], moves):]
+        return moves
+
+
+    def _generate(self, to_mask:int, moves):
+        """
+        Escribe en moves las jugadas legales que llegan a alguna casilla de
+        `to_mask`, además de las capturas al paso, y devuelve cuántas hay. Como
+        python-chess, estando en jaque genera primero las jugadas del rey.
+        """
+        us = self.turn
+        pieces = self.pieces
+        ours = self.occupied_co[us]
+        theirs = self.occupied_co[not us]
+        occupied = ours | theirs
+        king = self.king(us)
+        checkers = self.attackers(not us, king, occupied)
+        pinned = self._pinned(king, us, occupied)
+        count = 0
+
+        def add_king_moves():
+            nonlocal count
+            without_king = occupied ^ BB_SQUARES[king]
+            for target in _scan_reversed(BB_KING_ATTACKS[king] & ~ours & to_mask):
+                if not self.attackers(not us, target, without_king):
+                    moves[count] = king | target << 6
+                    count += 1
+
+        # Con jaque doble solo puede mover el rey; con jaque simple, las demás
+        # piezas solo pueden capturar a la que da jaque o interponerse.
+        if not checkers:
+            evasions = to_mask
+        else:
+            add_king_moves()
+            if checkers & (checkers - 1):
+                evasions = 0
+            else:
+                checker = checkers.bit_length() - 1
+                evasions = (BETWEEN[king][checker] | checkers) & to_mask
+
+        for source in _scan_reversed(ours & ~self.bitboards[PAWN]):
+            piece_type = pieces[source]
+            if piece_type == KING:
+                if not checkers:
+                    add_king_moves()
+                continue
+
+            targets = self._attacks(piece_type, source, occupied) & ~ours & evasions
+            if pinned & BB_SQUARES[source]:
+                targets &= RAYS[king][source]
+            for target in _scan_reversed(targets):
+                moves[count] = source | target << 6
+                count += 1
+
+        if not checkers:
+            for right, king_from, king_to, _, _, empty, safe in CASTLINGS[us]:
+                if (self.castling & right and to_mask & BB_SQUARES[king_to] and not occupied & empty
+                        and not any(self.attackers(not us, square, occupied) for square in safe)):
+                    moves[count] = king_from | king_to << 6
+                    count += 1
+
+        pawns = self.bitboards[PAWN] & ours
+        last_rank = chess.BB_RANK_8 if us == WHITE else chess.BB_RANK_1
+
+        def add_pawn_move(source, target):
+            nonlocal count
+            if pinned & BB_SQUARES[source] and not RAYS[king][source] & BB_SQUARES[target]:
+                return
+            if BB_SQUARES[target] & last_rank:
+                for promotion in PROMOTIONS:
+                    moves[count] = source | target << 6 | promotion << 12
+                    count += 1
+            else:
+                moves[count] = source | target << 6
+                count += 1
+
+        for source in _scan_reversed(pawns):
+            for target in _scan_reversed(BB_PAWN_ATTACKS[us][source] & theirs & evasions):
+                add_pawn_move(source, target)
+
+        if us == WHITE:
+            single = pawns << 8 & ~occupied & chess.BB_ALL
+            double = single << 8 & ~occupied & chess.BB_RANK_4
+            step = -8
+        else:
+            single = pawns >> 8 & ~occupied
+            double = single >> 8 & ~occupied & chess.BB_RANK_5
+            step = 8
+
+        for target in _scan_reversed(single & evasions):
+            add_pawn_move(target + step, target)
+        for target in _scan_reversed(double & evasions):
+            add_pawn_move(target + 2 * step, target)
+
+        # La captura al paso puede destapar el rey en la fila: se comprueba jugándola.
+        if self.ep_square is not None:
+            capturers = BB_PAWN_ATTACKS[not us][self.ep_square] & pawns
+            for source in _scan_reversed(capturers):
+                move = source | self.ep_square << 6
+                self.make(move)
+                if not self.attackers(self.turn, self.king(us), self.occupied_co[WHITE] | self.occupied_co[BLACK]):
+                    moves[count] = move
+                    count += 1
+                self.unmake()
+
+        return count
+
+
+    def _put(self, square:int, color:bool, piece_type:int):
+        self.pieces[square] = piece_type
+        self.bitboards[piece_type] |= BB_SQUARES[square]
+        self.occupied_co[color] |= BB_SQUARES[square]
+
+
+    def _remove(self, square:int, color:bool, piece_type:int):
+        self.pieces[square] = 0
+        self.bitboards[piece_type] ^= BB_SQUARES[square]
+        self.occupied_co[color] ^= BB_SQUARES[square]
+
+
+    def make(self, move:int):
+        """
+        Juega una jugada legal y actualiza la clave y la evaluación.
+        """
+        source, target, promotion = move & 63, (move >> 6) & 63, move >> 12
+        us = self.turn
+        them = not us
+        piece_type = self.pieces[source]
+        captured = self.pieces[target]
+
+        self.stack.append((move, captured, self.castling, self.ep_square, self.halfmove_clock,
+                           self.key, self.phase, self.value))
+
+        phase = self.phase
+        table = TAPERED_VALUES[min(phase, MAX_PHASE)]
+        key = self.key ^ self._ep_key() ^ CASTLING_KEYS[self.castling] ^ TURN_KEY
+        value = self.value
+
+        if captured:
+            self._remove(target, them, captured)
+            key ^= PIECE_KEYS[them][captured][target]
+            value -= table[SYMBOLS[them][captured]][target]
+            phase -= PHASE_TYPE_VALUES[captured]
+        elif piece_type == PAWN and target == self.ep_square:
+            square = target - 8 if us == WHITE else target + 8
+            self._remove(square, them, PAWN)
+            key ^= PIECE_KEYS[them][PAWN][square]
+            value -= table[SYMBOLS[them][PAWN]][square]
+
+        self._remove(source, us, piece_type)
+        key ^= PIECE_KEYS[us][piece_type][source]
+        value -= table[SYMBOLS[us][piece_type]][source]
+
+        placed = promotion or piece_type
+        self._put(target, us, placed)
+        key ^= PIECE_KEYS[us][placed][target]
+        value += table[SYMBOLS[us][placed]][target]
+        if promotion:
+            phase += PHASE_TYPE_VALUES[promotion] - PHASE_TYPE_VALUES[PAWN]
+
+        if piece_type == KING and abs(target - source) == 2:
+            rook_from, rook_to = (target + 1, target - 1) if target > source else (target - 2, target + 1)
+            self._remove(rook_from, us, ROOK)
+            self._put(rook_to, us, ROOK)
+            key ^= PIECE_KEYS[us][ROOK][rook_from] ^ PIECE_KEYS[us][ROOK][rook_to]
+            value += table[SYMBOLS[us][ROOK]][rook_to] - table[SYMBOLS[us][ROOK]][rook_from]
+
+        self.castling &= CASTLING_MASKS[source] & CASTLING_MASKS[target]
+        self.ep_square = (source + target) // 2 if piece_type == PAWN and abs(target - source) == 16 else None
+        self.halfmove_clock = 0 if piece_type == PAWN or captured else self.halfmove_clock + 1
+        if us == BLACK:
+            self.fullmove_number += 1
+        self.turn = them
+
+        self.key = key ^ CASTLING_KEYS[self.castling] ^ self._ep_key()
+        self.phase = phase
+        # Si cambia la fase cambian todas las tablas y se recalcula la evaluación.
+        self.value = value if min(phase, MAX_PHASE) == min(self.stack[-1][6], MAX_PHASE) else self.compute_value()
+
+
+    def make_null(self):
+        """
+        Cede el turno sin mover (movimiento nulo, codificado como NULL_MOVE).
+        """
+        self.stack.append((NULL_MOVE, 0, self.castling, self.ep_square, self.halfmove_clock,
+                           self.key, self.phase, self.value))
+        self.key ^= self._ep_key() ^ TURN_KEY
+        self.ep_square = None
+        self.halfmove_clock += 1
+        if self.turn == BLACK:
+            self.fullmove_number += 1
+        self.turn = not self.turn
+
+
+    def unmake(self):
+        """
+        Deshace la última jugada hecha con make o make_null.
+        """
+        move, captured, self.castling, ep_square, self.halfmove_clock, self.key, self.phase, self.value = self.stack.pop()
+        source, target, promotion = move & 63, (move >> 6) & 63, move >> 12
+        self.turn = us = not self.turn
+        them = not us
+        if us == BLACK:
+            self.fullmove_number -= 1
+        if move == NULL_MOVE:
+            self.ep_square = ep_square
+            return
+
+        placed = self.pieces[target]
+        piece_type = PAWN if promotion else placed
+        self._remove(target, us, placed)
+        self._put(source, us, piece_type)
+
+        if captured:
+            self._put(target, them, captured)
+        elif piece_type == PAWN and target == ep_square:
+            self._put(target - 8 if us == WHITE else target + 8, them, PAWN)
+
+        if piece_type == KING and abs(target - source) == 2:
+            rook_from, rook_to = (target + 1, target - 1) if target > source else (target - 2, target + 1)
+            self._remove(rook_to, us, ROOK)
+            self._put(rook_from, us, ROOK)
+
+        self.ep_square = ep_square
+
+
+
+def perft(position:Position, depth:int):
+    """
+    Cuenta las hojas del árbol de jugadas legales con make/unmake, contando
+    las jugadas del último nivel sin jugarlas (como perft con bulk).
+    """
+    moves = position.legal_moves()
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        position.make(move)
+        nodes += perft(position, depth - 1)
+        position.unmake()
+    return nodes
+
+
+def verify(board:chess.Board, depth:int):
+    """
+    Recorre el árbol a la profundidad dada con Position y con chess.Board a la
+    vez y comprueba en cada nodo las jugadas legales y las capturas (en el
+    mismo orden), la clave Zobrist (también tras un movimiento nulo), la
+    evaluación y que unmake deja la posición como estaba. Devuelve los nodos.
+    """
+    import AI
+
+    position = Position.from_board(board)
+    board = board.copy()
+
+    def visit(depth):
+        assert position.key == chess.polyglot.zobrist_hash(board), board.fen()
+        assert position.value == AI.evaluatePosition(board), board.fen()
+        moves = position.legal_moves()
+        assert [unpack_move(move) for move in moves] == list(board.legal_moves), board.fen()
+        assert [unpack_move(move) for move in position.legal_captures()] == list(board.generate_legal_captures()), board.fen()
+        if depth == 0:
+            return 1
+
+        if not position.is_check():
+            position.make_null()
+            board.push(chess.Move.null())
+            assert position.key == chess.polyglot.zobrist_hash(board), board.fen()
+            board.pop()
+            position.unmake()
+
+        nodes = 0
+        for move in moves:
+            before = (position.fen(), position.key, position.value)
+            position.make(move)
+            board.push(unpack_move(move))
+            nodes += visit(depth - 1)
+            board.pop()
+            position.unmake()
+            assert (position.fen(), position.key, position.value) == before, board.fen()
+        return nodes
+
+    return visit(depth)
+
+
+def compare(max_depth:int):
+    """
+    Compara los resultados de perft de Position con los valores conocidos e
+    imprime los nodos por segundo de Position, de chess.Board con push/pop y
+    de chess.Board copiando el tablero en cada nodo.
+    Devuelve True si todos los resultados son correctos.
+    """
+    from perft import PERFT_POSITIONS, perft as board_perft, perft_search_path
+
+    correct = True
+    print(f'{"Posición":<10}{"Prof":>5}{"Hojas":>10}{"Position":>12}{"push/pop":>12}{"copia":>12}  Resultado')
+
+    for index, (fen, expected) in enumerate(PERFT_POSITIONS):
+        for depth in range(1, min(max_depth, len(expected)) + 1):
+            board = chess.Board(fen)
+            position = Position.from_board(board)
+
+            start = time.perf_counter()
+            nodes = perft(position, depth)
+            fast = time.perf_counter() - start
+
+            start = time.perf_counter()
+            board_perft(board, depth)
+            push_pop = time.perf_counter() - start
+
+            start = time.perf_counter()
+            sum(perft_search_path(board.copy(), str(move), depth - 1) for move in board.legal_moves)
+            copying = time.perf_counter() - start
+
+            status = 'ok' if nodes == expected[depth - 1] else f'ERROR (esperado {expected[depth - 1]})'
+            correct = correct and nodes == expected[depth - 1]
+            print(f'{index:<10}{depth:>5}{nodes:>10}{nodes / fast:>12.0f}{nodes / push_pop:>12.0f}'
+                  f'{nodes / copying:>12.0f}  {status}')
+
+    return correct
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Comprueba Position con perft y lo compara con chess.Board.')
+    parser.add_argument('depth', type=int, nargs='?', default=3)
+    parser.add_argument('--verify', type=int, metavar='DEPTH',
+                        help='comprueba nodo a nodo jugadas, claves y evaluación contra python-chess')
+    args = parser.parse_args()
+
+    # perft.py solo hace falta para las comprobaciones (e importa multiprocessing).
+    from perft import PERFT_POSITIONS
+
+    if args.verify:
+        for fen, _ in PERFT_POSITIONS:
+            print(f'{fen:<75} {verify(chess.Board(fen), args.verify):>8} nodos ok')
+    sys.exit(0 if compare(args.depth) else 1)
@@ -0,0 +1,285 @@
+import queue
+import socket
+import sys
+import threading
+import time
+import chess
+import chess.pgn
+
+# Cada cuántas jugadas se guarda una posición (FEN) para poder saltar a
+# cualquier jugada sin reproducir la partida desde el principio.
+CHECKPOINT_INTERVAL = 20
+
+# Intervalo entre actualizaciones de la reproducción y número máximo de
+# veces por segundo que se redibuja el tablero.
+TICK_MS = 15
+MAX_FPS = 30
+
+# Jugadas por segundo de la reproducción por defecto.
+DEFAULT_SPEED = 2.0
+
+
+
+class _MoveVisitor(chess.pgn.BaseVisitor):
+    """
+    Visitante del lector de PGN que envía cada jugada de la línea principal a
+    la cola del GameStream a medida que se analiza, sin esperar a tener la
+    partida completa. Antes, le indica la posición inicial de la partida, que
+    puede no ser la habitual (cabeceras FEN y SetUp).
+    """
+
+    def __init__(self, stream:'GameStream'):
+        self.stream = stream
+
+    def visit_board(self, board):
+        # La primera llamada es con la posición inicial; la última, con la final.
+        if self.stream.start_fen is None:
+            self.stream.start_fen = board.fen()
+
+    def begin_variation(self):
+        # Ignoramos las variantes: solo interesa la línea principal.
+        return chess.pgn.SKIP
+
+    def visit_move(self, board, move):
+        self.stream.moves.put(move)
+
+    def handle_error(self, error):
+        # El lector sigue con el resto de la partida.
+        self.stream._report(f'error en el PGN: {error}')
+
+    def result(self):
+        return None
+
+
+
+class GameStream:
+    """
+    Lee las jugadas de una partida en un hilo aparte y las deja en una cola.
+    La fuente puede ser un archivo PGN o un socket local que envía una jugada
+    (UCI o SAN) por línea.
+
+    start_fen es la posición inicial de la partida; se conoce (deja de ser
+    None) antes de que llegue la primera jugada. Los errores de lectura se
+    muestran por la salida de errores y se dejan en la cola errors: una jugada
+    no válida del socket se descarta y la lectura continúa.
+    """
+
+    def __init__(self):
+        self.moves = queue.Queue()
+        self.errors = queue.Queue()
+        self.start_fen = None
+        self.finished = threading.Event()
+        self.thread = None
+
+
+    @classmethod
+    def from_pgn(cls, path:str):
+        """
+        Reproduce la primera partida de un archivo PGN.
+        """
+        stream = cls()
+        stream._start(stream._read_pgn, path)
+        return stream
+
+
+    @classmethod
+    def from_socket(cls, host:str, port:int):
+        """
+        Sigue una partida enviada por un socket local.
+        """
+        stream = cls()
+        stream._start(stream._read_socket, host, port)
+        return stream
+
+
+    def _start(self, target, *args):
+        self.thread = threading.Thread(target=self._run, args=(target, *args), daemon=True)
+        self.thread.start()
+
+
+    def _run(self, target, *args):
+        try:
+            target(*args)
+        except Exception as error:
+            self._report(f'la lectura de la partida ha terminado: {type(error).__name__}: {error}')
+        finally:
+            self.finished.set()
+
+
+    def _report(self, message:str):
+        print(message, file=sys.stderr)
+        self.errors.put(message)
+
+
+    def _read_pgn(self, path:str):
+        with open(path, encoding='utf-8-sig') as handle:
+            chess.pgn.read_game(handle, Visitor=lambda: _MoveVisitor(self))
+        if self.start_fen is None:
+            self._report(f'no hay ninguna partida en {path}')
+
+
+    def _read_socket(self, host:str, port:int):
+        # Necesitamos un tablero propio para interpretar las jugadas en SAN.
+        board = chess.Board()
+        self.start_fen = board.fen()
+
+        with socket.create_connection((host, port)) as connection:
+            for line in connection.makefile('r', encoding='utf-8'):
+                text = line.strip()
+                if not text:
+                    continue
+                try:
+                    move = chess.Move.from_uci(text)
+                    if not board.is_legal(move):
+                        raise ValueError(text)
+                except ValueError:
+                    try:
+                        move = board.parse_san(text)
+                    except ValueError as error:
+                        self._report(f'jugada no válida ({text!r}): {error}')
+                        continue
+                board.push(move)
+                self.moves.put(move)
+
+
+    def drain(self, limit:int=None):
+        """
+        Devuelve las jugadas recibidas hasta el momento (como mucho `limit`).
+        """
+        moves = []
+        while limit is None or len(moves) < limit:
+            try:
+                moves.append(self.moves.get_nowait())
+            except queue.Empty:
+                break
+        return moves
+
+
+
+class ReplayController:
+    """
+    Reproduce en el tablero gráfico las jugadas de un GameStream sin bloquear
+    el bucle de Tk: las jugadas se aplican por lotes desde `window.after` y el
+    tablero se redibuja como mucho MAX_FPS veces por segundo.
+    """
+
+    def __init__(self, gui, stream:GameStream, speed:float=DEFAULT_SPEED,
+                 checkpoint_interval:int=CHECKPOINT_INTERVAL):
+        self.gui = gui
+        self.stream = stream
+        self.speed = speed
+        self.checkpoint_interval = checkpoint_interval
+        self.paused = False
+
+        # Todas las jugadas recibidas y las posiciones guardadas cada
+        # checkpoint_interval jugadas. La última posición recibida se mantiene
+        # en un tablero aparte para calcular los puntos de control.
+        # Hasta que el stream conoce la posición inicial (ver _start_position)
+        # no hay puntos de control y el tablero se muestra vacío.
+        self.moves = []
+        self.checkpoints = {}
+        self.tail = None
+
+        # Jugada que se muestra en el tablero gráfico.
+        self.ply = 0
+        self.gui._set_position(chess.Board(None))
+
+        self.pending = 0.0
+        self.dirty = False
+        self.last_tick = time.perf_counter()
+        self.last_draw = 0.0
+        self.gui.window.after(TICK_MS, self._tick)
+
+
+    def _receive(self):
+        """
+        Añade las jugadas nuevas del stream y sus puntos de control, y muestra
+        en el título de la ventana el último error de lectura.
+        """
+        while not self.stream.errors.empty():
+            self.gui.window.title(f'{self.gui.TITLE} - {self.stream.errors.get_nowait()}')
+
+        if self.tail is None:
+            if self.stream.start_fen is None:
+                return
+            self._start_position(self.stream.start_fen)
+
+        for move in self.stream.drain():
+            self.tail.push(move)
+            self.moves.append(move)
+            if len(self.moves) % self.checkpoint_interval == 0:
+                self.checkpoints[len(self.moves)] = self.tail.fen()
+
+
+    def _start_position(self, fen:str):
+        """
+        Toma la posición inicial de la partida como primer punto de control.
+        """
+        self.checkpoints[0] = fen
+        self.tail = chess.Board(fen)
+        self.gui._set_position(chess.Board(fen))
+
+
+    def _tick(self):
+        """
+        Recibe jugadas, avanza la reproducción según la velocidad y redibuja
+        si hace falta. Se vuelve a programar a sí mismo.
+        """
+        now = time.perf_counter()
+        elapsed, self.last_tick = now - self.last_tick, now
+
+        self._receive()
+
+        if not self.paused:
+            self.pending += elapsed * self.speed
+            steps = min(int(self.pending), len(self.moves) - self.ply)
+            if steps > 0:
+                self.pending -= steps
+                for move in self.moves[self.ply:self.ply + steps]:
+                    self.gui.board.push(move)
+                self.ply += steps
+                self.dirty = True
+            elif self.ply == len(self.moves):
+                # No acumulamos tiempo mientras se esperan jugadas nuevas.
+                self.pending = 0.0
+
+        if self.dirty and now - self.last_draw >= 1 / MAX_FPS:
+            self.gui._set_position(self.gui.board)
+            self.dirty = False
+            self.last_draw = now
+
+        self.gui.window.after(TICK_MS, self._tick)
+
+
+    def seek(self, ply:int):
+        """
+        Salta a la jugada indicada partiendo del punto de control anterior.
+        """
+        self._receive()
+        if self.tail is None:
+            return
+        ply = max(0, min(ply, len(self.moves)))
+
+        start = ply - ply % self.checkpoint_interval
+        board = chess.Board(self.checkpoints[start])
+        for move in self.moves[start:ply]:
+            board.push(move)
+
+        self.gui.board = board
+        self.ply = ply
+        self.pending = 0.0
+        self.dirty = True
+
+
+    def set_speed(self, speed:float):
+        """
+        Cambia la velocidad de reproducción (jugadas por segundo).
+        """
+        self.speed = max(speed, 0.0)
+
+
+    def toggle_pause(self):
+        """
+        Pausa o reanuda la reproducción.
+        """
+        self.paused = not self.paused
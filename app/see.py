@@ -0,0 +1,153 @@
+import argparse
+import sys
+import chess
+from utils import PIECE_VALUES
+
+# Valor (sin signo) de cada tipo de pieza según utils.
+SEE_VALUES = [0] + [PIECE_VALUES[chess.piece_symbol(piece_type)] for piece_type in chess.PIECE_TYPES]
+
+
+def attackers(board:chess.Board, square:int, occupied:int):
+    """
+    Devuelve la máscara de las piezas de ambos colores que atacan la casilla
+    suponiendo que solo están ocupadas las casillas de `occupied`. Al quitar de
+    `occupied` las piezas que ya han capturado aparecen las que estaban detrás
+    (rayos X).
+    """
+    rank_pieces = chess.BB_RANK_MASKS[square] & occupied
+    file_pieces = chess.BB_FILE_MASKS[square] & occupied
+    diag_pieces = chess.BB_DIAG_MASKS[square] & occupied
+
+    queens_and_rooks = board.queens | board.rooks
+    queens_and_bishops = board.queens | board.bishops
+
+    return occupied & (
+        (chess.BB_KING_ATTACKS[square] & board.kings)
+        | (chess.BB_KNIGHT_ATTACKS[square] & board.knights)
+        | (chess.BB_RANK_ATTACKS[square][rank_pieces] & queens_and_rooks)
+        | (chess.BB_FILE_ATTACKS[square][file_pieces] & queens_and_rooks)
+        | (chess.BB_DIAG_ATTACKS[square][diag_pieces] & queens_and_bishops)
+        | (chess.BB_PAWN_ATTACKS[chess.BLACK][square] & board.pawns & board.occupied_co[chess.WHITE])
+        | (chess.BB_PAWN_ATTACKS[chess.WHITE][square] & board.pawns & board.occupied_co[chess.BLACK]))
+
+
+def see(board:chess.Board, move:chess.Move):
+    """
+    Evaluación estática de intercambios: material neto que gana el bando que
+    juega `move` si después ambos bandos siguen capturando en la casilla de
+    destino, siempre con la pieza de menos valor y pudiendo parar cuando les
+    conviene. No tiene en cuenta las clavadas ni los jaques.
+    """
+    return exchange(board, move.from_square, move.to_square, move.promotion, board.is_en_passant(move))
+
+
+def exchange(board, from_square:int, to_square:int, promotion:int=None, en_passant:bool=False):
+    """
+    Igual que see, con la jugada dada por sus casillas. `board` puede ser un
+    chess.Board o una Position (ver position.py): solo se usan las máscaras
+    de las piezas, piece_type_at, pieces_mask y el turno.
+    """
+    square = to_square
+    occupied = board.occupied ^ chess.BB_SQUARES[from_square]
+    color = board.turn
+
+    if en_passant:
+        captured = chess.PAWN
+        occupied ^= chess.BB_SQUARES[square - 8 if color == chess.WHITE else square + 8]
+    else:
+        captured = board.piece_type_at(square) or 0
+
+    # Valor de la pieza que queda en la casilla, expuesta a la siguiente captura.
+    piece = promotion or board.piece_type_at(from_square)
+    gain = [SEE_VALUES[captured]]
+    if promotion:
+        gain[0] += SEE_VALUES[promotion] - SEE_VALUES[chess.PAWN]
+
+    remaining = attackers(board, square, occupied)
+    color = not color
+
+    while True:
+        own = remaining & board.occupied_co[color]
+        if not own:
+            break
+
+        # El atacante de menos valor.
+        for piece_type in chess.PIECE_TYPES:
+            candidates = own & board.pieces_mask(piece_type, color)
+            if candidates:
+                break
+
+        # El rey no puede capturar si la casilla sigue defendida.
+        if piece_type == chess.KING and remaining & board.occupied_co[not color] & occupied:
+            break
+
+        gain.append(SEE_VALUES[piece] - gain[-1])
+        occupied ^= candidates & -candidates
+        remaining = attackers(board, square, occupied)
+        piece = piece_type
+        color = not color
+
+    # Cada bando elige entre capturar y no hacerlo, desde el final hacia atrás.
+    for index in range(len(gain) - 1, 0, -1):
+        gain[index - 1] = -max(-gain[index - 1], gain[index])
+
+    return gain[0]
+
+
+# Posiciones de referencia: jugada y resultado esperado con los valores de utils
+# (peón 10, caballo y alfil 30, torre 50, dama 90).
+SEE_POSITIONS = [
+        # Peón sin defender.
+        ("1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1", "e1e5", 10),
+        # Caballo por peón: el peón está defendido y la torre y la dama
+        # blancas (en rayos X) no llegan a compensarlo.
+        ("1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1", "d3e5", -20),
+        # Dama por peón defendido por otro peón.
+        ("4k3/8/3p4/4p3/8/8/4Q3/4K3 w - - 0 1", "e2e5", -80),
+        # Torre por caballo defendido, con la segunda torre en rayos X detrás.
+        ("4k3/4r3/8/4n3/8/8/4R3/4RK2 w - - 0 1", "e2e5", 30),
+        # Captura al paso sin defensa.
+        ("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "e5d6", 10),
+        # Coronación con captura de la torre; el rey recupera la dama.
+        ("3rk3/2P5/8/8/8/8/8/4K3 w - - 0 1", "c7d8q", 40),
+        # Coronación con captura de una torre sin defensa.
+        ("2r1k3/3P4/8/8/8/8/8/4K3 w - - 0 1", "d7c8q", 130),
+        # Coronación sin captura en una casilla defendida: se pierde el peón.
+        ("1r2k3/P7/8/8/8/8/8/4K3 w - - 0 1", "a7a8q", -10),
+        # El rey captura una pieza sin defensa.
+        ("4k3/8/8/8/8/4b3/3K4/8 w - - 0 1", "d2e3", 30),
+        # El rey no puede recuperar: la dama defiende la casilla en rayos X.
+        ("4k3/4p3/8/8/8/8/4R3/4QK2 w - - 0 1", "e2e7", 10),
+        # Sin la dama, el rey sí recupera la torre.
+        ("4k3/4p3/8/8/8/8/4R3/5K2 w - - 0 1", "e2e7", -40),
+        # Alfil por peón defendido por otro peón; la dama recupera un peón.
+        ("4k3/8/2b3p1/5p2/8/3B4/2Q5/4K3 w - - 0 1", "d3f5", -10),
+    ]
+
+
+def check(positions=SEE_POSITIONS):
+    """
+    Compara see con los resultados esperados. Devuelve True si todos coinciden.
+    """
+    correct = True
+
+    for fen, uci, expected in positions:
+        board = chess.Board(fen)
+        value = see(board, chess.Move.from_uci(uci))
+        status = 'ok' if value == expected else f'ERROR (esperado {expected})'
+        correct = correct and value == expected
+        print(f'{fen:<60} {uci:<6} {value:>5}  {status}')
+
+    return correct
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluación estática de intercambios (SEE).')
+    parser.add_argument('--fen', help='posición; sin ella se comprueban las posiciones de referencia')
+    parser.add_argument('--move', help='jugada en UCI')
+    args = parser.parse_args()
+
+    if args.fen and args.move:
+        print(see(chess.Board(args.fen), chess.Move.from_uci(args.move)))
+    else:
+        sys.exit(0 if check() else 1)
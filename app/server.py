@@ -0,0 +1,474 @@
+import argparse
+import asyncio
+import collections
+import json
+import math
+import multiprocessing
+import sys
+import time
+import chess
+import AI
+from timeman import TimeManager, think
+from transposition import DEFAULT_ENTRIES, TranspositionTable
+
+HOST = '127.0.0.1'
+PORT = 8765
+
+# Número máximo de resultados que guarda la caché del servidor.
+CACHE_SIZE = 10000
+
+# Límites de las peticiones: profundidad, líneas de multiPV y tiempo (segundos).
+MAX_DEPTH = 64
+MAX_MULTIPV = 16
+MAX_MOVETIME = 3600
+
+# Tiempo máximo (segundos) de las peticiones que no indican "movetime", para
+# que una petición de mucha profundidad no ocupe un proceso indefinidamente.
+MAX_SEARCH_TIME = 60.0
+
+
+def _engine_worker(connection, entries:int):
+    """
+    Proceso del motor. Conserva su propia tabla de transposiciones entre
+    peticiones, de modo que las posiciones parecidas se analizan más rápido.
+    Cada petición es un diccionario con "fen", "depth" y "movetime" (segundos).
+    Con "multipv" se devuelven además las mejores líneas en "Lines" (ver AI.multiPV).
+    Si una petición falla, se responde {"Error": mensaje} y el proceso sigue
+    atendiendo las siguientes.
+    """
+    tt = TranspositionTable(entries)
+
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+
+        try:
+            result = _analyse_request(request, tt)
+        except Exception as error:
+            result = {"Error": f'{type(error).__name__}: {error}'}
+        connection.send(result)
+
+    connection.close()
+
+
+def _analyse_request(request:dict, tt:TranspositionTable):
+    """
+    Analiza una petición en el proceso del motor (ver _engine_worker). Todas
+    las búsquedas se detienen como mucho a los "movetime" segundos o, si la
+    petición no lo indica, a los MAX_SEARCH_TIME; el resultado es el de la
+    última profundidad completa, que se indica en "Depth".
+    """
+    board = chess.Board(request["fen"])
+    depth = request.get("depth")
+    movetime = request.get("movetime")
+
+    if movetime and request.get("multipv", 1) == 1:
+        manager = TimeManager.fixed(movetime)
+        return think(board, manager, max_depth=depth or MAX_DEPTH, tt=tt)
+
+    # Sin movetime se busca hasta la profundidad pedida (1 si no se indica).
+    depth = depth or (MAX_DEPTH if movetime else 1)
+    context = AI.SearchContext(deadline=time.monotonic() + (movetime or MAX_SEARCH_TIME), tt=tt)
+
+    if request.get("multipv", 1) > 1:
+        lines = AI.multiPV(board, depth, request["multipv"], context)
+        result = dict(lines[0], Lines=lines) if lines else {"Value": None, "Movement": None, "Lines": lines, "Depth": 0}
+    else:
+        result = {"Value": None, "Movement": None, "Depth": 0}
+        for current in range(1, depth + 1):
+            try:
+                current_result = AI.searchRoot(board, current, context, result["Movement"])
+            except AI.SearchTimeout:
+                break
+            if not current_result:
+                break
+            result = dict(current_result, Depth=current)
+
+    result["Nodes"] = context.nodes
+    return result
+
+
+def validate_request(request:dict):
+    """
+    Comprueba los tipos y los límites de una petición de análisis antes de
+    enviarla a un proceso del motor. Lanza ValueError si no es válida.
+    """
+    if not isinstance(request.get("fen"), str):
+        raise ValueError('"fen" debe ser una cadena')
+
+    limits = (("depth", int, 1, MAX_DEPTH), ("multipv", int, 1, MAX_MULTIPV), ("movetime", (int, float), 0, MAX_MOVETIME))
+    for name, types, low, high in limits:
+        value = request.get(name)
+        if value is None:
+            continue
+        # bool es subclase de int, pero no es un valor válido.
+        if isinstance(value, bool) or not isinstance(value, types):
+            raise ValueError(f'"{name}" debe ser un número')
+        if name == "movetime" and not (0 < value <= high):
+            raise ValueError(f'"{name}" debe ser mayor que 0 y como mucho {high}')
+        if not (low <= value <= high):
+            raise ValueError(f'"{name}" debe estar entre {low} y {high}')
+
+
+def percentile(values, fraction:float):
+    """
+    Devuelve el percentil indicado (entre 0 y 1) de una lista de valores.
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, math.ceil(fraction * len(values)) - 1)]
+
+
+
+class AnalysisServer:
+    """
+    Servicio de análisis sobre un socket local. Cada línea recibida es una
+    petición JSON ({"fen": ..., "depth": ..., "movetime": ..., "multipv": ...}) y cada línea
+    enviada es su respuesta. La petición {"command": "stats"} devuelve las
+    estadísticas de latencia del servidor.
+
+    Las peticiones esperan en una cola hasta que alguno de los procesos del
+    motor queda libre; los procesos se crean al iniciar el servidor y se
+    mantienen activos. Las posiciones ya analizadas se responden desde la caché.
+    """
+
+    def __init__(self, workers:int=None, entries:int=DEFAULT_ENTRIES, cache_size:int=CACHE_SIZE):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.entries = entries
+        self.cache_size = cache_size
+        self.cache = collections.OrderedDict()
+        self.latencies = []
+        self.cache_hits = 0
+        self.started = None
+
+
+    async def start(self, host:str=HOST, port:int=PORT):
+        """
+        Inicia los procesos del motor y el servidor.
+        """
+        self.queue = asyncio.Queue()
+        self.connections = []
+        self.processes = []
+        self.dispatchers = []
+
+        for index in range(self.workers):
+            self.connections.append(None)
+            self.processes.append(None)
+            self._spawn(index)
+            self.dispatchers.append(asyncio.create_task(self._dispatch(index)))
+
+        self.server = await asyncio.start_server(self._handle_client, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.started = time.perf_counter()
+
+
+    async def stop(self):
+        """
+        Detiene el servidor y los procesos del motor.
+        """
+        self.server.close()
+        await self.server.wait_closed()
+
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+
+        for connection, process in zip(self.connections, self.processes):
+            # El proceso puede haber terminado ya.
+            try:
+                connection.send(None)
+            except (BrokenPipeError, EOFError, OSError):
+                pass
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+
+    def _spawn(self, index:int):
+        """
+        Crea el proceso del motor `index` (o lo sustituye si ya existía).
+        """
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_engine_worker, args=(child, self.entries), daemon=True)
+        process.start()
+        # Cerramos aquí el extremo del proceso del motor para que recv lance
+        # EOFError si este termina.
+        child.close()
+
+        if self.processes[index] is not None:
+            self.connections[index].close()
+            self.processes[index].join(timeout=1)
+        self.connections[index] = parent
+        self.processes[index] = process
+
+
+    async def _dispatch(self, index:int):
+        """
+        Atiende las peticiones de la cola con el proceso del motor `index`. Si
+        el proceso ha terminado, la petición falla y se crea otro proceso.
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            request, future = await self.queue.get()
+            try:
+                validate_request(request)
+                connection = self.connections[index]
+                try:
+                    connection.send(request)
+                    result = await loop.run_in_executor(None, connection.recv)
+                except (EOFError, OSError) as error:
+                    self._spawn(index)
+                    raise RuntimeError('el proceso del motor ha terminado') from error
+                if "Error" in result:
+                    raise ValueError(result["Error"])
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+
+    def _cache_key(self, request:dict):
+        """
+        La caché se indexa por la posición (sin los contadores de jugadas) y los límites.
+        """
+        board = chess.Board(request["fen"])
+        return (board.epd(), request.get("depth"), request.get("movetime"), request.get("multipv", 1))
+
+
+    async def analyse(self, request:dict):
+        """
+        Analiza una posición y devuelve el resultado, usando la caché si es posible.
+        """
+        validate_request(request)
+        key = self._cache_key(request)
+
+        if key in self.cache:
+            self.cache_hits += 1
+            self.cache.move_to_end(key)
+            return dict(self.cache[key], Cached=True)
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((request, future))
+        result = await future
+
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return dict(result, Cached=False)
+
+
+    def stats(self):
+        """
+        Devuelve las latencias p50/p99 (en segundos) y el rendimiento del servidor.
+        """
+        elapsed = time.perf_counter() - self.started
+        return {
+            "Requests": len(self.latencies),
+            "CacheHits": self.cache_hits,
+            "P50": percentile(self.latencies, 0.50),
+            "P99": percentile(self.latencies, 0.99),
+            "Throughput": len(self.latencies) / elapsed if elapsed else 0.0,
+        }
+
+
+    async def _handle_client(self, reader, writer):
+        """
+        Atiende las líneas JSON de un cliente. Las peticiones de un mismo
+        cliente se procesan en paralelo y cada respuesta lleva el "id" de su petición.
+        """
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(request):
+            start = time.perf_counter()
+            try:
+                # Un JSON válido puede no ser un objeto (por ejemplo, 42 o [1]).
+                if not isinstance(request, dict):
+                    raise ValueError('la petición debe ser un objeto JSON')
+                if request.get("command") == "stats":
+                    response = self.stats()
+                else:
+                    response = await self.analyse(request)
+                    self.latencies.append(time.perf_counter() - start)
+            except Exception as error:
+                response = {"Error": str(error)}
+
+            response["id"] = request.get("id") if isinstance(request, dict) else None
+            async with lock:
+                writer.write((json.dumps(response) + '\n').encode())
+                await writer.drain()
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+            except ValueError:
+                request = {"command": "invalid"}
+
+            task = asyncio.create_task(respond(request))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        writer.close()
+
+
+async def load_test(host:str, port:int, fens, depth:int=2, clients:int=4, repeat:int=2):
+    """
+    Cliente de prueba local: abre varias conexiones y envía las posiciones
+    dadas `repeat` veces cada una (las repeticiones salen de la caché).
+    Devuelve las latencias p50/p99 y el rendimiento medidos por el cliente.
+    """
+    latencies = []
+    requests = [fen for _ in range(repeat) for fen in fens]
+
+    async def client(chunk):
+        reader, writer = await asyncio.open_connection(host, port)
+        for fen in chunk:
+            start = time.perf_counter()
+            writer.write((json.dumps({"fen": fen, "depth": depth}) + '\n').encode())
+            await writer.drain()
+            await reader.readline()
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+        await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(requests[i::clients]) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "Requests": len(latencies),
+        "P50": percentile(latencies, 0.50),
+        "P99": percentile(latencies, 0.99),
+        "Throughput": len(latencies) / elapsed,
+    }
+
+
+# Peticiones de comprobación y qué se espera de su respuesta: una jugada,
+# ninguna jugada (la partida ha terminado) o un error.
+CHECK_REQUESTS = [
+        ("profundidad 2", {"fen": chess.STARTING_FEN, "depth": 2}, "move"),
+        ("multipv 2", {"fen": chess.STARTING_FEN, "depth": 1, "multipv": 2}, "move"),
+        ("multipv con movetime", {"fen": chess.STARTING_FEN, "multipv": 2, "movetime": 0.5}, "move"),
+        ("mate con movetime", {"fen": "3R2k1/5ppp/8/8/8/8/5PPP/6K1 b - - 0 1", "movetime": 0.5}, "none"),
+        ("ahogado con movetime", {"fen": "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", "movetime": 0.5}, "none"),
+        ("profundidad negativa", {"fen": chess.STARTING_FEN, "depth": -1}, "error"),
+        ("profundidad en texto", {"fen": chess.STARTING_FEN, "depth": "3"}, "error"),
+        ("multipv 0", {"fen": chess.STARTING_FEN, "depth": 1, "multipv": 0}, "error"),
+        ("movetime negativo", {"fen": chess.STARTING_FEN, "movetime": -1}, "error"),
+        ("FEN inválido", {"fen": "no es un FEN", "depth": 1}, "error"),
+        ("sin FEN", {"depth": 1}, "error"),
+        ("tras los errores", {"fen": "r1bqkbnr/pppppppp/2n5/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 1 2", "depth": 2}, "move"),
+    ]
+
+
+async def check(host:str=HOST):
+    """
+    Comprueba el servidor con un cliente local: las respuestas a
+    CHECK_REQUESTS, que los errores no detienen el proceso del motor y que,
+    si este termina, se sustituye por otro. Devuelve True si todo es correcto.
+    """
+    server = AnalysisServer(workers=1)
+    await server.start(host, 0)
+    reader, writer = await asyncio.open_connection(host, server.port)
+    correct = True
+
+    async def request(body):
+        writer.write((json.dumps(body) + '\n').encode())
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    def report(name:str, ok:bool, response:dict):
+        nonlocal correct
+        correct = correct and ok
+        print(f'{name:<25} {"ok" if ok else "ERROR"}  {response}')
+
+    try:
+        for index, (name, body, expected) in enumerate(CHECK_REQUESTS):
+            response = await request(dict(body, id=index))
+            if expected == "error":
+                ok = "Error" in response
+            elif expected == "none":
+                ok = "Error" not in response and response.get("Movement") is None
+            else:
+                ok = ("Error" not in response
+                      and chess.Move.from_uci(response["Movement"]) in chess.Board(body["fen"]).legal_moves)
+                if body.get("multipv"):
+                    ok = ok and len(response["Lines"]) == body["multipv"]
+            report(name, ok and response["id"] == index, response)
+
+        # Un JSON válido que no es un objeto recibe un error y no cierra la conexión.
+        for body in (42, [1]):
+            response = await request(body)
+            report(f'petición {json.dumps(body)}', "Error" in response and response["id"] is None, response)
+
+        # Una petición que falla dentro del proceso del motor (aquí, una que no
+        # ha pasado por validate_request) no lo detiene.
+        connection = server.connections[0]
+        connection.send({"fen": chess.STARTING_FEN, "depth": "3"})
+        response = connection.recv()
+        report("error en el motor", "Error" in response, response)
+        response = await request(dict(CHECK_REQUESTS[0][1], depth=1))
+        report("tras el error en el motor", "Movement" in response, response)
+
+        # Si el proceso del motor muere, la petición que lo encuentra falla y
+        # la siguiente la atiende un proceso nuevo.
+        server.processes[0].kill()
+        server.processes[0].join()
+        body = {"fen": "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2", "depth": 1}
+        response = await request(body)
+        report("proceso terminado", "Error" in response, response)
+        response = await request(body)
+        report("proceso sustituido", "Movement" in response and server.processes[0].is_alive(), response)
+
+        server.processes[0].kill()
+        server.processes[0].join()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+        # stop no debe fallar aunque el proceso del motor haya terminado.
+        await server.stop()
+
+    return correct
+
+
+async def main(args):
+    server = AnalysisServer(args.workers)
+    await server.start(args.host, args.port)
+    print(f'Servidor de análisis en {args.host}:{server.port} con {server.workers} procesos.')
+
+    try:
+        if args.report:
+            from benchmark import BENCHMARK_POSITIONS
+            report = await load_test(args.host, server.port, BENCHMARK_POSITIONS, args.depth, args.clients)
+            print(f'{report["Requests"]} peticiones, p50 {report["P50"] * 1000:.1f} ms, '
+                  f'p99 {report["P99"] * 1000:.1f} ms, {report["Throughput"]:.1f} peticiones/s')
+        else:
+            await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servidor local de análisis.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--report', action='store_true', help='mide la latencia con un cliente local y termina')
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--check', action='store_true', help='comprueba las respuestas del servidor y termina')
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if asyncio.run(check(args.host)) else 1)
+    asyncio.run(main(args))
@@ -0,0 +1,121 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import time
+import chess
+import AI
+from transposition import DEFAULT_ENTRIES, SharedTranspositionTable
+
+# Cada cuántos segundos se comprueba, mientras se esperan los resultados, si
+# los procesos siguen vivos.
+POLL_INTERVAL = 0.1
+
+
+def _worker(fen:str, depth:int, entries:int, name:str, index:int, results):
+    """
+    Proceso de búsqueda. Todos los procesos buscan la misma posición con
+    profundización iterativa y comparten la tabla de transposiciones; los
+    ayudantes impares van un nivel más profundo que el principal, de modo que
+    sus resultados le llegan al principal a través de la tabla.
+    """
+    tt = SharedTranspositionTable(entries, name)
+    board = chess.Board(fen)
+    context = AI.SearchContext(tt=tt)
+    target = depth + index % 2
+    result = None
+
+    for current in range(1, target + 1):
+        result = AI.searchRoot(board, current, context, result and result["Movement"])
+
+    results.put((index, result, context.nodes))
+    tt.close()
+
+
+def lazy_smp(board:chess.Board, depth:int, workers:int=None, entries:int=DEFAULT_ENTRIES):
+    """
+    Busca la posición con `workers` procesos (Lazy SMP) y devuelve el resultado
+    del proceso principal, que es el que busca exactamente a la profundidad
+    pedida. Los ayudantes se detienen en cuanto el principal termina.
+
+    Si el proceso principal muere sin dar un resultado, se devuelve el del
+    ayudante más profundo que haya terminado (con su profundidad en "Depth"),
+    esperando al primero si aún no ha terminado ninguno. Si mueren todos sin
+    resultado, lanza RuntimeError.
+    """
+    workers = workers or os.cpu_count()
+    tt = SharedTranspositionTable(entries)
+    results = multiprocessing.Queue()
+    received = {}
+
+    processes = [
+        multiprocessing.Process(
+            target=_worker, args=(board.fen(), depth, entries, tt.name, index, results), daemon=True)
+        for index in range(workers)
+    ]
+
+    try:
+        for process in processes:
+            process.start()
+
+        while 0 not in received:
+            # El estado se mira antes de esperar: si un proceso ya había
+            # terminado y la cola sigue vacía, su resultado no va a llegar.
+            main_done = processes[0].exitcode is not None
+            all_done = all(process.exitcode is not None for process in processes)
+            try:
+                index, result, nodes = results.get(timeout=POLL_INTERVAL)
+                received[index] = (result, nodes)
+            except queue.Empty:
+                if main_done and (received or all_done):
+                    break
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        tt.close()
+
+    if not received:
+        raise RuntimeError('los procesos de búsqueda han terminado sin dar un resultado')
+
+    # Los ayudantes impares buscan un nivel más que el principal.
+    index = 0 if 0 in received else max(received, key=lambda index: index % 2)
+    result, nodes = received[index]
+    result["Depth"] = depth + index % 2
+    result["Nodes"] = nodes
+    return result
+
+
+def time_to_depth(depth:int, worker_counts, positions=None):
+    """
+    Mide el tiempo que tarda Lazy SMP en completar la profundidad dada en las
+    posiciones de referencia con cada número de procesos.
+    Devuelve un diccionario {procesos: segundos}.
+    """
+    if positions is None:
+        from benchmark import BENCHMARK_POSITIONS
+        positions = BENCHMARK_POSITIONS
+
+    times = {}
+    for workers in worker_counts:
+        start = time.perf_counter()
+        for fen in positions:
+            lazy_smp(chess.Board(fen), depth, workers)
+        times[workers] = time.perf_counter() - start
+
+    return times
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mide la escalabilidad de Lazy SMP.')
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    times = time_to_depth(args.depth, args.workers)
+    base = times[args.workers[0]]
+
+    print(f'{"Procesos":>10}{"Tiempo (s)":>12}{"Aceleración":>13}')
+    for workers, elapsed in times.items():
+        print(f'{workers:>10}{elapsed:>12.2f}{base / elapsed:>13.2f}')
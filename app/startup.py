@@ -0,0 +1,121 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Directorio de los módulos de la aplicación y raíz del proyecto, desde la que
+# se lanza la interfaz (las rutas de las imágenes son relativas a ella).
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(APP_DIR)
+
+# Módulos cuyo tiempo de importación se mide: el motor sin interfaz y la interfaz.
+IMPORT_TARGETS = ['AI', 'board']
+
+# Programa que abre la interfaz y anota cuándo se muestra el tablero vacío y
+# cuándo están ubicadas las fichas. Recibe la hora de inicio del proceso padre.
+FIRST_PAINT_SCRIPT = '''
+import sys, time
+start = float(sys.argv[1])
+import board
+app = board.Board()
+painted = time.time() - start
+
+def report():
+    app.window.update_idletasks()
+    print(painted, time.time() - start)
+    app.store.close()
+    app.window.destroy()
+
+app.window.after(0, report)
+app.window.mainloop()
+'''
+
+
+def _run(args):
+    """
+    Ejecuta un intérprete con los módulos de la aplicación en la ruta.
+    """
+    env = dict(os.environ, PYTHONPATH=APP_DIR)
+    return subprocess.run([sys.executable, *args], cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+
+
+def import_times(module:str):
+    """
+    Importa el módulo en un proceso nuevo con -X importtime y devuelve una
+    lista de tuplas (propio, acumulado, nivel, nombre) con los tiempos en
+    microsegundos. Los módulos de la biblioteca estándar que ya carga el
+    intérprete al arrancar no aparecen.
+    """
+    result = _run(['-X', 'importtime', '-c', f'import {module}'])
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        times.append((int(own), int(cumulative), level, name.strip()))
+
+    return times
+
+
+def first_paint(runs:int=5):
+    """
+    Lanza la interfaz `runs` veces y devuelve la mediana del tiempo (en
+    segundos, desde que se crea el proceso) hasta mostrar el tablero vacío y
+    hasta tener las fichas ubicadas. Devuelve None si no hay pantalla.
+    """
+    painted, loaded = [], []
+
+    for _ in range(runs):
+        result = _run(['-c', FIRST_PAINT_SCRIPT, repr(time.time())])
+        if result.returncode != 0:
+            return None
+        board_time, pieces_time = map(float, result.stdout.split())
+        painted.append(board_time)
+        loaded.append(pieces_time)
+
+    return statistics.median(painted), statistics.median(loaded)
+
+
+def report(top:int=10, runs:int=5):
+    """
+    Imprime el tiempo de importación de cada módulo, los `top` módulos más
+    costosos de cada uno y el tiempo hasta el primer dibujado de la interfaz.
+    """
+    for module in IMPORT_TARGETS:
+        try:
+            times = import_times(module)
+        except RuntimeError as error:
+            print(f'{module}: no se pudo importar ({error})\n')
+            continue
+
+        total = next(cumulative for own, cumulative, level, name in reversed(times) if name == module)
+        gui = [name for own, cumulative, level, name in times if name.split('.')[0] in ('tkinter', 'PIL')]
+        print(f'import {module}: {total / 1000:.1f} ms, {len(times)} módulos'
+              f'{", con tkinter" if gui else ", sin tkinter"}')
+
+        print(f'  {"Propio (ms)":>12}{"Acumulado (ms)":>16}  Módulo')
+        for own, cumulative, level, name in sorted(times, key=lambda item: -item[0])[:top]:
+            print(f'  {own / 1000:>12.1f}{cumulative / 1000:>16.1f}  {name}')
+        print()
+
+    paint = first_paint(runs)
+    if paint is None:
+        print('Primer dibujado: no se pudo abrir la interfaz (¿sin pantalla?)')
+    else:
+        print(f'Primer dibujado (tablero vacío): {paint[0] * 1000:.0f} ms')
+        print(f'Fichas ubicadas:                 {paint[1] * 1000:.0f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mide el tiempo de arranque del motor y de la interfaz.')
+    parser.add_argument('--top', type=int, default=10, help='módulos más costosos que se muestran')
+    parser.add_argument('--runs', type=int, default=5, help='veces que se abre la interfaz')
+    args = parser.parse_args()
+
+    report(args.top, args.runs)
@@ -0,0 +1,112 @@
+import os
+import struct
+import chess
+
+# Cada jugada ocupa 2 bytes: casilla de origen (6 bits), casilla de destino
+# (6 bits) y tipo de pieza de la coronación (3 bits, 0 si no corona).
+MOVE_STRUCT = struct.Struct('<H')
+
+
+def pack_move(move:chess.Move):
+    """
+    Codifica una jugada en un entero de 16 bits.
+    """
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def unpack_move(value:int):
+    """
+    Decodifica una jugada codificada con pack_move.
+    """
+    from_square = value & 0x3f
+    to_square = (value >> 6) & 0x3f
+    promotion = (value >> 12) & 0x7
+
+    if from_square == to_square:
+        return chess.Move.null()
+
+    return chess.Move(from_square, to_square, promotion or None)
+
+
+
+class GameStore:
+    """
+    Guarda la partida en curso en un archivo binario al que solo se le añaden
+    jugadas. Así, cada jugada cuesta una escritura de 2 bytes y, si la
+    aplicación se cierra de forma inesperada, la partida se puede recuperar.
+    """
+
+    def __init__(self, path:str):
+        self.path = path
+        self.file = None
+
+
+    def load(self):
+        """
+        Reconstruye la última partida guardada en un chess.Board sin dibujar
+        nada. Si el archivo tiene una jugada incompleta o ilegal (por ejemplo,
+        por un cierre a mitad de escritura), se descarta desde ese punto.
+        """
+        board = chess.Board()
+
+        if not os.path.isfile(self.path):
+            return board
+
+        with open(self.path, 'rb') as file:
+            data = file.read()
+
+        valid = 0
+        for (value,) in MOVE_STRUCT.iter_unpack(data[:len(data) - len(data) % MOVE_STRUCT.size]):
+            move = unpack_move(value)
+            if not board.is_legal(move):
+                break
+            board.push(move)
+            valid += MOVE_STRUCT.size
+
+        # Eliminamos los bytes que no corresponden a jugadas válidas para que
+        # las siguientes jugadas se añadan a continuación de la última buena.
+        if valid != len(data):
+            with open(self.path, 'r+b') as file:
+                file.truncate(valid)
+
+        return board
+
+
+    def append(self, move:chess.Move):
+        """
+        Añade una jugada al final del archivo.
+        """
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self.file = open(self.path, 'ab')
+
+        self.file.write(MOVE_STRUCT.pack(pack_move(move)))
+        self.file.flush()
+
+
+    def truncate(self, count:int):
+        """
+        Deja en el archivo solo las `count` primeras jugadas (al deshacer jugadas).
+        """
+        if self.file is not None:
+            self.file.flush()
+        if os.path.isfile(self.path):
+            os.truncate(self.path, count * MOVE_STRUCT.size)
+
+
+    def clear(self):
+        """
+        Borra la partida guardada para empezar una nueva.
+        """
+        self.close()
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+
+
+    def close(self):
+        """
+        Cierra el archivo.
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
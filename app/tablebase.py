@@ -0,0 +1,106 @@
+import os
+import chess
+import chess.syzygy
+from utils import SYZYGY_PATH
+
+
+
+class Tablebase:
+    """
+    Acceso a las tablas de finales Syzygy guardadas en disco.
+
+    Solo se consultan las posiciones con `max_pieces` piezas o menos (reyes
+    incluidos) y sin derechos de enroque, que son las que cubren las tablas.
+    """
+
+    def __init__(self, directory:str=SYZYGY_PATH, max_pieces:int=6):
+        """
+        Abre las tablas del directorio indicado (por defecto, SYZYGY_PATH). Si
+        el directorio no existe,
+        el objeto queda vacío y nunca responde a las consultas.
+        """
+        self.max_pieces = max_pieces
+        self.tables = None
+
+        if os.path.isdir(directory):
+            self.tables = chess.syzygy.open_tablebase(directory)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def __bool__(self):
+        return self.tables is not None
+
+
+    def can_probe(self, board:chess.Board):
+        """
+        Verifica si la posición puede estar en las tablas.
+        """
+        return (self.tables is not None
+                and chess.popcount(board.occupied) <= self.max_pieces
+                and not board.castling_rights)
+
+
+    def probe_wdl(self, board:chess.Board):
+        """
+        Devuelve el resultado WDL desde el punto de vista del jugador que tiene
+        el turno (2 gana, 0 tablas, -2 pierde; 1 y -1 son victorias y derrotas
+        anuladas por la regla de los 50 movimientos). None si no está en las tablas.
+        """
+        return self.tables.get_wdl(board)
+
+
+    def probe_dtz(self, board:chess.Board):
+        """
+        Devuelve la distancia a la próxima jugada que reinicia el contador de
+        50 movimientos, o None si la posición no está en las tablas.
+        """
+        return self.tables.get_dtz(board)
+
+
+    def best_move(self, board:chess.Board):
+        """
+        Escoge la jugada de la raíz según las tablas: gana si es posible,
+        lo más rápido posible; si se pierde, resiste el mayor tiempo.
+        Devuelve (jugada, wdl) o None si alguna jugada no está en las tablas.
+        """
+        best = None
+        best_key = None
+
+        for move in board.legal_moves:
+            board.push(move)
+            if board.is_checkmate():
+                board.pop()
+                return (str(move), 2)
+
+            wdl = self.probe_wdl(board)
+            dtz = self.probe_dtz(board)
+            board.pop()
+
+            if wdl is None or dtz is None:
+                return None
+
+            # El resultado del rival es el nuestro con el signo cambiado.
+            wdl = -wdl
+            key = (wdl, -abs(dtz) if wdl > 0 else abs(dtz))
+
+            if best_key is None or key > best_key:
+                best = (str(move), wdl)
+                best_key = key
+
+        return best
+
+
+    def close(self):
+        """
+        Cierra los archivos de las tablas.
+        """
+        if self.tables is not None:
+            self.tables.close()
+            self.tables = None
@@ -0,0 +1,241 @@
+import time
+import chess
+import AI
+from transposition import TranspositionTable
+
+# Jugadas que se suponen restantes cuando el control de tiempo no las indica.
+DEFAULT_MOVES_TO_GO = 30
+
+# Tiempo (en segundos) que se reserva en cada jugada para la comunicación y
+# el resto de la aplicación, de modo que el reloj nunca llegue a cero.
+MOVE_OVERHEAD = 0.05
+
+# Factores con los que se amplía el tiempo de la jugada cuando la mejor jugada
+# cambia entre iteraciones o cuando la evaluación empeora.
+INSTABILITY_FACTOR = 1.5
+SCORE_DROP_FACTOR = 1.3
+
+# Caída de la evaluación (en unidades de PIECE_VALUES) que se considera preocupante.
+SCORE_DROP = 10
+
+# Ventaja sobre la segunda mejor jugada a partir de la cual la mejor jugada
+# se considera clara y se deja de buscar.
+DOMINANCE_MARGIN = 30
+DOMINANCE_DEPTH = 3
+
+# Fracción del tiempo disponible que se puede gastar, como máximo, en una
+# jugada: en general y en la última jugada antes del control de tiempo.
+MAXIMUM_SHARE = 0.5
+LAST_MOVE_SHARE = 0.75
+
+# Crecimiento estimado del tiempo de una iteración a la siguiente.
+BRANCHING_FACTOR = 4
+
+MAX_DEPTH = 64
+
+
+
+class TimeManager:
+    """
+    Reparte el tiempo del reloj entre las jugadas de la partida.
+
+    El tiempo óptimo de la jugada se calcula a partir del tiempo restante, el
+    incremento y las jugadas que faltan para el próximo control. El tiempo
+    máximo es un límite duro que la búsqueda nunca supera.
+    """
+
+    def __init__(self, remaining:float, increment:float=0.0, moves_to_go:int=None,
+                 overhead:float=MOVE_OVERHEAD, clock=time.monotonic):
+        self.clock = clock
+        self.start_time = None
+
+        moves_to_go = moves_to_go or DEFAULT_MOVES_TO_GO
+        available = max(remaining - overhead, 0.0)
+
+        self.optimum = min(available / moves_to_go + increment * 0.75, available)
+
+        # En la última jugada antes del control se puede gastar más, pero
+        # siempre dejando un margen por si la jugada tarda en llegar al reloj.
+        if moves_to_go == 1:
+            self.maximum = available * LAST_MOVE_SHARE
+        else:
+            self.maximum = min(self.optimum * 4, available * MAXIMUM_SHARE)
+
+        self.optimum = min(self.optimum, self.maximum)
+        self.factor = 1.0
+        self.last_iteration = 0.0
+
+
+    @classmethod
+    def fixed(cls, movetime:float, clock=time.monotonic):
+        """
+        Gestor para un tiempo fijo por jugada, sin reloj de partida: movetime
+        es a la vez el tiempo óptimo y el límite duro de la búsqueda.
+        """
+        manager = cls(movetime, overhead=0.0, clock=clock)
+        manager.optimum = manager.maximum = movetime
+        return manager
+
+
+    def start(self):
+        """
+        Empieza a contar el tiempo de la jugada.
+        """
+        self.start_time = self.clock()
+        self.iteration_start = self.start_time
+
+
+    def elapsed(self):
+        """
+        Devuelve el tiempo transcurrido desde el inicio de la jugada.
+        """
+        return self.clock() - self.start_time
+
+
+    def deadline(self):
+        """
+        Devuelve el instante en el que la búsqueda debe abandonarse.
+        """
+        return self.start_time + self.maximum
+
+
+    def keep_searching(self, previous:dict, current:dict, turn:chess.Color):
+        """
+        Decide, al terminar una iteración, si vale la pena empezar la siguiente.
+        """
+        now = self.clock()
+        self.last_iteration = now - self.iteration_start
+        self.iteration_start = now
+
+        # Valores vistos por el jugador que tiene el turno.
+        sign = 1 if turn == chess.BLACK else -1
+        score = sign * current["Value"]
+
+        if previous:
+            if previous["Movement"] != current["Movement"]:
+                self.factor *= INSTABILITY_FACTOR
+            if score < sign * previous["Value"] - SCORE_DROP:
+                self.factor *= SCORE_DROP_FACTOR
+
+        # La mejor jugada supera claramente a todas las demás.
+        second = current.get("Second")
+        if (current.get("Depth", 0) >= DOMINANCE_DEPTH and second is not None
+                and score - sign * second >= DOMINANCE_MARGIN):
+            return False
+
+        elapsed = now - self.start_time
+        soft_limit = min(self.optimum * self.factor, self.maximum)
+
+        # No empezamos una iteración que no podría terminar a tiempo.
+        return (elapsed < soft_limit
+                and elapsed + self.last_iteration * BRANCHING_FACTOR < self.maximum)
+
+
+def think(board:chess.Board, manager:TimeManager, max_depth:int=MAX_DEPTH, book=None, tablebase=None, options=None, tt=None):
+    """
+    Búsqueda con profundización iterativa limitada por el gestor de tiempo.
+    Devuelve el resultado de la última iteración completa, con la profundidad
+    alcanzada en la clave "Depth". Si no se indica una tabla de transposiciones,
+    se usa una nueva para que cada iteración aproveche las anteriores.
+    """
+    manager.start()
+
+    result = AI.probeRoot(board, book, tablebase)
+    if result:
+        result["Depth"] = 0
+        return result
+
+    # Sin jugadas legales (mate o ahogado) no hay nada que buscar.
+    legal_moves = [str(mov) for mov in board.legal_moves]
+    if not legal_moves:
+        return {"Value":None, "Movement":None, "Depth":0}
+    if len(legal_moves) == 1:
+        return {"Value":None, "Movement":legal_moves[0], "Depth":0}
+
+    if tt is None:
+        tt = TranspositionTable()
+
+    context = AI.SearchContext(tablebase, deadline=manager.deadline(), clock=manager.clock, options=options, tt=tt)
+    result = None
+
+    for depth in range(1, max_depth + 1):
+        try:
+            current = AI.searchRoot(board, depth, context, result and result["Movement"])
+        except AI.SearchTimeout:
+            break
+        if not current:
+            break
+
+        current["Depth"] = depth
+        previous, result = result, current
+
+        if not manager.keep_searching(previous, current, board.turn):
+            break
+
+    # Si ni siquiera la primera iteración terminó, jugamos cualquier jugada legal.
+    if result is None:
+        result = {"Value":None, "Movement":legal_moves[0], "Depth":0}
+
+    result["Nodes"] = context.nodes
+    return result
+
+
+def simulate_game(initial:float, increment:float=0.0, moves_to_go:int=None,
+                  max_moves:int=40, fen:str=chess.STARTING_FEN, clock=time.monotonic):
+    """
+    Juega una partida del motor contra sí mismo con un reloj simulado para cada
+    jugador y comprueba que ninguno se queda sin tiempo.
+
+    Con moves_to_go se simula un control clásico (por ejemplo, 40 jugadas en
+    `initial` segundos): al completar las jugadas del control se suma de nuevo
+    el tiempo inicial. Devuelve un diccionario con el tiempo mínimo que le
+    quedó a cada jugador, el tiempo de cada jugada y si alguno perdió por tiempo.
+    """
+    board = chess.Board(fen)
+    remaining = {chess.WHITE: initial, chess.BLACK: initial}
+    lowest = dict(remaining)
+    to_go = {chess.WHITE: moves_to_go, chess.BLACK: moves_to_go}
+    spent = []
+    flagged = None
+
+    while not board.is_game_over() and len(spent) < max_moves:
+        turn = board.turn
+        manager = TimeManager(remaining[turn], increment, to_go[turn], clock=clock)
+
+        start = clock()
+        result = think(board, manager)
+        elapsed = clock() - start
+
+        spent.append(elapsed)
+        remaining[turn] -= elapsed
+        lowest[turn] = min(lowest[turn], remaining[turn])
+
+        if remaining[turn] < 0:
+            flagged = 'WHITE' if turn == chess.WHITE else 'BLACK'
+            break
+
+        remaining[turn] += increment
+        if moves_to_go:
+            to_go[turn] -= 1
+            if to_go[turn] == 0:
+                to_go[turn] = moves_to_go
+                remaining[turn] += initial
+
+        board.push_uci(result["Movement"])
+
+    return {
+        "Moves": len(spent),
+        "Flagged": flagged,
+        "Lowest": {'WHITE': lowest[chess.WHITE], 'BLACK': lowest[chess.BLACK]},
+        "Spent": spent,
+    }
+
+
+if __name__ == '__main__':
+    # Probamos varios controles de tiempo cortos.
+    for initial, increment, moves_to_go in [(2.0, 0.0, None), (1.0, 0.1, None), (3.0, 0.0, 10)]:
+        report = simulate_game(initial, increment, moves_to_go)
+        print(f'{initial}s + {increment}s, {moves_to_go or "-"} jugadas: '
+              f'{report["Moves"]} jugadas, máximo {max(report["Spent"]):.3f}s, '
+              f'mínimo restante {report["Lowest"]}, '
+              f'{"perdió " + report["Flagged"] if report["Flagged"] else "sin pérdidas por tiempo"}')
@@ -0,0 +1,147 @@
+import math
+import struct
+from storage import pack_move, unpack_move
+
+# Tipos de cota de los valores guardados.
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Cada entrada ocupa 16 bytes: la clave Zobrist combinada con los datos
+# mediante XOR (para validar la entrada) y los datos empaquetados.
+ENTRY_STRUCT = struct.Struct('<QQ')
+
+# Los valores se guardan en 32 bits con signo; los infinitos (mate) se
+# guardan como el valor extremo.
+VALUE_LIMIT = (1 << 31) - 1
+
+DEFAULT_ENTRIES = 1 << 18
+
+
+def pack_entry(depth:int, value, bound:int, move):
+    """
+    Empaqueta profundidad, valor, tipo de cota y jugada en un entero de 64 bits.
+    """
+    if value == math.inf:
+        value = VALUE_LIMIT
+    elif value == -math.inf:
+        value = -VALUE_LIMIT
+
+    return ((int(value) + VALUE_LIMIT)
+            | (min(depth, 255) << 32)
+            | (bound << 40)
+            | ((pack_move(move) if move else 0) << 42))
+
+
+def unpack_entry(data:int):
+    """
+    Devuelve (profundidad, valor, tipo de cota, jugada) a partir de los datos empaquetados.
+    """
+    value = (data & 0xffffffff) - VALUE_LIMIT
+    if value == VALUE_LIMIT:
+        value = math.inf
+    elif value == -VALUE_LIMIT:
+        value = -math.inf
+
+    packed_move = (data >> 42) & 0xffff
+
+    return ((data >> 32) & 0xff, value, (data >> 40) & 0x3, unpack_move(packed_move) if packed_move else None)
+
+
+
+class TranspositionTable:
+    """
+    Tabla de transposiciones de tamaño fijo indexada por la clave Zobrist.
+
+    Las entradas se guardan en un buffer de bytes. Cada una incluye la clave
+    combinada con los datos, de modo que una entrada escrita a medias (por
+    ejemplo, por otro proceso que escribe a la vez) no pasa la validación y
+    se ignora. Esto permite compartir el buffer entre procesos sin bloqueos.
+    """
+
+    def __init__(self, entries:int=DEFAULT_ENTRIES, buffer=None):
+        """
+        El número de entradas debe ser una potencia de dos. Si no se indica un
+        buffer, se reserva uno nuevo en la memoria del proceso.
+        """
+        self.entries = entries
+        self.mask = entries - 1
+        self.buffer = buffer if buffer is not None else bytearray(entries * ENTRY_STRUCT.size)
+        self.hits = 0
+        self.probes = 0
+
+
+    def probe(self, key:int):
+        """
+        Devuelve (profundidad, valor, tipo de cota, jugada) de la posición, o None.
+        """
+        self.probes += 1
+        check, data = ENTRY_STRUCT.unpack_from(self.buffer, (key & self.mask) * ENTRY_STRUCT.size)
+
+        if check ^ data != key or not data:
+            return None
+
+        self.hits += 1
+        return unpack_entry(data)
+
+
+    def store(self, key:int, depth:int, value, bound:int, move=None):
+        """
+        Guarda el resultado de una posición. Una entrada de la misma posición
+        solo se reemplaza si la nueva búsqueda es al menos igual de profunda.
+        """
+        offset = (key & self.mask) * ENTRY_STRUCT.size
+        check, data = ENTRY_STRUCT.unpack_from(self.buffer, offset)
+
+        if data and check ^ data == key and (data >> 32) & 0xff > depth:
+            return
+
+        data = pack_entry(depth, value, bound, move)
+        ENTRY_STRUCT.pack_into(self.buffer, offset, key ^ data, data)
+
+
+    def clear(self):
+        """
+        Borra todas las entradas.
+        """
+        self.buffer[:] = bytes(len(self.buffer))
+
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    Tabla de transposiciones en memoria compartida entre procesos.
+
+    El proceso que la crea reserva la memoria; los demás se conectan a ella con
+    el mismo número de entradas y el nombre del bloque (atributo `name`).
+    """
+
+    def __init__(self, entries:int=DEFAULT_ENTRIES, name:str=None):
+        # multiprocessing solo se importa aquí: la búsqueda en un solo proceso
+        # no lo necesita y su importación es lenta.
+        from multiprocessing import shared_memory
+
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=entries * ENTRY_STRUCT.size)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+
+        self.name = self.memory.name
+        self.owner = name is None
+
+        # El bloque creado puede ser mayor que el pedido (se redondea a páginas).
+        super().__init__(entries, self.memory.buf[:entries * ENTRY_STRUCT.size])
+
+        if self.owner:
+            self.clear()
+
+
+    def close(self):
+        """
+        Se desconecta de la memoria compartida. El proceso que la creó además la libera.
+        """
+        self.buffer.release()
+        self.memory.close()
+
+        if self.owner:
+            self.memory.unlink()
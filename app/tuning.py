@@ -0,0 +1,328 @@
+import argparse
+import itertools
+import time
+import chess
+import chess.pgn
+import numpy as np
+from batch_eval import PIECE_SYMBOLS, game_phase, to_tensor
+from evaluation import MAX_PHASE
+from utils import PIECE_VALUES, POSITION_VALUES, POSITION_VALUES_ENDGAME
+
+# Resultado de la partida desde el punto de vista de las negras, igual que la
+# evaluación (positiva cuando están mejor las negras).
+RESULTS = {'1-0': 0.0, '1/2-1/2': 0.5, '0-1': 1.0}
+
+# Un tablero tiene como mucho 32 piezas. Los huecos de cada fila apuntan a un
+# índice ficticio (PADDING) cuyos parámetros valen siempre 0.
+MAX_PIECES = 32
+PADDING = 12 * 64
+
+# Las piezas cuyo material no se ajusta: los dos reyes están siempre en el
+# tablero, así que su material solo desplazaría todas las evaluaciones.
+FIXED_MATERIAL = 'Kk'
+
+CHUNK_SIZE = 1 << 16
+
+
+def read_pgn(path:str, skip:int=8):
+    """
+    Genera (tablero, resultado) para las posiciones de la línea principal de
+    cada partida del archivo, sin las `skip` primeras jugadas ni las posiciones
+    en jaque. Se omiten las partidas sin resultado.
+    """
+    with open(path, encoding='utf-8-sig') as handle:
+        while True:
+            game = chess.pgn.read_game(handle)
+            if game is None:
+                break
+
+            result = RESULTS.get(game.headers.get('Result'))
+            if result is None:
+                continue
+
+            board = game.board()
+            for ply, move in enumerate(game.mainline_moves()):
+                board.push(move)
+                if ply + 1 >= skip and not board.is_check():
+                    yield board.copy(stack=False), result
+
+
+def read_epd(path:str):
+    """
+    Genera (tablero, resultado) para cada línea del archivo EPD. El resultado
+    se lee de la operación c9 (como en los conjuntos de posiciones de Texel)
+    o de la operación res.
+    """
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+
+            board, operations = chess.Board.from_epd(line)
+            result = RESULTS.get(operations.get('c9') or operations.get('res'))
+            if result is not None:
+                yield board, result
+
+
+def read_positions(paths, skip:int=8):
+    """
+    Genera las posiciones etiquetadas de todos los archivos (.pgn o .epd).
+    """
+    for path in paths:
+        if path.lower().endswith('.pgn'):
+            yield from read_pgn(path, skip)
+        else:
+            yield from read_epd(path)
+
+
+
+class Features:
+    """
+    Matriz dispersa de las posiciones: para cada una, el índice
+    (plano * 64 + casilla) de cada pieza, su fase y su resultado. Con estos
+    datos la evaluación de evaluatePosition (sin la estructura de peones) es
+    lineal en los valores de las tablas.
+    """
+
+    def __init__(self, pieces, phases, results):
+        self.pieces = pieces
+        self.phases = phases
+        self.results = results
+
+
+    def __len__(self):
+        return len(self.results)
+
+
+    @classmethod
+    def build(cls, positions, chunk_size:int=CHUNK_SIZE):
+        """
+        Construye las características a partir de pares (tablero, resultado),
+        procesando los tableros por bloques para no tenerlos todos en memoria.
+        """
+        pieces, phases, results = [], [], []
+        positions = iter(positions)
+
+        while True:
+            chunk = list(itertools.islice(positions, chunk_size))
+            if not chunk:
+                break
+
+            boards, labels = zip(*chunk)
+            tensor = to_tensor(boards)
+
+            # Coordenadas de cada pieza: la posición en el bloque y su índice.
+            rows, planes, squares = np.nonzero(tensor)
+            # Número de pieza dentro de su tablero (np.nonzero las da ordenadas).
+            starts = np.searchsorted(rows, rows, side='left')
+            columns = np.arange(len(rows)) - starts
+
+            block = np.full((len(boards), MAX_PIECES), PADDING, dtype=np.int16)
+            block[rows, columns] = planes * 64 + squares
+
+            pieces.append(block)
+            phases.append(game_phase(tensor).astype(np.float32) / MAX_PHASE)
+            results.append(np.array(labels, dtype=np.float32))
+
+        if not pieces:
+            return cls(np.zeros((0, MAX_PIECES), np.int16), np.zeros(0, np.float32), np.zeros(0, np.float32))
+
+        return cls(np.concatenate(pieces), np.concatenate(phases), np.concatenate(results))
+
+
+    @classmethod
+    def load(cls, path:str):
+        data = np.load(path)
+        return cls(data['pieces'], data['phases'], data['results'])
+
+
+    def save(self, path:str):
+        np.savez(path, pieces=self.pieces, phases=self.phases, results=self.results)
+
+
+
+class Parameters:
+    """
+    Valores ajustables: el material de cada pieza y sus tablas de medio juego
+    y de final, con el mismo orden de planos que batch_eval. Cada uno tiene una
+    entrada más, siempre 0, para el índice de relleno.
+    """
+
+    def __init__(self, piece_values=PIECE_VALUES, position_values=POSITION_VALUES,
+                 endgame_values=POSITION_VALUES_ENDGAME):
+        self.material = np.zeros(13)
+        self.middlegame = np.zeros(PADDING + 1)
+        self.endgame = np.zeros(PADDING + 1)
+
+        for plane, symbol in enumerate(PIECE_SYMBOLS):
+            self.material[plane] = piece_values[symbol]
+            self.middlegame[plane * 64:(plane + 1) * 64] = np.ravel(position_values[symbol])
+            self.endgame[plane * 64:(plane + 1) * 64] = np.ravel(endgame_values[symbol])
+
+        self.fixed = np.array([symbol in FIXED_MATERIAL for symbol in PIECE_SYMBOLS] + [True])
+
+
+    def evaluate(self, pieces, phases):
+        """
+        Evalúa las posiciones como evaluatePosition, sin redondear la mezcla de fases.
+        """
+        return (self.material[pieces >> 6].sum(axis=1)
+                + phases * self.middlegame[pieces].sum(axis=1)
+                + (1 - phases) * self.endgame[pieces].sum(axis=1))
+
+
+    def gradient(self, pieces, phases, errors):
+        """
+        Devuelve el gradiente de cada grupo de parámetros dado el gradiente de
+        la pérdida respecto a la evaluación de cada posición.
+        """
+        flat = pieces.ravel()
+        repeat = lambda values: np.repeat(values, MAX_PIECES)
+
+        material = np.bincount(flat >> 6, repeat(errors), minlength=13)
+        middlegame = np.bincount(flat, repeat(errors * phases), minlength=PADDING + 1)
+        endgame = np.bincount(flat, repeat(errors * (1 - phases)), minlength=PADDING + 1)
+
+        material[self.fixed] = 0
+        middlegame[PADDING] = endgame[PADDING] = 0
+        return material, middlegame, endgame
+
+
+    def tables(self):
+        """
+        Devuelve (PIECE_VALUES, POSITION_VALUES, POSITION_VALUES_ENDGAME) con
+        los valores redondeados, en el formato de utils.
+        """
+        piece_values, position_values, endgame_values = {}, {}, {}
+
+        for symbol in PIECE_VALUES:
+            plane = PIECE_SYMBOLS.index(symbol)
+            piece_values[symbol] = int(round(self.material[plane]))
+            for table, values in ((position_values, self.middlegame), (endgame_values, self.endgame)):
+                square_values = np.rint(values[plane * 64:(plane + 1) * 64]).astype(int)
+                table[symbol] = square_values.reshape(8, 8).tolist()
+
+        return piece_values, position_values, endgame_values
+
+
+
+def sigmoid(values):
+    return 1 / (1 + np.exp(-values))
+
+
+def loss(parameters:Parameters, features:Features, scale:float):
+    """
+    Pérdida logística (entropía cruzada) media de las predicciones.
+    """
+    predictions = sigmoid(scale * parameters.evaluate(features.pieces, features.phases))
+    predictions = np.clip(predictions, 1e-7, 1 - 1e-7)
+    results = features.results
+    return float(-np.mean(results * np.log(predictions) + (1 - results) * np.log(1 - predictions)))
+
+
+def fit_scale(parameters:Parameters, features:Features, low:float=1e-4, high:float=1.0, steps:int=40):
+    """
+    Busca (por sección áurea) la escala que convierte la evaluación en
+    probabilidad de victoria con menor pérdida para los valores actuales.
+    """
+    ratio = (5 ** 0.5 - 1) / 2
+    low, high = np.log(low), np.log(high)
+
+    for _ in range(steps):
+        left = high - ratio * (high - low)
+        right = low + ratio * (high - low)
+        if loss(parameters, features, np.exp(left)) < loss(parameters, features, np.exp(right)):
+            high = right
+        else:
+            low = left
+
+    return float(np.exp((low + high) / 2))
+
+
+def tune(parameters:Parameters, features:Features, scale:float, epochs:int=10, batch_size:int=16384,
+         learning_rate:float=0.5, seed:int=0, log=print):
+    """
+    Ajusta los parámetros con descenso de gradiente por mini-lotes (Adam) sobre
+    la pérdida logística. Cada época recorre todas las posiciones en orden aleatorio.
+    """
+    generator = np.random.default_rng(seed)
+    groups = (parameters.material, parameters.middlegame, parameters.endgame)
+    first = [np.zeros_like(group) for group in groups]
+    second = [np.zeros_like(group) for group in groups]
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    step = 0
+
+    for epoch in range(1, epochs + 1):
+        start = time.perf_counter()
+        order = generator.permutation(len(features))
+
+        for offset in range(0, len(order), batch_size):
+            batch = order[offset:offset + batch_size]
+            pieces, phases = features.pieces[batch], features.phases[batch]
+
+            # Derivada de la entropía cruzada respecto a la evaluación.
+            predictions = sigmoid(scale * parameters.evaluate(pieces, phases))
+            errors = scale * (predictions - features.results[batch]) / len(batch)
+
+            step += 1
+            for group, gradient, m, v in zip(groups, parameters.gradient(pieces, phases, errors), first, second):
+                m *= beta1
+                m += (1 - beta1) * gradient
+                v *= beta2
+                v += (1 - beta2) * gradient ** 2
+                group -= learning_rate * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + epsilon)
+
+        log(f'Época {epoch}: pérdida {loss(parameters, features, scale):.6f} ({time.perf_counter() - start:.2f}s)')
+
+    return parameters
+
+
+def format_tables(piece_values:dict, position_values:dict, endgame_values:dict):
+    """
+    Devuelve el código Python de las tablas con el mismo formato que utils.py.
+    """
+    def table(name, values):
+        lines = [f'{name} = {{']
+        for index, (symbol, rows) in enumerate(values.items()):
+            lines.append(f"        '{symbol}': [")
+            lines.append(',\n'.join('            [' + ','.join(f'{value:>4}' for value in row) + ']' for row in rows))
+            lines.append('        ]' + (',' if index < len(values) - 1 else ''))
+        lines.append('    }')
+        return '\n'.join(lines)
+
+    pieces = ',\n'.join(f"        '{symbol}': {value}" for symbol, value in piece_values.items())
+
+    return '\n\n'.join([table('POSITION_VALUES', position_values),
+                        table('POSITION_VALUES_ENDGAME', endgame_values),
+                        f'PIECE_VALUES = {{\n{pieces}\n    }}']) + '\n'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ajusta las tablas de evaluación con el método de Texel.')
+    parser.add_argument('files', nargs='*', help='archivos .pgn o .epd con posiciones etiquetadas')
+    parser.add_argument('--features', help='archivo .npz donde se guardan (o del que se leen) las características')
+    parser.add_argument('--skip', type=int, default=8, help='jugadas iniciales de cada partida que se ignoran')
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=16384)
+    parser.add_argument('--learning-rate', type=float, default=0.5)
+    parser.add_argument('--output', default='tuned_values.py', help='archivo con las tablas ajustadas')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.features and not args.files:
+        features = Features.load(args.features)
+    else:
+        features = Features.build(read_positions(args.files, args.skip))
+        if args.features:
+            features.save(args.features)
+    print(f'{len(features)} posiciones en {time.perf_counter() - start:.1f}s')
+
+    parameters = Parameters()
+    scale = fit_scale(parameters, features)
+    print(f'Escala: {scale:.5f}  Pérdida inicial: {loss(parameters, features, scale):.6f}')
+
+    tune(parameters, features, scale, args.epochs, args.batch_size, args.learning_rate)
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        handle.write(format_tables(*parameters.tables()))
+    print(f'Tablas guardadas en {args.output}')
@@ -121,6 +121,74 @@ POSITION_VALUES = {
         ]
     }
 
+# Tablas de posición para el final. El rey debe acercarse al centro y los
+# peones valen más cuanto más avanzan; el resto de piezas usa las mismas tablas.
+POSITION_VALUES_ENDGAME = {
+        **POSITION_VALUES,
+        'p': [
+            [0,  0,  0,  0,  0,  0,  0,  0],
+            [60, 60, 60, 60, 60, 60, 60, 60],
+            [35, 35, 35, 35, 35, 35, 35, 35],
+            [20, 20, 20, 20, 20, 20, 20, 20],
+            [10, 10, 10, 10, 10, 10, 10, 10],
+            [5,  5,  5,  5,  5,  5,  5,  5],
+            [0,  0,  0,  0,  0,  0,  0,  0],
+            [0,  0,  0,  0,  0,  0,  0,  0]
+        ],
+        'k': [
+            [-50,-40,-30,-20,-20,-30,-40,-50],
+            [-30,-20,-10,  0,  0,-10,-20,-30],
+            [-30,-10, 20, 30, 30, 20,-10,-30],
+            [-30,-10, 30, 40, 40, 30,-10,-30],
+            [-30,-10, 30, 40, 40, 30,-10,-30],
+            [-30,-10, 20, 30, 30, 20,-10,-30],
+            [-30,-30,  0,  0,  0,  0,-30,-30],
+            [-50,-30,-30,-30,-30,-30,-30,-50]
+        ],
+        'P': [
+            [0,  0,  0,  0,  0,  0,  0,  0],
+            [0,  0,  0,  0,  0,  0,  0,  0],
+            [5,  5,  5,  5,  5,  5,  5,  5],
+            [10, 10, 10, 10, 10, 10, 10, 10],
+            [20, 20, 20, 20, 20, 20, 20, 20],
+            [35, 35, 35, 35, 35, 35, 35, 35],
+            [60, 60, 60, 60, 60, 60, 60, 60],
+            [0,  0,  0,  0,  0,  0,  0,  0]
+        ],
+        'K': [
+            [-50,-30,-30,-30,-30,-30,-30,-50],
+            [-30,-30,  0,  0,  0,  0,-30,-30],
+            [-30,-10, 20, 30, 30, 20,-10,-30],
+            [-30,-10, 30, 40, 40, 30,-10,-30],
+            [-30,-10, 30, 40, 40, 30,-10,-30],
+            [-30,-10, 20, 30, 30, 20,-10,-30],
+            [-30,-20,-10,  0,  0,-10,-20,-30],
+            [-50,-40,-30,-20,-20,-30,-40,-50]
+        ]
+    }
+
+# Peso de cada pieza en la fase de la partida. Con todas las piezas en el
+# tablero la fase vale 24 (medio juego) y sin piezas, 0 (final).
+PHASE_VALUES = {
+        'p': 0,
+        'n': 1,
+        'b': 1,
+        'r': 2,
+        'q': 4,
+        'k': 0
+    }
+
+# Valores de la estructura de peones, desde el punto de vista del dueño de
+# los peones: penalización por peón doblado y por peón aislado, y bonificación
+# del peón pasado según su fila contada desde la primera fila del jugador
+# (0 = primera fila, donde nunca hay peones; 1 = fila inicial de los peones;
+# 7 = fila de coronación, donde tampoco los hay).
+PAWN_STRUCTURE_VALUES = {
+        'Doubled': -4,
+        'Isolated': -3,
+        'Passed': [0, 1, 2, 4, 7, 11, 16, 0]
+    }
+
 PIECE_VALUES = {
         'p': 10,
         'n': 30,
@@ -136,17 +204,12 @@ PIECE_VALUES = {
         'K': -900
     }
 
-PIECE_IMAGES = {
-        'p': "./app/images/black_pawn.png",
-        'n': "./app/images/black_knight.png",
-        'b': "./app/images/black_bishop.png",
-        'r': "./app/images/black_rook.png",
-        'q': "./app/images/black_queen.png",
-        'k': "./app/images/black_king.png",
-        'P': "./app/images/white_pawn.png",
-        'N': "./app/images/white_knight.png",
-        'B': "./app/images/white_bishop.png",
-        'R': "./app/images/white_rook.png",
-        'Q': "./app/images/white_queen.png",
-        'K': "./app/images/white_king.png"
-    }
\ No newline at end of file
+BOOK_PATHS = [
+        "./app/books/openings.bin"
+    ]
+
+SYZYGY_PATH = "./app/syzygy"
+
+SAVE_PATH = "./app/saves/last_game.bin"
+
+ANALYSIS_PATH = "./app/saves/analysis.db"